@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Bulk ASTS motor-quotient scoring.
+Applies the ASTS_SKILL rule - quotient = (50th percentile time / student time) * 100,
+banded by age group and gender - to columnar arrays of sprint records. Division
+and banding (searchsorted over the threshold edges) are vectorized; CSV input is
+streamed in fixed-size chunks so millions of historical records fit in memory.
+
+Usage:
+    python asts_scoring.py sprints.csv -o scored.csv
+    python asts_scoring.py sprints.csv --time-column seconds --chunk-size 500000
+"""
+
+import argparse
+import csv
+import time
+from itertools import chain, islice
+from pathlib import Path
+
+import numpy as np
+
+from normative_levels import LEVELS, UNCLASSIFIED
+from skills_format import SkillCatalog
+
+GENDERS = ("girls", "boys")
+GENDER_ALIASES = {
+    "girls": 0, "girl": 0, "f": 0, "female": 0, "g": 0,
+    "boys": 1, "boy": 1, "m": 1, "male": 1, "b": 1,
+}
+UNKNOWN = -1
+
+
+def parse_age_group(key: str):
+    """'6-8' -> (6, 8); '9' -> (9, 9)"""
+    low, _, high = key.partition("-")
+    return int(low), int(high or low)
+
+
+def gender_codes(genders) -> np.ndarray:
+    """Strings (girls/boys/F/M/...) or 0/1 codes -> int8 codes, UNKNOWN for anything else"""
+    genders = np.asarray(genders)
+    if genders.dtype.kind in "iub":
+        return np.where((genders == 0) | (genders == 1), genders, UNKNOWN).astype(np.int8)
+    # Map each distinct label once, then scatter back with the inverse index
+    labels, inverse = np.unique(genders.astype(str), return_inverse=True)
+    codes = np.array([GENDER_ALIASES.get(label.strip().lower(), UNKNOWN) for label in labels], np.int8)
+    return codes[inverse].reshape(genders.shape)
+
+
+class AstsScorer:
+    """Per (age group, gender) 50th-percentile times and band edges, indexed by age"""
+
+    def __init__(self, skill: dict):
+        groups = skill["ageGroups"]
+        self.group_keys = list(groups)
+        spans = [parse_age_group(key) for key in self.group_keys]
+        self.min_age = min(low for low, _ in spans)
+        # age -> group index lookup (ages outside every group stay UNKNOWN)
+        self.age_group = np.full(max(high for _, high in spans) - self.min_age + 1, UNKNOWN, np.int8)
+        for index, (low, high) in enumerate(spans):
+            self.age_group[low - self.min_age:high - self.min_age + 1] = index
+
+        self.p50 = np.zeros((len(groups), len(GENDERS)))
+        self.edges = np.zeros((len(groups), len(GENDERS), len(LEVELS)))
+        for g, key in enumerate(self.group_keys):
+            for s, gender in enumerate(GENDERS):
+                norms = groups[key][gender]
+                self.p50[g, s] = norms["50th_percentile"]
+                thresholds = norms["normativeThresholds"]
+                unknown = set(thresholds) - set(LEVELS)
+                if unknown:
+                    raise ValueError(f"ASTS {key}/{gender}: unknown level keys {sorted(unknown)}")
+                # Each band starts at its min; a quotient equal to an edge belongs to the higher band
+                self.edges[g, s] = [thresholds[level]["min"] for level in LEVELS]
+                if np.any(np.diff(self.edges[g, s]) < 0):
+                    raise ValueError(f"ASTS {key}/{gender}: band minimums are not ascending")
+
+    @classmethod
+    def from_skills_json(cls, path) -> "AstsScorer":
+        """From skills.json or its compact variants (skills.min.json / skills.msgpack)"""
+        return cls(SkillCatalog.load(path)["asts"])
+
+    @classmethod
+    def default(cls) -> "AstsScorer":
+        from build_skills_json import ASTS_SKILL
+        return cls(ASTS_SKILL["asts"])
+
+    def groups_for(self, ages) -> np.ndarray:
+        ages = np.asarray(ages)
+        index = np.nan_to_num(ages, nan=-1).astype(int) - self.min_age
+        inside = (index >= 0) & (index < len(self.age_group))
+        return np.where(inside, self.age_group[np.where(inside, index, 0)], UNKNOWN).astype(np.int8)
+
+    def score(self, times, ages, genders):
+        """(quotients, level codes) for arrays of times (s), ages and genders.
+        Records with a missing/non-positive time, uncovered age or unknown gender get NaN / UNCLASSIFIED."""
+        times = np.asarray(times, dtype=float)
+        groups = self.groups_for(ages)
+        sexes = gender_codes(genders)
+        valid = (groups != UNKNOWN) & (sexes != UNKNOWN) & (times > 0)
+
+        g, s = np.where(valid, groups, 0), np.where(valid, sexes, 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            quotients = np.where(valid, self.p50[g, s] / times * 100, np.nan)
+
+        levels = np.full(times.shape, UNCLASSIFIED, np.int8)
+        # One searchsorted per (group, gender) edge set - a handful of calls, not one per record
+        keys = g * len(GENDERS) + s
+        for key in np.unique(keys[valid]):
+            mask = valid & (keys == key)
+            edges = self.edges[key // len(GENDERS), key % len(GENDERS)]
+            levels[mask] = np.searchsorted(edges, quotients[mask], side="right") - 1
+        return quotients, levels
+
+    def score_batches(self, batches):
+        """Stream (times, ages, genders) chunks -> (quotients, level codes) chunks"""
+        for times, ages, genders in batches:
+            yield self.score(times, ages, genders)
+
+
+def parse_floats(values) -> np.ndarray:
+    """Strings -> float array; blank or non-numeric entries ("DNF", "absent") become NaN"""
+    values = np.char.strip(np.asarray(values, dtype=str))
+    try:
+        return np.where(values == "", "nan", values).astype(float)
+    except ValueError:
+        return np.array([_float_or_nan(value) for value in values.tolist()], dtype=float)
+
+
+def _float_or_nan(value: str) -> float:
+    try:
+        return float(value)
+    except ValueError:
+        return np.nan
+
+
+def read_csv_batches(path, chunk_size: int, time_column="time", age_column="age", gender_column="gender"):
+    """Yield (header, rows, times, ages, genders) per chunk of a CSV with a header row
+    (one empty chunk when the file has no records)"""
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            raise ValueError(f"{path}: empty file, expected a header row")
+        missing = [name for name in (time_column, age_column, gender_column) if name not in header]
+        if missing:
+            raise ValueError(f"{path}: missing column(s) {', '.join(map(repr, missing))} in header {header}")
+        columns = [header.index(name) for name in (time_column, age_column, gender_column)]
+        first = True
+        while True:
+            rows = list(islice(reader, chunk_size))
+            if not rows and not first:
+                return
+            first = False
+            table = np.array([[row[i] if i < len(row) else "" for i in columns] for row in rows], dtype=str).reshape(-1, 3)
+            yield header, rows, parse_floats(table[:, 0]), parse_floats(table[:, 1]), table[:, 2]
+
+
+def score_csv(scorer: AstsScorer, source, output, chunk_size: int = 1_000_000, **columns) -> int:
+    """Append motor_quotient and level columns to every record; returns records scored"""
+    level_names = np.array(LEVELS + ("",))
+    written = 0
+    batches = read_csv_batches(source, chunk_size, **columns)
+    first = next(batches)  # Header problems surface here, before the output file is created
+    with open(output, "w", encoding="utf-8", newline="") as out:
+        writer = csv.writer(out, lineterminator="\n")
+        writer.writerow(first[0] + ["motor_quotient", "level"])
+        for header, rows, times, ages, genders in chain([first], batches):
+            quotients, levels = scorer.score(times, ages, genders)
+            quotient_text = np.where(np.isnan(quotients), "", np.char.mod("%.2f", quotients))
+            writer.writerows(row + [quotient, level]
+                             for row, quotient, level in zip(rows, quotient_text.tolist(), level_names[levels].tolist()))
+            written += len(rows)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score ASTS sprint records into motor quotients and levels")
+    parser.add_argument("source", help="CSV with a header row containing time, age and gender columns")
+    parser.add_argument("-o", "--output", help="Output CSV (default: <source>_scored.csv)")
+    parser.add_argument("--skills", help="skills.json / skills.min.json to read ASTS norms from (default: build_skills_json)")
+    parser.add_argument("--chunk-size", type=int, default=1_000_000, help="Records per streamed chunk")
+    parser.add_argument("--time-column", default="time")
+    parser.add_argument("--age-column", default="age")
+    parser.add_argument("--gender-column", default="gender")
+    args = parser.parse_args()
+
+    scorer = AstsScorer.from_skills_json(args.skills) if args.skills else AstsScorer.default()
+    source = Path(args.source)
+    output = Path(args.output) if args.output else source.with_name(f"{source.stem}_scored.csv")
+
+    started = time.perf_counter()
+    count = score_csv(scorer, source, output, args.chunk_size, time_column=args.time_column,
+                      age_column=args.age_column, gender_column=args.gender_column)
+    print(f"✓ Scored {count} records in {time.perf_counter() - started:.1f}s")
+    print(f"✓ Saved to: {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Background file writer for the extractors.
+Parsing and formatting stay in the calling thread; finished text is handed to
+writer threads through bounded queues, so a slow disk or a synced OneDrive
+folder no longer stalls the next sheet. Every write for one path goes to the
+same thread (in order), and a full queue blocks the producer instead of
+letting pending output grow without limit.
+"""
+
+import queue
+import threading
+import time
+import zlib
+from pathlib import Path
+
+from instrumentation import Tracer
+
+WRITE_BUFFER = 1 << 16  # Streamed text is handed over in blocks of about this many characters
+_STOP = object()
+
+
+class BackgroundWriter:
+    """Bounded queues of file writes drained by background threads"""
+
+    def __init__(self, threads: int = 2, max_pending: int = 32, tracer: Tracer = None):
+        self.tracer = tracer or Tracer()
+        self._queues = [queue.Queue(max_pending) for _ in range(threads)]
+        self._threads = [threading.Thread(target=self._drain, args=(q,), daemon=True) for q in self._queues]
+        self._errors = []
+        self._closed = False
+        for thread in self._threads:
+            thread.start()
+
+    def _route(self, path: Path) -> queue.Queue:
+        return self._queues[zlib.crc32(str(path).encode()) % len(self._queues)]
+
+    def _drain(self, pending: queue.Queue):
+        files = {}
+        timings = {}    # path -> [first op started, seconds spent writing, characters]
+        while True:
+            op = pending.get()
+            started = time.perf_counter()
+            try:
+                if op is _STOP:
+                    return
+                action, path, payload = op
+                if action == "open":
+                    files[path] = open(path, "w", encoding=payload, buffering=WRITE_BUFFER)
+                    timings[path] = [started, 0.0, 0]
+                elif path in files:     # Paths whose open failed are skipped
+                    if action == "data":
+                        files[path].write(payload)
+                        timings[path][2] += len(payload)
+                    else:
+                        files.pop(path).close()
+                if path in timings:
+                    timings[path][1] += time.perf_counter() - started
+                    if action == "close":
+                        first, seconds, chars = timings.pop(path)
+                        self.tracer.add_event("write file", "report write", first, seconds,
+                                              path=path.name, characters=chars)
+            except Exception as e:
+                self._errors.append(e)
+                if op is not _STOP and op[1] in files:
+                    files.pop(op[1]).close()
+                    timings.pop(op[1], None)
+            finally:
+                pending.task_done()
+
+    def write_text(self, path, text: str, encoding: str = "utf-8"):
+        """Queue a whole file"""
+        self.write_stream(path, [text], encoding)
+
+    def write_stream(self, path, chunks, encoding: str = "utf-8"):
+        """Consume an iterable of strings here, handing them to a writer thread in WRITE_BUFFER blocks"""
+        if self._closed:
+            raise RuntimeError("BackgroundWriter is closed")
+        path = Path(path)
+        target = self._route(path)
+        target.put(("open", path, encoding))
+        try:
+            block, size = [], 0
+            for chunk in chunks:
+                block.append(chunk)
+                size += len(chunk)
+                if size >= WRITE_BUFFER:
+                    target.put(("data", path, "".join(block)))
+                    block, size = [], 0
+            if block:
+                target.put(("data", path, "".join(block)))
+        finally:
+            target.put(("close", path, None))
+
+    def flush(self):
+        """Wait until every queued write is on disk; re-raise the first write error"""
+        for pending in self._queues:
+            pending.join()
+        if self._errors:
+            error, self._errors = self._errors[0], []
+            raise error
+
+    def close(self):
+        """Flush, then stop the writer threads"""
+        if self._closed:
+            return
+        try:
+            self.flush()
+        finally:
+            self._closed = True
+            for pending in self._queues:
+                pending.put(_STOP)
+            for thread in self._threads:
+                thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Batch extraction over a directory (or glob) of tracker workbooks.
+Each workbook is handed to a process-pool worker that runs both the skill and
+VBA extractors into its own output folder; a merged summary is written at the end.
+
+Usage:
+    python batch_extract.py "C:/Trackers" --workers 8 --output batch_extractions
+    python batch_extract.py "C:/Trackers/*/Tracker*.xlsm"
+    python batch_extract.py "C:/Trackers" --trace     # adds trace.jsonl (stage spans) per workbook
+"""
+
+import argparse
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+
+from extract_skills import SimpleSkillExtractor
+from extraction_cache import MANIFEST_NAME
+from extract_vba import VBAExtractor
+from instrumentation import Tracer
+
+WORKBOOK_SUFFIXES = {".xlsm", ".xlsx"}
+
+
+def find_workbooks(source: str) -> list:
+    """Resolve a directory or glob pattern to workbook paths (Excel lock files skipped)"""
+    path = Path(source)
+    if path.is_dir():
+        candidates = [p for p in path.rglob("*") if p.suffix.lower() in WORKBOOK_SUFFIXES]
+    else:
+        candidates = [Path(p) for p in glob.glob(source, recursive=True)]
+    return sorted(p for p in candidates if p.is_file() and not p.name.startswith("~$"))
+
+
+def output_folders(workbooks: list) -> dict:
+    """Give each workbook its own folder name; same-named files get their parent folder prefixed"""
+    stems = [p.stem for p in workbooks]
+    folders = {}
+    for path in workbooks:
+        folder = path.stem if stems.count(path.stem) == 1 else f"{path.parent.name}_{path.stem}"
+        while folder in folders.values():
+            folder += "_"
+        folders[path] = folder
+    return folders
+
+
+def extract_workbook(workbook_path: str, workbook_dir: str, incremental: bool = True, trace: bool = False) -> dict:
+    """Worker: run every extractor stage for one workbook into its own folder (spans in trace.jsonl if trace)"""
+    workbook_path = Path(workbook_path)
+    workbook_name = workbook_path.stem.replace(" ", "_")
+    workbook_dir = Path(workbook_dir)
+    started = time.perf_counter()
+    result = {"workbook": str(workbook_path), "output_dir": str(workbook_dir), "error": None}
+    tracer = Tracer(workbook_dir / "trace.jsonl") if trace else Tracer()
+
+    try:
+        skills = SimpleSkillExtractor(str(workbook_path), output_dir=workbook_dir / "skill_extractions",
+                                      incremental=incremental, tracer=tracer)
+        try:
+            skills.extract_all_sheets()
+        finally:
+            skills.close()
+
+        vba = VBAExtractor(str(workbook_path), output_dir=workbook_dir / "vba_extractions",
+                           incremental=incremental, tracer=tracer)
+        try:
+            vba.extract_vba_from_xlsm(str(workbook_path), workbook_name)
+            vba.extract_sheet_validations(str(workbook_path), workbook_name)
+            vba.extract_named_ranges(str(workbook_path), workbook_name)
+            vba.extract_formulas_detailed(str(workbook_path), workbook_name)
+            vba.create_summary_report()
+        finally:
+            vba.close()
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        tracer.close()
+
+    result["seconds"] = time.perf_counter() - started
+    result["files"] = [
+        (str(f.relative_to(workbook_dir)), f.stat().st_size)
+        for f in sorted(workbook_dir.rglob("*")) if f.is_file() and f.name != MANIFEST_NAME
+    ] if workbook_dir.exists() else []
+    return result
+
+
+def run_batch(workbooks: list, output_root: Path, workers: int, incremental: bool = True, trace: bool = False) -> list:
+    """Fan workbooks out over a process pool; results come back in input order"""
+    output_root.mkdir(parents=True, exist_ok=True)
+    folders = output_folders(workbooks)
+    results = {}
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(extract_workbook, str(p), str(output_root / folders[p]), incremental, trace): p for p in workbooks}
+        for future in as_completed(futures):
+            result = future.result()
+            results[futures[future]] = result
+            status = "✗ " + result["error"] if result["error"] else "✓"
+            print(f"  {status} {Path(result['workbook']).name} ({result['seconds']:.1f}s)")
+
+    return [results[p] for p in workbooks]
+
+
+def create_batch_summary(results: list, output_root: Path, workers: int, elapsed: float) -> Path:
+    """Merged summary across all workbooks (same layout as create_summary_report)"""
+    lines = []
+    lines.append("=" * 100)
+    lines.append("BATCH EXTRACTION SUMMARY")
+    lines.append("=" * 100)
+    lines.append(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+
+    lines.append(f"Output Directory: {output_root.absolute()}")
+    lines.append(f"Workbooks: {len(results)} | Failed: {sum(1 for r in results if r['error'])}")
+    lines.append(f"Workers: {workers} | Wall time: {elapsed:.1f}s\n")
+
+    for result in results:
+        lines.append(f"\n{Path(result['workbook']).name}")
+        lines.append("-" * 100)
+        lines.append(f"Output: {result['output_dir']}")
+        lines.append(f"Time: {result['seconds']:.1f}s")
+        if result["error"]:
+            lines.append(f"Error: {result['error']}")
+        lines.append(f"Files Generated: {len(result['files'])}")
+        for name, size in result["files"]:
+            lines.append(f"  - {name} ({size / 1024:.1f} KB)")
+
+    summary_file = output_root / "00_BATCH_SUMMARY.txt"
+    summary_file.write_text('\n'.join(lines))
+    return summary_file
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract skills, formulas and VBA from many tracker workbooks")
+    parser.add_argument("source", help="Directory of trackers or a glob pattern")
+    parser.add_argument("-o", "--output", default="batch_extractions", help="Output root (one folder per workbook)")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count(), help="Worker processes (default: CPU count)")
+    parser.add_argument("--full", action="store_true", help="Ignore the extraction manifest and rebuild every output")
+    parser.add_argument("--trace", action="store_true", help="Write stage spans to trace.jsonl in each workbook folder")
+    args = parser.parse_args()
+
+    workbooks = find_workbooks(args.source)
+    if not workbooks:
+        print(f"✗ No workbooks found for: {args.source}")
+        return
+
+    print("=" * 100)
+    print(f"BATCH EXTRACTION: {len(workbooks)} workbooks, {args.workers} workers")
+    print("=" * 100)
+
+    output_root = Path(args.output)
+    started = time.perf_counter()
+    results = run_batch(workbooks, output_root, args.workers, incremental=not args.full, trace=args.trace)
+    summary_file = create_batch_summary(results, output_root, args.workers, time.perf_counter() - started)
+
+    print("\n" + "=" * 100)
+    print(f"✓ Batch complete! Summary: {summary_file.absolute()}")
+    print("=" * 100)
+
+
+if __name__ == "__main__":
+    main()
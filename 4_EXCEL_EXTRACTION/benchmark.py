@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+"""
+Extraction benchmark suite.
+Generates synthetic tracker workbooks at increasing sizes, runs every
+extract_skills / extract_vba stage against them, and records wall time plus
+peak memory (tracemalloc and RSS) per stage as JSON that can be diffed between
+versions with the compare command.
+
+Usage:
+    python benchmark.py run --rows 1000 10000 100000 --sheets 11 -o results.json
+    python benchmark.py generate --rows 5000 --sheets 4 -o bench_workbooks
+    python benchmark.py compare baseline.json results.json --threshold 0.10
+"""
+
+import argparse
+import ctypes
+import io
+import json
+import multiprocessing
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.comments import Comment
+from openpyxl.formatting.rule import CellIsRule
+from openpyxl.styles import Font, PatternFill
+from openpyxl.worksheet.datavalidation import DataValidation
+
+from instrumentation import Tracer
+
+RESULTS_VERSION = 1
+DEFAULT_VBA_SOURCE = Path(__file__).resolve().parent.parent / "Rob's PE Movement Assessment Tracker 2.0.xlsm"
+SKILL_NAMES = ["Run", "Vertical Jump", "Leap", "Dodge", "Catch", "Overhand throw", "Kick", "Punt",
+               "Bounce", "Two-handed strike", "Forehand strike"]
+LEVEL_FILLS = {"Beginning": "FFC7CE", "Progressing": "FFEB9C", "Achieving": "C6EFCE", "Excelling": "9BC2E6"}
+FIRST_ROW = 5  # Student rows start under the title/header block, as in the tracker
+COMMENT_EVERY = 100
+
+# Age -> [beginning max, progressing max, achieving max, excelling min] (Vic FMS run table)
+NORMS = {5: [0, 0, 1, 2], 6: [0, 1, 2, 3], 7: [1, 2, 3, 4], 8: [2, 3, 4, 5],
+         9: [3, 4, 5, 6], 10: [3, 4, 5, 6], 11: [3, 4, 5, 6], 12: [3, 4, 5, 6]}
+
+
+def _level_formula(row: int) -> str:
+    """Nested IF/INDEX/MATCH level lookup in the same shape as the tracker's skill sheets"""
+    def lookup(col):
+        return f"INDEX(Norms!${col}$2:${col}$9, MATCH(G{row}, Norms!$A$2:$A$9, 0))"
+    return (f'=IFERROR(IF(H{row} <= {lookup("B")}, "Beginning", IF(H{row} <= {lookup("C")}, "Progressing", '
+            f'IF(H{row} <= {lookup("D")}, "Achieving", IF(H{row} >= {lookup("E")}, "Excelling", "Error")))), '
+            f'"Age Not Found")')
+
+
+def _vba_archive(source: Path):
+    """In-memory archive with the source workbook's vbaProject.bin plus the package parts openpyxl
+    consults when saving with macros ([Content_Types].xml, _rels/.rels)"""
+    if not source or not Path(source).exists():
+        return None
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(source) as archive, zipfile.ZipFile(buffer, "w") as vba:
+        if "xl/vbaProject.bin" not in archive.namelist():
+            return None
+        for part in ("xl/vbaProject.bin", "[Content_Types].xml", "_rels/.rels"):
+            vba.writestr(part, archive.read(part))
+    return zipfile.ZipFile(buffer)
+
+
+def generate_workbook(path: Path, rows: int, sheets: int, seed: int = 0, vba_source: Path = DEFAULT_VBA_SOURCE) -> Path:
+    """Write a synthetic tracker: Class List, N skill sheets, Norms and Summary, with formulas,
+    merged titles, comments, conditional formatting and data validation"""
+    rng = random.Random(seed)
+    skills = [SKILL_NAMES[i % len(SKILL_NAMES)] + (f" {i // len(SKILL_NAMES) + 1}" if i >= len(SKILL_NAMES) else "")
+              for i in range(sheets)]
+    last = FIRST_ROW + rows - 1
+
+    wb = Workbook(write_only=True)
+    wb.vba_archive = _vba_archive(vba_source)
+    header_font = Font(bold=True)
+
+    def header(ws, labels):
+        ws.append([])
+        ws.append([])
+        ws.append([])
+        cells = [WriteOnlyCell(ws, value=label) for label in labels]
+        for cell in cells:
+            cell.font = header_font
+        ws.append(cells)
+
+    # Class List: names, class, age, and each skill's level pulled back from its sheet
+    ws = wb.create_sheet("Class List")
+    ws.merged_cells.add(f"A1:{chr(ord('D') + min(sheets, 22))}1")
+    header(ws, ["Student name", "Class", "Age"] + skills)
+    for r in range(FIRST_ROW, last + 1):
+        ws.append([f"Student {r - FIRST_ROW + 1}", f"{rng.choice('3456')}{rng.choice('ABC')}", rng.randint(5, 12)]
+                  + [f"='{skill}'!I{r}" for skill in skills])
+
+    for skill in skills:
+        ws = wb.create_sheet(skill)
+        ws.merged_cells.add("A1:I1")
+        ws.merged_cells.add("B3:F3")
+        header(ws, ["Student name", "C1", "C2", "C3", "C4", "C5", "Age", "Total", "Level"])
+        for r in range(FIRST_ROW, last + 1):
+            name = WriteOnlyCell(ws, value=f"='Class List'!A{r}")
+            if (r - FIRST_ROW) % COMMENT_EVERY == 0:
+                name.comment = Comment(f"Reassess {skill} next term", "Teacher")
+            ws.append([name] + [rng.randint(0, 1) for _ in range(5)]
+                      + [f"='Class List'!$C{r}", f"=SUM(B{r}:F{r})", _level_formula(r)])
+        for level, color in LEVEL_FILLS.items():
+            ws.conditional_formatting.add(f"I{FIRST_ROW}:I{last}", CellIsRule(
+                operator="equal", formula=[f'"{level}"'], fill=PatternFill("solid", start_color=color)))
+        validation = DataValidation(type="list", formula1='"0,1"', allow_blank=True)
+        validation.add(f"B{FIRST_ROW}:F{last}")
+        ws.data_validations.append(validation)
+
+    ws = wb.create_sheet("Norms")
+    ws.append(["Age", "Beginning", "Progressing", "Achieving", "Excelling"])
+    for age, bands in NORMS.items():
+        ws.append([age] + bands)
+
+    ws = wb.create_sheet("Summary")
+    ws.append(["Skill"] + list(LEVEL_FILLS))
+    for skill in skills:
+        ws.append([skill] + [f"=COUNTIF('{skill}'!I${FIRST_ROW}:I${last}, \"{level}\")" for level in LEVEL_FILLS])
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    wb.save(path)
+    return path
+
+
+def workbook_name(rows: int, sheets: int) -> str:
+    return f"synthetic_{rows}r_{sheets}s.xlsm"
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+def _rss_bytes(field: str):
+    """VmRSS / VmHWM from /proc (Linux); None elsewhere"""
+    try:
+        for line in Path("/proc/self/status").read_text().splitlines():
+            if line.startswith(field + ":"):
+                return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def _reset_peak_rss():
+    """Reset VmHWM so each stage reports its own peak (best effort, Linux only)"""
+    try:
+        Path("/proc/self/clear_refs").write_text("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss():
+    """Peak RSS of this process in bytes: VmHWM, getrusage, or the peak working set on Windows; None elsewhere"""
+    peak = _rss_bytes("VmHWM")
+    if peak is not None:
+        return peak
+    try:
+        import resource
+    except ImportError:     # Windows has no resource module
+        resource = None
+    if resource is not None:
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss if sys.platform == "darwin" else maxrss * 1024
+    if sys.platform == "win32":
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [("cb", ctypes.c_ulong), ("PageFaultCount", ctypes.c_ulong)] + [
+                (name, ctypes.c_size_t) for name in (
+                    "PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage", "QuotaPagedPoolUsage",
+                    "QuotaPeakNonPagedPoolUsage", "QuotaNonPagedPoolUsage", "PagefileUsage", "PeakPagefileUsage")]
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        if ctypes.windll.psapi.GetProcessMemoryInfo(ctypes.windll.kernel32.GetCurrentProcess(),
+                                                    ctypes.byref(counters), counters.cb):
+            return counters.PeakWorkingSetSize
+    return None
+
+
+class StageErrors(Tracer):
+    """Records nothing but keeps the exceptions stages handle themselves (they print "Skipped" and return)"""
+
+    def __init__(self):
+        super().__init__()
+        self.errors = []
+
+    def record_error(self, error: BaseException):
+        self.errors.append(f"{type(error).__name__}: {error}")
+
+
+def benchmark_stages(workbook_path: str, output_dir: str):
+    """[(stage name, callable)] covering every extractor stage, in pipeline order"""
+    from extract_skills import SimpleSkillExtractor
+    from extract_vba import VBAExtractor
+
+    name = Path(workbook_path).stem.replace(" ", "_")
+    state = {"errors": StageErrors()}
+
+    def skills():
+        state["skills"] = SimpleSkillExtractor(workbook_path, output_dir=Path(output_dir) / "skill_extractions",
+                                               incremental=False, tracer=state["errors"])
+        state["skills"].extract_all_sheets()
+        state["skills"].close()
+
+    def vba_stage(method):
+        def run():
+            if "vba" not in state:
+                state["vba"] = VBAExtractor(workbook_path, output_dir=Path(output_dir) / "vba_extractions",
+                                            incremental=False, tracer=state["errors"])
+            getattr(state["vba"], method)(*([] if method == "create_summary_report" else [workbook_path, name]))
+        return run
+
+    stages = [("skills.extract_all_sheets", skills)]
+    for method in ("extract_vba_from_xlsm", "extract_sheet_validations", "extract_named_ranges",
+                   "extract_formulas_detailed", "create_summary_report"):
+        stages.append((f"vba.{method}", vba_stage(method)))
+    return stages, state
+
+
+def run_workbook(workbook_path: str, output_dir: str, trace_memory: bool = True) -> dict:
+    """Worker: run each stage once, in a fresh process, recording time and memory"""
+    stages, state = benchmark_stages(workbook_path, output_dir)
+    results = []
+    for stage, run in stages:
+        peak_resettable = _reset_peak_rss()
+        rss_before = _rss_bytes("VmRSS")
+        if trace_memory:
+            tracemalloc.start()
+        started = time.perf_counter()
+        cpu_started = time.process_time()
+        error = None
+        state["errors"].errors.clear()
+        try:
+            run()
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        if error is None and state["errors"].errors:
+            error = state["errors"].errors[0]
+        wall = time.perf_counter() - started
+        cpu = time.process_time() - cpu_started
+        traced_peak = None
+        if trace_memory:
+            traced_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        results.append({
+            "stage": stage,
+            "wall_seconds": round(wall, 4),
+            "cpu_seconds": round(cpu, 4),
+            "tracemalloc_peak_bytes": traced_peak,
+            "rss_before_bytes": rss_before,
+            "peak_rss_bytes": _peak_rss(),
+            "peak_rss_is_process_wide": not peak_resettable,
+            "error": error,
+        })
+    if "vba" in state:
+        state["vba"].close()
+    return {"workbook": Path(workbook_path).name, "size_bytes": Path(workbook_path).stat().st_size, "stages": results}
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=Path(__file__).parent, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_benchmarks(row_counts, sheets: int, workdir: Path, trace_memory: bool = True, vba_source=DEFAULT_VBA_SOURCE) -> dict:
+    results = []
+    # One spawned process per workbook keeps RSS peaks and import caches independent
+    context = multiprocessing.get_context("spawn")
+    for rows in row_counts:
+        path = workdir / workbook_name(rows, sheets)
+        started = time.perf_counter()
+        generate_workbook(path, rows, sheets, vba_source=vba_source)
+        print(f"  ✓ Generated {path.name} ({path.stat().st_size / 1024:.0f} KB, {time.perf_counter() - started:.1f}s)")
+
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            result = pool.submit(run_workbook, str(path), str(workdir / path.stem), trace_memory).result()
+        result.update({"rows": rows, "sheets": sheets})
+        results.append(result)
+        for stage in result["stages"]:
+            status = "✗" if stage["error"] else "✓"
+            rss = f"{stage['peak_rss_bytes'] / 2**20:>7.1f} MB" if stage["peak_rss_bytes"] is not None else "      -"
+            print(f"    {status} {stage['stage']:<32} {stage['wall_seconds']:>8.2f}s rss {rss}")
+
+    return {
+        "version": RESULTS_VERSION,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "tracemalloc": trace_memory,
+        "results": results,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Compare
+# ---------------------------------------------------------------------------
+
+def failed_stages(baseline: dict, current: dict) -> list:
+    """[(file, workbook, stage, error)] for stages that failed in either run - their timings mean nothing"""
+    return [(label, r["workbook"], s["stage"], s["error"])
+            for label, results in (("baseline", baseline), ("current", current))
+            for r in results["results"] for s in r["stages"] if s.get("error")]
+
+
+def compare_results(baseline: dict, current: dict, threshold: float = 0.10, min_seconds: float = 0.05) -> list:
+    """[(workbook, stage, metric, old, new, ratio, regressed)] for stages present in both files that
+    succeeded in both (a stage that fails early would otherwise look like a speedup)"""
+    old = {(r["workbook"], s["stage"]): s for r in baseline["results"] for s in r["stages"]}
+    rows = []
+    for result in current["results"]:
+        for stage in result["stages"]:
+            previous = old.get((result["workbook"], stage["stage"]))
+            if previous is None or previous.get("error") or stage.get("error"):
+                continue
+            for metric, floor in (("wall_seconds", min_seconds), ("peak_rss_bytes", 2**20)):
+                before, after = previous.get(metric), stage.get(metric)
+                if not before or after is None:
+                    continue
+                ratio = after / before
+                regressed = ratio > 1 + threshold and after - before > floor
+                rows.append((result["workbook"], stage["stage"], metric, before, after, ratio, regressed))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the extractors on synthetic tracker workbooks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Generate workbooks and time every extractor stage")
+    run.add_argument("--rows", type=int, nargs="+", default=[1000, 10000], help="Student rows per workbook")
+    run.add_argument("--sheets", type=int, default=len(SKILL_NAMES), help="Skill sheets per workbook")
+    run.add_argument("--workdir", help="Where workbooks and extraction output go (default: temp dir)")
+    run.add_argument("--no-tracemalloc", action="store_true", help="Skip tracemalloc (it slows Python-heavy stages)")
+    run.add_argument("--vba-from", default=str(DEFAULT_VBA_SOURCE), help="Workbook whose vbaProject.bin is embedded")
+    run.add_argument("-o", "--output", default="benchmark_results.json")
+
+    generate = commands.add_parser("generate", help="Only write synthetic workbooks")
+    generate.add_argument("--rows", type=int, nargs="+", default=[1000])
+    generate.add_argument("--sheets", type=int, default=len(SKILL_NAMES))
+    generate.add_argument("--vba-from", default=str(DEFAULT_VBA_SOURCE))
+    generate.add_argument("-o", "--output", default="bench_workbooks")
+
+    compare = commands.add_parser("compare", help="Diff two results files and flag regressions")
+    compare.add_argument("baseline")
+    compare.add_argument("current")
+    compare.add_argument("--threshold", type=float, default=0.10, help="Allowed slowdown ratio (default 10%%)")
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        for rows in args.rows:
+            path = generate_workbook(Path(args.output) / workbook_name(rows, args.sheets), rows, args.sheets,
+                                     vba_source=Path(args.vba_from))
+            print(f"✓ {path}")
+
+    elif args.command == "run":
+        with tempfile.TemporaryDirectory(prefix="tracker_bench_") as tmp:
+            workdir = Path(args.workdir) if args.workdir else Path(tmp)
+            print("=" * 100)
+            print(f"BENCHMARK: rows {args.rows}, {args.sheets} skill sheets")
+            print("=" * 100)
+            results = run_benchmarks(args.rows, args.sheets, workdir, not args.no_tracemalloc, Path(args.vba_from))
+        Path(args.output).write_text(json.dumps(results, indent=2))
+        print(f"\n✓ Results saved to: {Path(args.output).absolute()}")
+
+    else:
+        baseline, current = json.loads(Path(args.baseline).read_text()), json.loads(Path(args.current).read_text())
+        rows = compare_results(baseline, current, args.threshold)
+        regressions = 0
+        for workbook, stage, metric, before, after, ratio, regressed in rows:
+            flag = "✗ REGRESSION" if regressed else ""
+            regressions += regressed
+            print(f"{workbook:<32} {stage:<32} {metric:<16} {before:>12.4g} -> {after:<12.4g} {ratio:>6.2f}x {flag}")
+        failures = failed_stages(baseline, current)
+        for label, workbook, stage, error in failures:
+            print(f"{workbook:<32} {stage:<32} ✗ FAILED ({label}): {error}")
+        print(f"\n{'✗' if regressions else '✓'} {regressions} regression(s) over {args.threshold:.0%}")
+        if failures:
+            print(f"✗ {len(failures)} failed stage(s) left out of the comparison")
+        sys.exit(1 if regressions or failures else 0)
+
+
+if __name__ == "__main__":
+    main()
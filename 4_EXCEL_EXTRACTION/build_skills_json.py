@@ -5,8 +5,12 @@ Based on analysis of Run, ASTS, Gymnastics, Rock to stand sheets
 """
 
 import json
+import sys
 from pathlib import Path
 
+from normative_levels import LevelTables
+from skills_format import msgpack, write_compact
+
 # Define all skills based on extracted data
 # Vic FMS skills (Component-based, 5 components each)
 VIC_FMS_SKILLS = {
@@ -72,7 +76,7 @@ VIC_FMS_SKILLS = {
             "5": {"beginning": [0, 0], "progressing": [0, 1], "achieving": [2, 3], "excelling": [4, 5]},
             "6": {"beginning": [0, 1], "progressing": [2, 2], "achieving": [3, 3], "excelling": [4, 5]},
             "7": {"beginning": [1, 2], "progressing": [3, 3], "achieving": [4, 4], "excelling": [5, 5]},
-            "8": {"beginning": [2, 3], "progressing": [4, 4], "achieve": [5, 5], "excelling": None},
+            "8": {"beginning": [2, 3], "progressing": [4, 4], "achieving": [5, 5], "excelling": None},
             "9": {"beginning": [3, 4], "progressing": [5, 5], "achieving": None, "excelling": None},
             "10": {"beginning": [3, 4], "progressing": [5, 5], "achieving": None, "excelling": None},
             "11": {"beginning": [3, 4], "progressing": [5, 5], "achieving": None, "excelling": None},
@@ -256,7 +260,7 @@ VIC_FMS_SKILLS = {
             "5": {"beginning": [0, 0], "progressing": [0, 1], "achieving": [2, 3], "excelling": [4, 5]},
             "6": {"beginning": [0, 1], "progressing": [2, 2], "achieving": [3, 3], "excelling": [4, 5]},
             "7": {"beginning": [1, 2], "progressing": [3, 3], "achieving": [4, 4], "excelling": [5, 5]},
-            "8": {"beginning": [2, 3], "progressing": [4, 4], "achieve": [5, 5], "excelling": None},
+            "8": {"beginning": [2, 3], "progressing": [4, 4], "achieving": [5, 5], "excelling": None},
             "9": {"beginning": [3, 4], "progressing": [5, 5], "achieving": None, "excelling": None},
             "10": {"beginning": [3, 4], "progressing": [5, 5], "achieving": None, "excelling": None},
             "11": {"beginning": [3, 4], "progressing": [5, 5], "achieving": None, "excelling": None},
@@ -395,11 +399,22 @@ def main():
         "skills": list(all_skills.values())
     }
     
+    # Compile thresholds first so an invalid level key fails the build before anything is written
+    level_tables = LevelTables.compile(all_skills.values())
+
     # Write to skills.json
-    output_path = Path("C:/Users/robke/OneDrive/Desktop/Rob's FMS Scorecard/skills.json")
+    output_path = Path(sys.argv[1]) if len(sys.argv) > 1 else Path("C:/Users/robke/OneDrive/Desktop/Rob's FMS Scorecard/skills.json")
     output_path.write_text(json.dumps(output, indent=2))
+    levels_path = level_tables.save(output_path.with_name("skills_levels.npz"))
+    compact_paths = write_compact(output, output_path)
     
     print("✓ Generated skills.json")
+    for path in compact_paths:
+        print(f"✓ Compact variant: {path.name} ({path.stat().st_size / 1024:.1f} KB)")
+    if msgpack is None:
+        print("- msgpack not installed, binary variant skipped")
+    print(f"✓ Level tables: {len(level_tables.skill_ids)} skills x ages {level_tables.min_age}-{level_tables.max_age} "
+          f"x scores 0-{level_tables.max_score} -> {levels_path.name}")
     print(f"✓ Total skills: {len(all_skills)}")
     print(f"✓ Saved to: {output_path}")
     print("\nSkills included:")
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Columnar export of every sheet's full cell grid.
+Each populated cell becomes one record (sheet, row, col, kind, number, text,
+formula, style) with strings and formulas dictionary-encoded, written as an
+Arrow IPC file when pyarrow is installed and as an uncompressed .npz otherwise.
+Both can be memory-mapped, so analytics jobs read a school's data without
+openpyxl and without parsing XML again.
+
+Usage:
+    python columnar_export.py tracker.xlsm -o tracker.cells.npz
+    python columnar_export.py tracker.cells.npz --sheet Run
+"""
+
+import argparse
+import json
+import time
+import zipfile
+from datetime import date, datetime, time as dt_time, timedelta
+from pathlib import Path
+
+import numpy as np
+
+from formula_eval import BLANK, BOOL, ERROR, ERROR_CODES, NUMBER, TEXT
+from xlsx_stream import StreamingWorkbook
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+
+FORMAT_VERSION = 1
+DATETIME = 5  # Dates/times/durations; ISO text is kept in the string dictionary
+KIND_NAMES = {BLANK: "blank", NUMBER: "number", TEXT: "text", BOOL: "bool", ERROR: "error", DATETIME: "datetime"}
+NO_STRING = -1
+SUFFIXES = {"arrow": ".cells.arrow", "npz": ".cells.npz"}
+CELL_COLUMNS = ("sheet", "row", "col", "kind", "number", "text", "formula", "style")
+
+
+class StringDictionary:
+    """Dictionary encoder shared by every text and formula column of a workbook"""
+
+    def __init__(self):
+        self.codes = {}
+
+    def encode(self, value) -> int:
+        if value is None:
+            return NO_STRING
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.codes)
+        return code
+
+    @property
+    def values(self) -> list:
+        return list(self.codes)
+
+    def to_arrays(self):
+        """Arrow-style layout: one UTF-8 blob plus int64 offsets (mmap-friendly, no fixed width)"""
+        encoded = [s.encode("utf-8") for s in self.codes]
+        offsets = np.zeros(len(encoded) + 1, np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        return np.frombuffer(b"".join(encoded), np.uint8), offsets
+
+
+def _classify(value):
+    """StreamCell value -> (kind, number, text)"""
+    if value is None:
+        return BLANK, np.nan, None
+    if isinstance(value, bool):
+        return BOOL, float(value), None
+    if isinstance(value, (int, float)):
+        return NUMBER, float(value), None
+    if isinstance(value, (datetime, date, dt_time)):
+        return DATETIME, np.nan, value.isoformat()
+    if isinstance(value, timedelta):
+        return DATETIME, value.total_seconds(), str(value)
+    value = str(value)
+    return (ERROR if value in ERROR_CODES else TEXT), np.nan, value
+
+
+def collect_cells(workbook: StreamingWorkbook):
+    """Stream every sheet once into column lists; empty cells (no value, no formula) are skipped"""
+    strings = StringDictionary()
+    columns = {name: [] for name in CELL_COLUMNS}
+    sheets = []
+    for sheet_index, sheet_name in enumerate(workbook.sheetnames):
+        sheet = workbook.open_sheet(sheet_name)
+        count = 0
+        for cells in sheet.rows():
+            for cell in cells:
+                if cell.value is None and cell.formula is None:
+                    continue
+                kind, number, text = _classify(cell.value)
+                columns["sheet"].append(sheet_index)
+                columns["row"].append(cell.row)
+                columns["col"].append(cell.column)
+                columns["kind"].append(kind)
+                columns["number"].append(number)
+                columns["text"].append(strings.encode(text))
+                columns["formula"].append(strings.encode(cell.formula))
+                columns["style"].append(cell.style_id)
+                count += 1
+        sheets.append({"name": sheet_name, "dimension": sheet.dimension, "cells": count})
+
+    arrays = {
+        "sheet": np.array(columns["sheet"], np.int16),
+        "row": np.array(columns["row"], np.int32),
+        "col": np.array(columns["col"], np.int16),
+        "kind": np.array(columns["kind"], np.int8),
+        "number": np.array(columns["number"], np.float64),
+        "text": np.array(columns["text"], np.int32),
+        "formula": np.array(columns["formula"], np.int32),
+        "style": np.array(columns["style"], np.int32),
+    }
+    meta = {"version": FORMAT_VERSION, "source": Path(workbook.path).name, "sheets": sheets, "kinds": KIND_NAMES}
+    return arrays, strings, meta
+
+
+def resolve_backend(backend: str = "auto") -> str:
+    """'auto' -> 'arrow' when pyarrow is installed, else 'npz'"""
+    if backend == "auto":
+        return "arrow" if pa is not None else "npz"
+    if backend == "arrow" and pa is None:
+        raise ImportError("pyarrow is not installed - use backend='npz'")
+    return backend
+
+
+def export_workbook(workbook_path, output_path=None, backend: str = "auto") -> Path:
+    """Write the columnar file; backend is 'arrow', 'npz' or 'auto' (arrow when pyarrow is installed)"""
+    backend = resolve_backend(backend)
+    output_path = Path(output_path) if output_path else Path(workbook_path).with_suffix(SUFFIXES[backend])
+    with StreamingWorkbook(str(workbook_path)) as workbook:
+        arrays, strings, meta = collect_cells(workbook)
+
+    if backend == "arrow":
+        _write_arrow(output_path, arrays, strings, meta)
+    else:
+        blob, offsets = strings.to_arrays()
+        meta_bytes = np.frombuffer(json.dumps(meta).encode("utf-8"), np.uint8)
+        # Stored (not deflated) so every member can be memory-mapped in place
+        np.savez(output_path, meta=meta_bytes, strings_blob=blob, strings_offsets=offsets, **arrays)
+        if output_path.suffix != ".npz":
+            output_path = output_path.with_name(output_path.name + ".npz")
+    return output_path
+
+
+def _write_arrow(output_path: Path, arrays: dict, strings: StringDictionary, meta: dict):
+    dictionary = pa.array(strings.values, pa.string())
+
+    def encoded(codes):
+        mask = codes == NO_STRING
+        return pa.DictionaryArray.from_arrays(pa.array(np.where(mask, 0, codes), pa.int32(), mask=mask), dictionary)
+
+    table = pa.table({
+        "sheet": pa.array(arrays["sheet"]),
+        "row": pa.array(arrays["row"]),
+        "col": pa.array(arrays["col"]),
+        "kind": pa.array(arrays["kind"]),
+        "number": pa.array(arrays["number"]),
+        "text": encoded(arrays["text"]),
+        "formula": encoded(arrays["formula"]),
+        "style": pa.array(arrays["style"]),
+    }).replace_schema_metadata({"columnar_export": json.dumps(meta)})
+    with pa.OSFile(str(output_path), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+
+
+def _memmap_npz(path: Path) -> dict:
+    """Memory-map every member of an uncompressed .npz (np.load ignores mmap_mode for archives)"""
+    arrays = {}
+    with zipfile.ZipFile(path) as archive, open(path, "rb") as f:
+        for info in archive.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                return dict(np.load(path))
+            # Local file header: 30 fixed bytes + name + extra field, then the .npy payload
+            f.seek(info.header_offset + 26)
+            name_len, extra_len = np.frombuffer(f.read(4), "<u2")
+            f.seek(info.header_offset + 30 + int(name_len) + int(extra_len))
+            version = np.lib.format.read_magic(f)
+            read_header = np.lib.format.read_array_header_1_0 if version == (1, 0) else np.lib.format.read_array_header_2_0
+            shape, fortran, dtype = read_header(f)
+            if 0 in shape:  # np.memmap cannot map an empty region
+                arrays[info.filename[:-4]] = np.empty(shape, dtype)
+                continue
+            arrays[info.filename[:-4]] = np.memmap(path, dtype=dtype, mode="r", offset=f.tell(), shape=shape,
+                                                   order="F" if fortran else "C")
+    return arrays
+
+
+class SheetCells:
+    """Column views for one sheet of a ColumnarWorkbook"""
+
+    def __init__(self, book: "ColumnarWorkbook", name: str, index: np.ndarray):
+        self.book = book
+        self.name = name
+        self._index = index
+
+    def __len__(self):
+        return len(self._index)
+
+    def column(self, name: str) -> np.ndarray:
+        return self.book.columns[name][self._index]
+
+    def values(self) -> list:
+        """Decoded Python values (numbers, bools, text, error codes, ISO dates) in sheet order"""
+        kinds, numbers, texts = self.column("kind"), self.column("number"), self.column("text")
+        out = []
+        for kind, number, text in zip(kinds, numbers, texts):
+            if kind == NUMBER:
+                out.append(int(number) if float(number).is_integer() else float(number))
+            elif kind == BOOL:
+                out.append(bool(number))
+            elif kind in (TEXT, ERROR, DATETIME):
+                out.append(self.book.string(text))
+            else:
+                out.append(None)
+        return out
+
+    def formulas(self) -> dict:
+        """coordinate (row, col) -> formula text for cells that hold one"""
+        codes = self.column("formula")
+        has = codes != NO_STRING
+        return {(int(r), int(c)): self.book.string(code)
+                for r, c, code in zip(self.column("row")[has], self.column("col")[has], codes[has])}
+
+    def to_grid(self) -> np.ndarray:
+        """Dense 1-based object grid [row, col] of cached values (None where empty)"""
+        rows, cols = self.column("row"), self.column("col")
+        grid = np.full((int(rows.max(initial=0)) + 1, int(cols.max(initial=0)) + 1), None, object)
+        grid[rows, cols] = np.array(self.values() + [None], object)[:-1]
+        return grid
+
+
+class ColumnarWorkbook:
+    """Reader for files written by export_workbook (memory-mapped where the backend allows)"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        if self.path.suffix == ".arrow":
+            self._open_arrow()
+        else:
+            arrays = _memmap_npz(self.path)
+            self.meta = json.loads(bytes(arrays.pop("meta")).decode("utf-8"))
+            self._blob = arrays.pop("strings_blob")
+            self._offsets = arrays.pop("strings_offsets")
+            self._strings = None
+            self.columns = arrays
+        self._sheet_rows = None
+
+    def _open_arrow(self):
+        table = pa.ipc.open_file(pa.memory_map(str(self.path), "r")).read_all()
+        self.meta = json.loads(table.schema.metadata[b"columnar_export"])
+        self.columns = {}
+        for name in CELL_COLUMNS:
+            column = table.column(name).combine_chunks()
+            if name in ("text", "formula"):
+                self._strings = column.dictionary.to_pylist()
+                column = column.indices.fill_null(NO_STRING)
+            self.columns[name] = column.to_numpy(zero_copy_only=False)
+
+    @property
+    def sheetnames(self) -> list:
+        return [sheet["name"] for sheet in self.meta["sheets"]]
+
+    def string(self, code: int):
+        if code == NO_STRING:
+            return None
+        if self._strings is not None:
+            return self._strings[code]
+        start, end = self._offsets[code], self._offsets[code + 1]
+        return bytes(self._blob[start:end]).decode("utf-8")
+
+    def sheet(self, name: str) -> SheetCells:
+        if self._sheet_rows is None:
+            # Records are written sheet by sheet, so each sheet is one contiguous slice
+            sheet_ids = self.columns["sheet"]
+            bounds = np.searchsorted(sheet_ids, np.arange(len(self.sheetnames) + 1))
+            self._sheet_rows = {n: slice(int(bounds[i]), int(bounds[i + 1])) for i, n in enumerate(self.sheetnames)}
+        return SheetCells(self, name, self._sheet_rows[name])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export workbook cells to a columnar file, or inspect one")
+    parser.add_argument("source", help="Workbook (.xlsm/.xlsx) to export, or a .npz/.arrow file to inspect")
+    parser.add_argument("-o", "--output", help="Output path (default: next to the workbook)")
+    parser.add_argument("--backend", choices=("auto", "arrow", "npz"), default="auto")
+    parser.add_argument("--sheet", help="When inspecting: print this sheet's first cells")
+    args = parser.parse_args()
+
+    source = Path(args.source)
+    started = time.perf_counter()
+    if source.suffix in (".npz", ".arrow"):
+        book = ColumnarWorkbook(source)
+        print(f"✓ Opened {source.name} in {(time.perf_counter() - started) * 1000:.1f} ms")
+        for sheet in book.meta["sheets"]:
+            print(f"  - {sheet['name']}: {sheet['cells']} cells ({sheet['dimension']})")
+        if args.sheet:
+            cells = book.sheet(args.sheet)
+            for row, col, value in list(zip(cells.column("row"), cells.column("col"), cells.values()))[:20]:
+                print(f"    R{row}C{col}: {value!r}")
+        return
+
+    output = export_workbook(source, args.output, args.backend)
+    print(f"✓ Exported {source.name} -> {output} ({output.stat().st_size / 1024:.0f} KB, "
+          f"{time.perf_counter() - started:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
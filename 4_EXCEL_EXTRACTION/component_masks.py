@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Bit-packed component scores for the Vic FMS skills.
+Each student x skill result is a uint8 bitmask (bit i = component i + 1; the
+trackers score up to eight components a skill), with which results were assessed
+kept as one more packed bit per skill. A cohort is about 13 bytes a student:
+popcount totals, per-component pass rates, level classification and bulk
+conversion to and from the elementScores JSON shape ({"comp1": 1, "comp2": 0})
+all work on the packed arrays.
+
+Usage:
+    python component_masks.py tracker.xlsm
+    python component_masks.py tracker.components.npz
+    python component_masks.py tracker.xlsm --check
+"""
+
+import json
+import sys
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+from build_skills_json import VIC_FMS_SKILLS
+from normative_levels import LEVELS, UNCLASSIFIED, LevelTables
+from prisma_import import skill_key
+from school_aggregates import student_rows
+from xlsx_stream import StreamingWorkbook
+
+MAX_COMPONENTS = 8
+POPCOUNT = np.array([bin(mask).count("1") for mask in range(256)], np.uint8)
+BITS = np.uint8(1) << np.arange(MAX_COMPONENTS, dtype=np.uint8)
+
+
+@lru_cache(maxsize=None)
+def element_scores(components: int) -> tuple:
+    """(dicts, JSON strings) of elementScores for every mask of a skill with this many components"""
+    dicts = [{f"comp{i + 1}": (mask >> i) & 1 for i in range(components)} for mask in range(256)]
+    return dicts, [json.dumps(scores) for scores in dicts]
+
+
+def pack(scores: dict) -> int:
+    """elementScores dict -> mask; "compN" keys by number, other keys (component headers) in order"""
+    mask = 0
+    for position, (key, value) in enumerate(scores.items()):
+        index = int(key[4:]) - 1 if key.startswith("comp") and key[4:].isdigit() else position
+        if index >= MAX_COMPONENTS:
+            raise ValueError(f"Component {key!r} does not fit in a {MAX_COMPONENTS}-bit mask")
+        if value:
+            mask |= 1 << index
+    return mask
+
+
+class ComponentStore:
+    """[student, skill] uint8 component masks plus packed assessed bits for the Vic FMS skills"""
+
+    def __init__(self, students: list, skill_ids=tuple(VIC_FMS_SKILLS), components=None, ages=None,
+                 masks: np.ndarray = None, assessed_bits: np.ndarray = None):
+        self.students = list(students)
+        self.skill_ids = list(skill_ids)
+        self.skill_index = {skill_id: i for i, skill_id in enumerate(self.skill_ids)}
+        if components is None:
+            components = [len(VIC_FMS_SKILLS[s]["components"]) if s in VIC_FMS_SKILLS else MAX_COMPONENTS
+                          for s in self.skill_ids]
+        self.components = np.asarray(components, np.uint8)
+        shape = (len(self.students), len(self.skill_ids))
+        self.ages = np.zeros(shape[0], np.uint8) if ages is None else np.asarray(ages, np.uint8)
+        self.masks = np.zeros(shape, np.uint8) if masks is None else np.asarray(masks, np.uint8)
+        self.assessed_bits = (np.packbits(np.zeros(shape, bool), axis=1) if assessed_bits is None
+                              else np.asarray(assessed_bits, np.uint8))
+
+    @property
+    def nbytes(self) -> int:
+        return self.masks.nbytes + self.assessed_bits.nbytes + self.ages.nbytes
+
+    @property
+    def assessed(self) -> np.ndarray:
+        """[student, skill] bool"""
+        return np.unpackbits(self.assessed_bits, axis=1, count=len(self.skill_ids)).astype(bool)
+
+    def set_scores(self, student: int, skill_id: str, scores: dict):
+        skill = self.skill_index[skill_id]
+        self.masks[student, skill] = pack(scores)
+        self.assessed_bits[student, skill >> 3] |= 0x80 >> (skill & 7)
+        self.components[skill] = max(self.components[skill], len(scores))
+
+    def totals(self) -> np.ndarray:
+        """Components shown per [student, skill] (0 where not assessed)"""
+        return POPCOUNT[self.masks]
+
+    def component_pass_rates(self) -> np.ndarray:
+        """[skill, component] share of assessed students showing each component (NaN if nobody was assessed)"""
+        assessed = self.assessed
+        shown = ((self.masks[:, :, None] & BITS) != 0) & assessed[:, :, None]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            rates = shown.sum(axis=0) / assessed.sum(axis=0)[:, None]
+        rates[np.arange(MAX_COMPONENTS)[None, :] >= self.components[:, None]] = np.nan
+        return rates
+
+    def classify(self, tables: LevelTables) -> np.ndarray:
+        """Level codes [student, skill] (UNCLASSIFIED where not assessed or out of range).
+        The tables are re-indexed by mask once, so each result is a single lookup."""
+        order = [tables.skill_index[skill_id] for skill_id in self.skill_ids]
+        scores = tables.table[order]
+        if scores.shape[2] <= MAX_COMPONENTS:
+            scores = np.pad(scores, ((0, 0), (0, 0), (0, MAX_COMPONENTS + 1 - scores.shape[2])),
+                            constant_values=UNCLASSIFIED)
+        by_mask = scores[:, :, POPCOUNT]                                # [skill, age, mask]
+        age_idx = self.ages.astype(int) - tables.min_age
+        valid = (age_idx >= 0) & (age_idx < by_mask.shape[1])
+        skills = np.arange(len(self.skill_ids))[None, :]
+        codes = by_mask[skills, np.where(valid, age_idx, 0)[:, None], self.masks]
+        return np.where(valid[:, None] & self.assessed, codes, UNCLASSIFIED).astype(np.int8)
+
+    @classmethod
+    def from_element_scores(cls, records, skill_ids=tuple(VIC_FMS_SKILLS)) -> "ComponentStore":
+        """From [(student, skill id, elementScores dict)] - e.g. assessment_records rows; other skills are skipped"""
+        records = list(records)
+        students = list(dict.fromkeys(student for student, _, _ in records))
+        store = cls(students, skill_ids)
+        row = {student: i for i, student in enumerate(students)}
+        for student, skill_id, scores in records:
+            if skill_id in store.skill_index:
+                store.set_scores(row[student], skill_id, scores)
+        return store
+
+    def to_element_scores(self, as_json: bool = False) -> list:
+        """[(student, skill id, elementScores)] for every assessed result; as_json gives the JSON text.
+        The dicts are shared between results - copy one before changing it."""
+        tables = [element_scores(int(n))[as_json] for n in self.components]
+        students, skills = np.nonzero(self.assessed)
+        masks = self.masks[students, skills].tolist()
+        return [(self.students[s], self.skill_ids[k], tables[k][mask])
+                for s, k, mask in zip(students.tolist(), skills.tolist(), masks)]
+
+    @classmethod
+    def from_workbook(cls, path) -> "ComponentStore":
+        """Stream the Vic FMS sheets of one tracker; a component counts as shown at the sheet's pass mark"""
+        keys = {skill_key(skill["name"]): skill_id for skill_id, skill in VIC_FMS_SKILLS.items()}
+        rows, ages, results = {}, {}, []
+        with StreamingWorkbook(str(path)) as workbook:
+            for sheet_name in workbook.sheetnames:
+                skill_id = keys.get(skill_key(sheet_name))
+                if skill_id is None:
+                    continue
+                seen = Counter()    # Same-named students are told apart by their order on the sheet
+                for layout, _, values in student_rows(workbook, sheet_name):
+                    name = values[1].strip()
+                    seen[name] += 1
+                    student = rows.setdefault((name, seen[name]), len(rows))
+                    age = values.get(layout.age_column)
+                    if isinstance(age, (int, float)):
+                        ages[student] = int(age)
+                    scores = [values.get(column) for column in sorted(layout.components)]
+                    if any(isinstance(v, (int, float)) for v in scores):
+                        results.append((student, skill_id, {
+                            f"comp{i + 1}": isinstance(v, (int, float)) and v >= layout.pass_mark
+                            for i, v in enumerate(scores)}))
+        store = cls([name for name, _ in rows], ages=[ages.get(i, 0) for i in range(len(rows))])
+        for student, skill_id, scores in results:
+            store.set_scores(student, skill_id, scores)
+        return store
+
+    def save(self, path) -> Path:
+        path = Path(path)
+        np.savez_compressed(path, students=np.array(self.students), skill_ids=np.array(self.skill_ids),
+                            components=self.components, ages=self.ages, masks=self.masks,
+                            assessed_bits=self.assessed_bits)
+        return path
+
+    @classmethod
+    def load(cls, path) -> "ComponentStore":
+        with np.load(path) as data:
+            return cls(data["students"].tolist(), data["skill_ids"].tolist(), data["components"],
+                       data["ages"], data["masks"], data["assessed_bits"])
+
+
+def sheet_thresholds(workbook: StreamingWorkbook, sheet_name: str, components: int) -> dict:
+    """normativeThresholds from the table under a skill sheet's "Normative scores" label
+    (Age | Beginning max | Progressing max | Achieving max | Excelling min, which may be blank)"""
+    thresholds, in_table = {}, False
+    for cells in workbook.open_sheet(sheet_name).rows():
+        values = {c.column: c.value for c in cells}
+        age, bounds = values.get(1), [values.get(column) for column in range(2, 6)]
+        if isinstance(age, str) and age.strip().lower() == "normative scores":
+            in_table = True
+        elif in_table and isinstance(age, (int, float)) and all(isinstance(v, (int, float)) for v in bounds[:3]):
+            beginning, progressing, achieving = (int(v) for v in bounds[:3])
+            excelling = bounds[3]
+            thresholds[str(int(age))] = {
+                "beginning": [0, beginning], "progressing": [0, progressing], "achieving": [0, achieving],
+                "excelling": [int(excelling), max(int(excelling), components)] if isinstance(excelling, (int, float)) else None}
+    return thresholds
+
+
+def tracker_skills(workbook: StreamingWorkbook, store: "ComponentStore") -> dict:
+    """{skill id: skill} with each skill sheet's own normativeThresholds, falling back to skills.json
+    for skills the workbook has no table for"""
+    keys = {skill_key(skill["name"]): skill_id for skill_id, skill in VIC_FMS_SKILLS.items()}
+    skills = dict(VIC_FMS_SKILLS)
+    for sheet_name in workbook.sheetnames:
+        skill_id = keys.get(skill_key(sheet_name))
+        if skill_id not in store.skill_index:
+            continue
+        thresholds = sheet_thresholds(workbook, sheet_name, int(store.components[store.skill_index[skill_id]]))
+        if thresholds:
+            skills[skill_id] = {"id": skill_id, "normativeThresholds": thresholds}
+    return skills
+
+
+def check_norms(path) -> list:
+    """[(skill id, results, matching the Norm column, matching with skills.json or None)] for one tracker.
+    classify() runs against each sheet's own thresholds; skills.json is only compared for skills whose
+    thresholds agree with the sheet's table (most Vic FMS sheets use their own)."""
+    store = ComponentStore.from_workbook(path)
+    keys = {skill_key(skill["name"]): skill_id for skill_id, skill in VIC_FMS_SKILLS.items()}
+    occurrences = Counter()
+    rows = {}
+    for i, name in enumerate(store.students):
+        occurrences[name] += 1
+        rows[(name, occurrences[name])] = i
+
+    norms = {}
+    with StreamingWorkbook(str(path)) as workbook:
+        skills = tracker_skills(workbook, store)
+        for sheet_name in workbook.sheetnames:
+            skill_id = keys.get(skill_key(sheet_name))
+            if skill_id is None:
+                continue
+            seen = Counter()
+            norms[skill_id] = {}
+            for layout, _, values in student_rows(workbook, sheet_name):
+                name = values[1].strip()
+                seen[name] += 1
+                norm = values.get(layout.norm_column)
+                norm = norm.strip().lower() if isinstance(norm, str) else None
+                norms[skill_id][rows[(name, seen[name])]] = LEVELS.index(norm) if norm in LEVELS else UNCLASSIFIED
+
+    sheet_tables = LevelTables.compile(skills.values())
+    json_tables = LevelTables.compile(VIC_FMS_SKILLS.values())
+    by_sheet, by_json = store.classify(sheet_tables), store.classify(json_tables)
+    assessed = store.assessed
+    results = []
+    for skill_id, cached in norms.items():
+        k = store.skill_index[skill_id]
+        scored = [i for i in cached if assessed[i, k]]
+        expected = np.array([cached[i] for i in scored], np.int8)
+        same = all(
+            np.array_equal(sheet_tables.classify(skill_id, int(age), np.arange(store.components[k] + 1)),
+                           json_tables.classify(skill_id, int(age), np.arange(store.components[k] + 1)))
+            for age in skills[skill_id]["normativeThresholds"])
+        results.append((skill_id, len(scored), int((by_sheet[scored, k] == expected).sum()),
+                        int((by_json[scored, k] == expected).sum()) if same else None))
+    return results
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python component_masks.py <tracker.xlsm | tracker.components.npz>")
+        return
+
+    source = Path(sys.argv[1])
+    if "--check" in sys.argv[2:]:
+        mismatched = 0
+        for skill_id, count, sheet_matches, json_matches in check_norms(source):
+            mismatched += count - sheet_matches
+            compared = "skills.json thresholds differ" if json_matches is None else f"skills.json {json_matches}/{count}"
+            print(f"  - {skill_id}: {sheet_matches}/{count} match the Norm column ({compared})")
+        print(f"{'✗' if mismatched else '✓'} classify() vs cached Norm cells: {mismatched} mismatched")
+        sys.exit(1 if mismatched else 0)
+
+    if source.suffix == ".npz":
+        store = ComponentStore.load(source)
+        skills, label = VIC_FMS_SKILLS, "skills.json levels"
+    else:
+        store = ComponentStore.from_workbook(source)
+        print(f"✓ Saved: {store.save(source.with_suffix('.components.npz'))}")
+        with StreamingWorkbook(str(source)) as workbook:
+            skills = tracker_skills(workbook, store)
+        label = "levels from the tracker's Normative scores tables"
+    print(f"✓ {len(store.students)} students x {len(store.skill_ids)} skills in {store.nbytes} bytes")
+
+    levels = store.classify(LevelTables.compile(skills.values()))
+    print(f"✓ {label}")
+    rates = store.component_pass_rates()
+    for k, skill_id in enumerate(store.skill_ids):
+        counts = ", ".join(f"{level} {int((levels[:, k] == code).sum())}" for code, level in enumerate(LEVELS))
+        shown = " ".join(f"{rate:.0%}" for rate in rates[k, :store.components[k]])
+        print(f"  - {skill_id}: {counts} | components {shown}")
+
+
+if __name__ == "__main__":
+    main()
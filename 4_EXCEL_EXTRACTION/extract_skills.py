@@ -3,177 +3,302 @@
 Comprehensive Excel extraction script.
 Extracts ALL data/formulas from assessment sheets to .md files for manual AI review.
 Does NOT attempt intelligent parsing—just dumps everything clearly.
+
+Usage:
+    python extract_skills.py tracker.xlsm
+    python extract_skills.py tracker.xlsm --workers 8     # one process per sheet
 """
 
-from openpyxl import load_workbook
 from openpyxl.utils import get_column_letter
+from openpyxl.utils.cell import coordinate_to_tuple
+import itertools
 import json
+import multiprocessing
+import os
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
+from background_writer import BackgroundWriter
+from extraction_cache import ExtractionManifest
+from instrumentation import Tracer, trace_from_argv, traced
+from xlsx_stream import MappedStrings, StreamingWorkbook, write_string_table
+
+GRID_MAX_ROW = 49       # Cell Grid (Values) shows rows 1-49
+GRID_MAX_COL = 14       # ... and columns A-N
+FORMAT_MAX_ROW = 19     # Cell Formatting samples rows 1-19
+FORMAT_MAX_COL = 5      # ... and columns A-E
+RAW_MAX_ROW = 99        # Raw Data by Row lists rows 1-99
+
+
+def _extract_sheet_worker(job: tuple) -> str:
+    """Worker process: render one sheet, reading only its worksheet part (plus styles/comments).
+    Shared strings come memory-mapped from the parent's table instead of being re-parsed."""
+    workbook_path, output_dir, sheet_name, sheet_part, epoch, strings_path = job
+    strings = MappedStrings(strings_path)
+    workbook = StreamingWorkbook(workbook_path, shared_strings=strings, sheet_parts={sheet_name: sheet_part}, epoch=epoch)
+    extractor = SimpleSkillExtractor(workbook_path, output_dir, incremental=False, workbook=workbook)
+    try:
+        return str(extractor._extract_sheet_to_md(sheet_name))
+    finally:
+        extractor.close()
+        strings.close()
+
+
 class SimpleSkillExtractor:
-    def __init__(self, tracker_20_path: str):
-        """Load workbook with both values and formulas"""
-        self.wb_data = load_workbook(tracker_20_path, data_only=True)  # Calculated values
-        self.wb_formulas = load_workbook(tracker_20_path, data_only=False)  # Raw formulas
-        self.output_dir = Path("skill_extractions")
-        self.output_dir.mkdir(exist_ok=True)
+    def __init__(self, tracker_20_path: str, output_dir: str = "skill_extractions", incremental: bool = True,
+                 tracer: Tracer = None, workbook: StreamingWorkbook = None):
+        """Open workbook once - each sheet is streamed with cached values and formulas together.
+        Markdown is written by background threads while the next sheet parses.
+        With incremental=True, sheets whose source parts are unchanged since the last run are skipped.
+        Each step runs inside a span of `tracer` (see instrumentation); the default records nothing.
+        Sheet workers pass their own already opened `workbook`."""
+        self.tracer = tracer or Tracer()
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.incremental = incremental
+        self.manifest = ExtractionManifest(self.output_dir)
+        self.writer = BackgroundWriter(tracer=self.tracer)
+        if workbook is not None:
+            self.workbook = workbook
+            return
+        with self.tracer.span("open workbook", "zip open", workbook=Path(tracker_20_path).name):
+            self.workbook = StreamingWorkbook(tracker_20_path)
         print(f"✓ Loaded workbook. Output: {self.output_dir.absolute()}")
     
-    def extract_all_sheets(self):
-        """Extract all non-trivial sheets to .md files"""
+    @traced("skills.extract_all_sheets")
+    def extract_all_sheets(self, workers: int = 1):
+        """Extract all non-trivial sheets to .md files.
+        With workers > 1 each sheet is rendered in its own process; results are recorded in sheet order."""
         skip_sheets = {"class list", "dashboard", "sheet", "whole school"}
         
-        for sheet_name in self.wb_data.sheetnames:
+        pending = []    # (sheet name, source parts) still to extract, in workbook order
+        for sheet_name in self.workbook.sheetnames:
             if not any(skip in sheet_name.lower() for skip in skip_sheets):
                 print(f"\nProcessing: {sheet_name}")
-                self._extract_sheet_to_md(sheet_name)
+                sources = self.workbook.sheet_source_parts(sheet_name)
+                if self.incremental and self.manifest.is_current(sheet_name, self.workbook.archive, sources):
+                    print(f"  - Unchanged since last run, skipped")
+                    continue
+                if workers > 1:
+                    pending.append((sheet_name, sources))
+                    continue
+                with self.tracer.span("sheet markdown", "part parse", sheet=sheet_name):
+                    output_file = self._extract_sheet_to_md(sheet_name)
+                print(f"  ✓ Saved: {output_file.name}")
+                self.manifest.record(sheet_name, self.workbook.archive, sources, [output_file])
+        
+        if pending:
+            outputs = self._extract_in_workers([sheet_name for sheet_name, _ in pending], workers)
+            for (sheet_name, sources), output_file in zip(pending, outputs):
+                print(f"  ✓ Saved: {output_file.name} ({sheet_name})")
+                self.manifest.record(sheet_name, self.workbook.archive, sources, [output_file])
+        
+        with self.tracer.span("flush sheets", "report write"):
+            self.writer.flush()  # Only record outputs that actually reached the disk
+        self.manifest.save()
+    
+    def _extract_in_workers(self, sheet_names: list, workers: int) -> list:
+        """Render sheets in a process pool -> output files in sheet_names order.
+        The shared strings are parsed once here and memory-mapped by every worker."""
+        fd, strings_path = tempfile.mkstemp(suffix=".strings")
+        os.close(fd)
+        try:
+            with self.tracer.span("share strings", "part parse"):
+                write_string_table(self.workbook.shared_strings, strings_path)
+            jobs = [(self.workbook.path, str(self.output_dir), sheet_name, self.workbook.sheet_part(sheet_name),
+                     self.workbook.epoch, strings_path) for sheet_name in sheet_names]
+            # spawn everywhere (as on Windows): the parent's writer threads are never forked
+            context = multiprocessing.get_context("spawn")
+            with self.tracer.span("sheet workers", "part parse", sheets=len(jobs), workers=workers):
+                with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), mp_context=context) as pool:
+                    return [Path(output_file) for output_file in pool.map(_extract_sheet_worker, jobs)]
+        finally:
+            os.remove(strings_path)
+    
+    @traced("skills.export_columnar")
+    def export_columnar(self, backend: str = "auto") -> Path:
+        """Full value/formula/type grid of every sheet as one columnar file (see columnar_export)"""
+        from columnar_export import SUFFIXES, export_workbook, resolve_backend
+        backend = resolve_backend(backend)
+        output_file = self.output_dir / f"{Path(self.workbook.path).stem}{SUFFIXES[backend]}"
+        export_workbook(self.workbook.path, output_file, backend)
+        print(f"  ✓ Columnar export: {output_file.name}")
+        return output_file
+    
+    def close(self):
+        """Finish pending writes and release the workbook archive"""
+        try:
+            self.writer.close()
+        finally:
+            self.workbook.close()
     
     def _extract_sheet_to_md(self, sheet_name: str):
-        """Extract single sheet: all data, formulas, structure"""
-        ws_data = self.wb_data[sheet_name]
-        ws_formulas = self.wb_formulas[sheet_name]
+        """Extract single sheet: all data, formulas, structure (queued for a background writer)"""
+        output_file = self.output_dir / f"{sheet_name}.md"
+        self.writer.write_stream(output_file, self._sheet_markdown(sheet_name), encoding="utf-8")
+        return output_file
+    
+    def _sheet_markdown(self, sheet_name: str):
+        """Yield the sheet's markdown in document order from one pass over the sheet XML.
+        Only formulas met while the value grid is still open are held back; later rows stream straight out."""
+        sheet = self.workbook.open_sheet(sheet_name)
+        grid_cols = min(sheet.max_column, GRID_MAX_COL)
+        grid_rows = min(sheet.max_row, GRID_MAX_ROW)
+        rows = sheet.rows()
         
-        md_lines = []
-        md_lines.append(f"# {sheet_name}\n")
-        md_lines.append(f"**Extracted:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+        yield f"# {sheet_name}\n"
+        yield f"**Extracted:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
         
         # 1. DIMENSIONS
-        md_lines.append(f"\n## Sheet Dimensions\n")
-        md_lines.append(f"- Max Row: {ws_data.max_row}\n")
-        md_lines.append(f"- Max Column: {ws_data.max_column}\n")
-        md_lines.append(f"- Dimensions: {ws_data.dimensions}\n")
+        yield f"\n## Sheet Dimensions\n"
+        yield f"- Max Row: {sheet.max_row}\n"
+        yield f"- Max Column: {sheet.max_column}\n"
+        yield f"- Dimensions: {sheet.dimension}\n"
+        
+        # 2. ALL CELLS WITH VALUES (GRID VIEW) - bounded to the first GRID_MAX_ROW rows
+        yield f"\n## Cell Grid (Values)\n"
+        yield self._grid_header(grid_cols)
+        
+        held_formulas = []
+        format_lines = []   # bounded by FORMAT_MAX_ROW
+        raw_lines = []      # bounded by RAW_MAX_ROW
+        next_grid_row = 1
+        first_after_grid = None
+        for cells in rows:
+            row_idx = cells[0].row
+            if row_idx > grid_rows:
+                first_after_grid = cells
+                break
+            for empty_row in range(next_grid_row, row_idx):
+                yield self._grid_row(empty_row, {}, grid_cols)
+            yield self._grid_row(row_idx, {c.column: c.value for c in cells}, grid_cols)
+            next_grid_row = row_idx + 1
+            held_formulas.extend(self._formula_lines(cells))
+            self._sample_row(cells, format_lines, raw_lines)
         
-        # 2. ALL CELLS WITH VALUES (GRID VIEW)
-        md_lines.append(f"\n## Cell Grid (Values)\n")
-        md_lines.append(self._generate_grid_view(ws_data))
+        for empty_row in range(next_grid_row, grid_rows + 1):
+            yield self._grid_row(empty_row, {}, grid_cols)
         
         # 3. ALL CELLS WITH FORMULAS
-        md_lines.append(f"\n## Cell Grid (Formulas)\n")
-        md_lines.append(self._generate_formula_view(ws_formulas))
+        yield f"\n## Cell Grid (Formulas)\n"
+        yield "| Cell | Formula |\n"
+        yield "|------|----------|\n"
+        yield from held_formulas
+        found_formulas = bool(held_formulas)
+        del held_formulas
         
-        # 4. MERGED CELLS
-        merged_cells = list(ws_data.merged_cells.ranges)
-        if merged_cells:
-            md_lines.append(f"\n## Merged Cells\n")
-            for merged_range in merged_cells:
-                md_lines.append(f"- `{merged_range}`\n")
+        remaining = itertools.chain([first_after_grid], rows) if first_after_grid else ()
+        for cells in remaining:
+            for line in self._formula_lines(cells):
+                found_formulas = True
+                yield line
+            self._sample_row(cells, format_lines, raw_lines)
+        if not found_formulas:
+            yield "| *(No formulas found)* | |\n"
+        
+        # 4. MERGED CELLS (known once the rows have streamed past)
+        if sheet.merged_ranges:
+            yield f"\n## Merged Cells\n"
+            for merged_range in sheet.merged_ranges:
+                yield f"- `{merged_range}`\n"
         
         # 5. CONDITIONAL FORMATTING RULES (if any)
-        md_lines.append(f"\n## Conditional Formatting Rules\n")
-        if ws_data.conditional_formatting:
-            for rule_range, rules in ws_data.conditional_formatting._cf_rules.items():
-                md_lines.append(f"- Range: `{rule_range}`\n")
-                for rule in rules:
-                    md_lines.append(f"  - Type: {rule.type}\n")
-                    md_lines.append(f"  - Formula/Condition: {rule.formula if hasattr(rule, 'formula') else 'N/A'}\n")
+        yield f"\n## Conditional Formatting Rules\n"
+        if sheet.conditional_formats:
+            for rule_range, rules in sheet.conditional_formats:
+                yield f"- Range: `{rule_range}`\n"
+                for rule_type, formulas in rules:
+                    yield f"  - Type: {rule_type}\n"
+                    yield f"  - Formula/Condition: {formulas}\n"
         else:
-            md_lines.append("*(No conditional formatting detected)*\n")
+            yield "*(No conditional formatting detected)*\n"
         
         # 6. CELL STYLES & COLORS
-        md_lines.append(f"\n## Cell Formatting (Sample)\n")
-        md_lines.append(self._extract_formatting_info(ws_data))
+        yield f"\n## Cell Formatting (Sample)\n"
+        yield "| Cell | Value | Font Color | Fill Color | Alignment |\n"
+        yield "|------|-------|------------|------------|----------|\n"
+        yield from format_lines
         
         # 7. NOTES/COMMENTS
-        md_lines.append(f"\n## Cell Comments\n")
-        comments_found = False
-        for row in ws_data.iter_rows():
-            for cell in row:
-                if cell.comment:
-                    md_lines.append(f"- `{cell.coordinate}`: {cell.comment.text}\n")
-                    comments_found = True
-        if not comments_found:
-            md_lines.append("*(No comments found)*\n")
+        yield f"\n## Cell Comments\n"
+        comments = self.workbook.comments(sheet_name)
+        if comments:
+            for coordinate in sorted(comments, key=coordinate_to_tuple):
+                yield f"- `{coordinate}`: {comments[coordinate]}\n"
+        else:
+            yield "*(No comments found)*\n"
         
         # 8. RAW DATA BY ROW (for easy scanning)
-        md_lines.append(f"\n## Raw Data by Row\n")
-        md_lines.append("```\n")
-        for row_idx in range(1, min(ws_data.max_row + 1, 100)):  # Limit to first 100 rows
-            row_data = []
-            for col_idx in range(1, ws_data.max_column + 1):
-                cell = ws_data.cell(row_idx, col_idx)
-                val = cell.value
-                if val is not None:
-                    row_data.append(f"[{get_column_letter(col_idx)}{row_idx}={val}]")
+        yield f"\n## Raw Data by Row\n"
+        yield "```\n"
+        yield from raw_lines
+        yield "```\n"
+    
+    def _formula_lines(self, cells):
+        return [f"| `{cell.coordinate}` | `{cell.formula}` |\n" for cell in cells if cell.formula]
+    
+    def _sample_row(self, cells, format_lines: list, raw_lines: list):
+        """Add one row to the bounded formatting sample and raw-data sections"""
+        row_idx = cells[0].row
+        if row_idx <= FORMAT_MAX_ROW:
+            format_lines.extend(self._format_rows(cells))
+        if row_idx <= RAW_MAX_ROW:
+            row_data = [f"[{c.coordinate}={c.value}]" for c in cells if c.value is not None]
             if row_data:
-                md_lines.append(f"Row {row_idx}: {' '.join(row_data)}\n")
-        md_lines.append("```\n")
-        
-        # Write file
-        output_file = self.output_dir / f"{sheet_name}.md"
-        output_file.write_text("".join(md_lines))
-        print(f"  ✓ Saved: {output_file.name}")
+                raw_lines.append(f"Row {row_idx}: {' '.join(row_data)}\n")
     
-    def _generate_grid_view(self, ws) -> str:
-        """Generate table view of all cells (values)"""
-        lines = []
-        lines.append("| Row | " + " | ".join([f"Col {get_column_letter(c)}" for c in range(1, min(ws.max_column + 1, 15))]) + " |\n")
-        lines.append("|-----|" + "|".join(["---"] * min(ws.max_column, 14)) + "|\n")
-        
-        for row_idx in range(1, min(ws.max_row + 1, 50)):  # Limit to first 50 rows for readability
-            row_data = [str(row_idx)]
-            for col_idx in range(1, min(ws.max_column + 1, 15)):
-                cell = ws.cell(row_idx, col_idx)
-                val = cell.value
-                if val is None:
-                    row_data.append("")
-                else:
-                    # Truncate long values
-                    val_str = str(val)
-                    if len(val_str) > 20:
-                        val_str = val_str[:17] + "..."
-                    row_data.append(val_str)
-            lines.append("| " + " | ".join(row_data) + " |\n")
-        
-        return "".join(lines)
+    def _grid_header(self, grid_cols: int) -> str:
+        """Header rows for the value grid table"""
+        header = "| Row | " + " | ".join([f"Col {get_column_letter(c)}" for c in range(1, grid_cols + 1)]) + " |\n"
+        return header + "|-----|" + "|".join(["---"] * grid_cols) + "|\n"
     
-    def _generate_formula_view(self, ws) -> str:
-        """Generate table view of formulas"""
-        lines = []
-        formulas_found = False
-        
-        lines.append("| Cell | Formula |\n")
-        lines.append("|------|----------|\n")
-        
-        for row in ws.iter_rows():
-            for cell in row:
-                if cell.value and isinstance(cell.value, str) and cell.value.startswith("="):
-                    lines.append(f"| `{cell.coordinate}` | `{cell.value}` |\n")
-                    formulas_found = True
-        
-        if not formulas_found:
-            lines.append("| *(No formulas found)* | |\n")
-        
-        return "".join(lines)
+    def _grid_row(self, row_idx: int, values: dict, grid_cols: int) -> str:
+        """One table row of the value grid (values keyed by column index)"""
+        row_data = [str(row_idx)]
+        for col_idx in range(1, grid_cols + 1):
+            val = values.get(col_idx)
+            if val is None:
+                row_data.append("")
+            else:
+                # Truncate long values
+                val_str = str(val)
+                if len(val_str) > 20:
+                    val_str = val_str[:17] + "..."
+                row_data.append(val_str)
+        return "| " + " | ".join(row_data) + " |\n"
     
-    def _extract_formatting_info(self, ws) -> str:
-        """Extract cell colors, fonts, alignment (sampling first 20 rows)"""
+    def _format_rows(self, cells) -> list:
+        """Cell colors, fonts, alignment for the sampled columns of one row"""
         lines = []
-        lines.append("| Cell | Value | Font Color | Fill Color | Alignment |\n")
-        lines.append("|------|-------|------------|------------|----------|\n")
-        
-        for row_idx in range(1, min(ws.max_row + 1, 20)):
-            for col_idx in range(1, min(ws.max_column + 1, 6)):
-                cell = ws.cell(row_idx, col_idx)
-                if cell.value:
-                    font_color = cell.font.color.rgb if cell.font and cell.font.color else "Default"
-                    fill_color = cell.fill.start_color.rgb if cell.fill and cell.fill.start_color else "Default"
-                    alignment = f"{cell.alignment.horizontal}/{cell.alignment.vertical}" if cell.alignment else "Default"
-                    
-                    lines.append(f"| `{cell.coordinate}` | {cell.value} | {font_color} | {fill_color} | {alignment} |\n")
-        
-        return "".join(lines)
+        for cell in cells:
+            if cell.column > FORMAT_MAX_COL or not cell.value:
+                continue
+            font_color, fill_color, alignment = self.workbook.resolve_style(cell.style_id)
+            lines.append(f"| `{cell.coordinate}` | {cell.value} | {font_color} | {fill_color} | {alignment} |\n")
+        return lines
 
 if __name__ == "__main__":
-    tracker_path = r"C:\Users\robke\OneDrive\Desktop\Rob's FMS Scorecard\Rob's PE Movement Assessment Tracker 2.0.xlsm"
+    args, tracer = trace_from_argv(a for a in sys.argv[1:] if a != "--columnar")
+    workers = 1
+    if "--workers" in args:
+        index = args.index("--workers")
+        workers = int(args[index + 1]) if index + 1 < len(args) else os.cpu_count()
+        del args[index:index + 2]
+    tracker_path = args[0] if args else r"C:\Users\robke\OneDrive\Desktop\Rob's FMS Scorecard\Rob's PE Movement Assessment Tracker 2.0.xlsm"
     
     print("=" * 60)
     print("PE Assessment Skills Extractor")
     print("=" * 60)
     
     try:
-        extractor = SimpleSkillExtractor(tracker_path)
-        extractor.extract_all_sheets()
+        extractor = SimpleSkillExtractor(tracker_path, tracer=tracer)
+        extractor.extract_all_sheets(workers=workers)
+        if "--columnar" in sys.argv:
+            extractor.export_columnar()
+        extractor.close()
         print("\n" + "=" * 60)
         print("✓ Extraction complete!")
         print(f"✓ Check {extractor.output_dir.absolute()} for .md files")
@@ -182,3 +307,5 @@ if __name__ == "__main__":
         print(f"\n✗ Error: {e}")
         import traceback
         traceback.print_exc()
+    finally:
+        tracer.close()
@@ -4,143 +4,210 @@ Extract all VBA macro code from Excel workbooks.
 Outputs: individual .vba files per module, plus summary.md
 """
 
-from openpyxl import load_workbook
 from pathlib import Path
 import re
+import struct
+import sys
 from datetime import datetime
 
+from openpyxl.xml.constants import ARC_WORKBOOK
+
+from background_writer import BackgroundWriter
+from extraction_cache import ExtractionManifest, MANIFEST_NAME
+from formula_analysis import FormulaAnalysis
+from instrumentation import Tracer, trace_from_argv, traced
+from part_scanner import KeywordScanner, VBA_KEYWORDS
+from range_index import VALIDATION
+from workbook_session import VBA_PROJECT_PART, WorkbookSession
+
 class VBAExtractor:
-    def __init__(self, tracker_20_path: str, whole_school_path: str = None):
+    def __init__(self, tracker_20_path: str, whole_school_path: str = None, output_dir: str = "vba_extractions",
+                 incremental: bool = True, tracer: Tracer = None):
         """Load workbooks - note: openpyxl has limited VBA support
-        We'll use python-pptx's approach via zipfile for full extraction"""
+        We'll use python-pptx's approach via zipfile for full extraction.
+        With incremental=True, stages whose source parts are unchanged since the last run are skipped.
+        Each stage runs inside a span of `tracer` (see instrumentation); the default records nothing."""
         self.tracker_20_path = tracker_20_path
         self.whole_school_path = whole_school_path
-        self.output_dir = Path("vba_extractions")
-        self.output_dir.mkdir(exist_ok=True)
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self._sessions = {}  # xlsm path -> WorkbookSession shared by every stage
+        self.incremental = incremental
+        self.manifest = ExtractionManifest(self.output_dir)
+        self.tracer = tracer or Tracer()
+        self.writer = BackgroundWriter(tracer=self.tracer)  # Report files are written off the parsing thread
         print(f"✓ VBA Extractor initialized. Output: {self.output_dir.absolute()}")
     
+    def _session(self, xlsm_path: str) -> WorkbookSession:
+        """Return the shared session for a workbook, opening it on first use"""
+        key = str(xlsm_path)
+        if key not in self._sessions:
+            with self.tracer.span("open workbook", "zip open", workbook=Path(key).name):
+                self._sessions[key] = WorkbookSession(xlsm_path)
+        return self._sessions[key]
+    
+    def _is_current(self, key: str, session: WorkbookSession, parts) -> bool:
+        """True if this stage's outputs were built from the same part versions"""
+        if self.incremental and self.manifest.is_current(key, session.archive, parts):
+            print(f"  - Unchanged since last run, skipped")
+            return True
+        return False
+    
+    def _save_manifest(self):
+        """Wait for queued report files, then persist the manifest.
+        If a write failed (any error, e.g. OSError or UnicodeEncodeError), the stage's unsaved
+        entries are dropped so it reruns next time."""
+        try:
+            with self.tracer.span("flush reports", "report write"):
+                self.writer.flush()
+        except Exception:
+            self.manifest = ExtractionManifest(self.output_dir)
+            raise
+        self.manifest.save()
+    
+    def close(self):
+        """Finish pending writes and close every open workbook session"""
+        try:
+            self.writer.close()
+        finally:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+    
+    @traced("vba.extract_vba_from_xlsm")
     def extract_vba_from_xlsm(self, xlsm_path: str, workbook_name: str = "Tracker 2.0"):
         """Extract VBA code from .xlsm file using zipfile"""
-        import zipfile
-        import xml.etree.ElementTree as ET
-        
         print(f"\nExtracting VBA from: {workbook_name}")
         
         try:
-            with zipfile.ZipFile(xlsm_path, 'r') as zip_ref:
-                # List all files in the archive
-                all_files = zip_ref.namelist()
-                vba_files = [f for f in all_files if 'vbaProject' in f or 'VBA' in f]
-                
-                if not vba_files:
-                    print(f"  ✗ No VBA files found in archive")
-                    return []
+            session = self._session(xlsm_path)
+            
+            # List all files in the archive
+            all_files = session.namelist
+            vba_files = [f for f in all_files if 'vbaProject' in f or 'VBA' in f]
+            
+            if not vba_files:
+                print(f"  ✗ No VBA files found in archive")
+                return []
+            
+            print(f"  Found {len(vba_files)} VBA-related files")
+            
+            # Try to find and extract vbaProject.bin
+            vba_key = f"{workbook_name}/vba"
+            if VBA_PROJECT_PART in all_files and not self._is_current(vba_key, session, [VBA_PROJECT_PART]):
+                print(f"  ✓ Found vbaProject.bin")
                 
-                print(f"  Found {len(vba_files)} VBA-related files")
+                # Decompress module source (CFB streams + MS-OVBA)
+                try:
+                    with self.tracer.span("decompress vba modules", "part parse"):
+                        modules = session.vba_modules
+                except (ValueError, KeyError, struct.error) as e:
+                    print(f"  - Could not decompress modules ({e}), falling back to string scan")
+                    modules = []
                 
-                # Extract VBA code files (usually in xl/vbaProject.bin or similar)
-                vba_modules = {}
+                for module in modules:
+                    module_output = self.output_dir / f"{workbook_name}_{module.name}.vba"
+                    self.writer.write_text(module_output, module.source)
+                    print(f"  ✓ Module: {module.name} ({module.module_type}, {len(module.source)} chars)")
                 
-                # Try to find and extract vbaProject.bin
-                vba_bin_path = 'xl/vbaProject.bin'
-                if vba_bin_path in all_files:
-                    print(f"  ✓ Found vbaProject.bin")
-                    vba_data = zip_ref.read(vba_bin_path)
-                    
-                    # Extract readable text from binary (crude but effective)
-                    vba_text = self._extract_text_from_binary(vba_data)
-                    
-                    # Save raw binary extraction
-                    bin_output = self.output_dir / f"{workbook_name}_vbaProject.bin.txt"
-                    bin_output.write_text(vba_text)
-                    print(f"  ✓ Saved raw binary: {bin_output.name}")
+                if modules:
+                    vba_text = self._format_module_listing(modules)
+                else:
+                    vba_text = self._extract_text_from_binary(session.vba_project)
                 
-                # Try to extract _rels/.rels and other XML files
-                for file_path in all_files:
-                    if file_path.endswith('.xml'):
-                        try:
-                            content = zip_ref.read(file_path).decode('utf-8', errors='ignore')
-                            if any(vba_keyword in content for vba_keyword in ['VBA', 'Macro', 'Module', 'Function', 'Sub']):
-                                xml_output = self.output_dir / f"{workbook_name}_{Path(file_path).name}.xml"
-                                xml_output.write_text(content)
-                                print(f"  ✓ Extracted: {xml_output.name}")
-                        except:
-                            pass
+                # Save combined source listing
+                bin_output = self.output_dir / f"{workbook_name}_vbaProject.bin.txt"
+                self.writer.write_text(bin_output, vba_text)
+                print(f"  ✓ Saved module listing: {bin_output.name}")
                 
-                return vba_files
+                module_outputs = [self.output_dir / f"{workbook_name}_{m.name}.vba" for m in modules]
+                self.manifest.record(vba_key, session.archive, [VBA_PROJECT_PART], module_outputs + [bin_output])
+            
+            # Report where VBA keywords occur in the XML parts (one pass per part, parts scanned concurrently)
+            xml_parts = [f for f in all_files if f.endswith('.xml')]
+            xml_key = f"{workbook_name}/xml_keywords"
+            if not (self.incremental and self.manifest.is_current(xml_key, session.archive, xml_parts)):
+                with self.tracer.span("keyword scan", "part parse", parts=len(xml_parts)):
+                    found = KeywordScanner(VBA_KEYWORDS).scan_archive(session.archive, xml_parts)
+                hits = [part_hits[0] for part_hits in found.values() if part_hits]
+                xml_output = self.output_dir / f"{workbook_name}_XmlKeywordHits.txt"
+                self.writer.write_text(xml_output, self._format_keyword_hits(hits, len(xml_parts)))
+                print(f"  ✓ Keyword hits in {len(hits)} of {len(xml_parts)} XML parts: {xml_output.name}")
+                self.manifest.record(xml_key, session.archive, xml_parts, [xml_output])
+            
+            self._save_manifest()
+            return vba_files
         
         except Exception as e:
+            self.tracer.record_error(e)
             print(f"  ✗ Error: {e}")
             return []
     
+    def _format_module_listing(self, modules: list) -> str:
+        """Concatenate decompressed modules into one readable listing"""
+        lines = []
+        for module in modules:
+            lines.append("=" * 80)
+            lines.append(f"MODULE: {module.name} ({module.module_type}, stream VBA/{module.stream_name})")
+            lines.append("=" * 80)
+            lines.append(module.source.replace("\r\n", "\n"))
+            lines.append("")
+        return '\n'.join(lines)
+    
+    def _format_keyword_hits(self, hits: list, parts_scanned: int) -> str:
+        """First keyword hit per XML part, with its byte offset into the decompressed part"""
+        lines = [f"VBA keyword hits ({', '.join(VBA_KEYWORDS)}) - {len(hits)} of {parts_scanned} XML parts", ""]
+        for hit in hits:
+            lines.append(f"{hit.part} @ {hit.offset}: {hit.keyword}")
+        return '\n'.join(lines) + '\n'
+    
     def _extract_text_from_binary(self, data: bytes, min_length: int = 4) -> str:
-        """Extract readable ASCII/UTF-8 strings from binary data"""
-        result = []
-        current = []
-        
-        for byte in data:
-            if 32 <= byte <= 126:  # Printable ASCII
-                current.append(chr(byte))
-            else:
-                if current and len(''.join(current)) >= min_length:
-                    result.append(''.join(current))
-                current = []
-        
-        if current and len(''.join(current)) >= min_length:
-            result.append(''.join(current))
-        
-        return '\n'.join(result)
+        """Extract readable ASCII strings from binary data (fallback when decompression fails)"""
+        pattern = re.compile(rb'[\x20-\x7e]{%d,}' % min_length)
+        return '\n'.join(match.decode('ascii') for match in pattern.findall(data))
     
+    @traced("vba.extract_sheet_validations")
     def extract_sheet_validations(self, xlsm_path: str, workbook_name: str = "Tracker 2.0"):
-        """Extract data validation rules from sheets (which define dropdowns, etc)"""
+        """Extract data validation rules from sheets (which define dropdowns, etc); None if unchanged since last run"""
         print(f"\nExtracting Data Validations from: {workbook_name}")
         
         try:
-            wb = load_workbook(xlsm_path)
+            session = self._session(xlsm_path)
+            validations_key = f"{workbook_name}/validations"
+            if self._is_current(validations_key, session, session.worksheet_parts):
+                return None
             
             all_validations = {}
+            indexes = {}
             
-            for sheet_name in wb.sheetnames:
-                ws = wb[sheet_name]
-                
-                if ws.data_validations:
-                    sheet_validations = []
-                    
-                    for dv in ws.data_validations.dataValidation:
-                        validation_info = {
-                            "type": getattr(dv, 'type', None),
-                            "formula1": getattr(dv, 'formula1', None),
-                            "formula2": getattr(dv, 'formula2', None),
-                            "showDropDown": getattr(dv, 'showDropDown', None),
-                            "sqref": list(dv.sqref) if hasattr(dv, 'sqref') else [],
-                            "showInputMessage": getattr(dv, 'showInputMessage', None),
-                            "showErrorMessage": getattr(dv, 'showErrorMessage', None),
-                            "errorTitle": getattr(dv, 'errorTitle', None),
-                            "error": getattr(dv, 'error', None),
-                            "promptTitle": getattr(dv, 'promptTitle', None),
-                            "prompt": getattr(dv, 'prompt', None),
-                        }
-                        sheet_validations.append(validation_info)
-                    
-                    if sheet_validations:
-                        all_validations[sheet_name] = sheet_validations
-                        print(f"  ✓ {sheet_name}: {len(sheet_validations)} validation rules")
+            for sheet_name in session.sheetnames:
+                index = session.range_index(sheet_name)
+                sheet_validations = [entry.detail for entry in index.entries if entry.kind == VALIDATION]
+                if sheet_validations:
+                    all_validations[sheet_name] = sheet_validations
+                    indexes[sheet_name] = index
+                    print(f"  ✓ {sheet_name}: {len(sheet_validations)} validation rules")
             
+            outputs = []
             if all_validations:
                 output_file = self.output_dir / f"{workbook_name}_DataValidations.txt"
-                self._write_validations_report(all_validations, output_file)
+                self._write_validations_report(all_validations, output_file, indexes)
+                outputs.append(output_file)
                 print(f"  ✓ Saved: {output_file.name}")
             else:
                 print(f"  - No data validations found")
             
+            self.manifest.record(validations_key, session.archive, session.worksheet_parts, outputs)
+            self._save_manifest()
             return all_validations
         
         except Exception as e:
-            print(f"  - Skipped (openpyxl limitation): {type(e).__name__}")
+            self.tracer.record_error(e)
+            print(f"  - Skipped: {type(e).__name__}: {e}")
             return {}
     
-    def _write_validations_report(self, validations: dict, output_file: Path):
-        """Write data validations to readable format"""
+    def _write_validations_report(self, validations: dict, output_file: Path, indexes: dict = None):
+        """Write data validations to readable format; with per-sheet RangeIndexes, flag rules whose cells overlap"""
         lines = []
         lines.append("=" * 80)
         lines.append("DATA VALIDATION RULES")
@@ -151,58 +218,50 @@ class VBAExtractor:
             lines.append(f"\n{'SHEET: ' + sheet_name}")
             lines.append("-" * 80)
             
+            index = (indexes or {}).get(sheet_name)
+            numbers = {id(rule): idx for idx, rule in enumerate(rules, 1)}
             for idx, rule in enumerate(rules, 1):
                 lines.append(f"\nRule #{idx}")
-                lines.append(f"  Type: {rule['type']}")
-                lines.append(f"  Allow: {rule['allow']}")
-                lines.append(f"  Cells: {', '.join(rule['sqref'])}")
+                lines.append(f"  Type: {rule.type}" + (f" ({rule.operator})" if rule.operator else ""))
+                lines.append(f"  Allow Blank: {rule.allow_blank}")
+                lines.append(f"  Cells: {', '.join(rule.sqref)}")
+                if index is not None:
+                    overlaps = sorted({numbers[id(entry.detail)] for ref in rule.sqref for entry in index.overlapping(ref)
+                                       if entry.kind == VALIDATION and entry.detail is not rule})
+                    if overlaps:
+                        lines.append(f"  Overlaps: {', '.join(f'Rule #{n}' for n in overlaps)}")
                 
-                if rule['formula1']:
-                    lines.append(f"  Formula 1: {rule['formula1']}")
-                if rule['formula2']:
-                    lines.append(f"  Formula 2: {rule['formula2']}")
+                if rule.formula1:
+                    lines.append(f"  Formula 1: {rule.formula1}")
+                if rule.formula2:
+                    lines.append(f"  Formula 2: {rule.formula2}")
                 
-                lines.append(f"  Show Dropdown: {rule['showDropDown']}")
+                lines.append(f"  In-cell Dropdown Shown: {not rule.show_dropdown}")  # showDropDown=1 hides the arrow
                 
-                if rule['showInputMessage']:
-                    lines.append(f"  Input Title: {rule['promptTitle']}")
-                    lines.append(f"  Input Message: {rule['prompt']}")
+                if rule.show_input_message:
+                    lines.append(f"  Input Title: {rule.prompt_title}")
+                    lines.append(f"  Input Message: {rule.prompt}")
                 
-                if rule['showErrorMessage']:
-                    lines.append(f"  Error Title: {rule['errorTitle']}")
-                    lines.append(f"  Error Message: {rule['error']}")
+                if rule.show_error_message:
+                    lines.append(f"  Error Title: {rule.error_title}")
+                    lines.append(f"  Error Message: {rule.error}")
         
-        output_file.write_text('\n'.join(lines))
+        self.writer.write_text(output_file, '\n'.join(lines))
     
+    @traced("vba.extract_named_ranges")
     def extract_named_ranges(self, xlsm_path: str, workbook_name: str = "Tracker 2.0"):
-        """Extract named ranges (used in formulas for readability)"""
+        """Extract named ranges (used in formulas for readability); None if unchanged since last run"""
         print(f"\nExtracting Named Ranges from: {workbook_name}")
         
         try:
-            wb = load_workbook(xlsm_path)
+            session = self._session(xlsm_path)
+            names_key = f"{workbook_name}/named_ranges"
+            if self._is_current(names_key, session, [ARC_WORKBOOK]):
+                return None
             
-            # Check if workbook has named_ranges or defined_names
-            named_ranges = {}
-            
-            if hasattr(wb, 'named_ranges') and wb.named_ranges:
-                for name, named_range in wb.named_ranges.items():
-                    try:
-                        named_ranges[name] = {
-                            "name": name,
-                            "targets": [(sheet, coord) for sheet, coord in named_range.destinations]
-                        }
-                    except:
-                        pass
-            elif hasattr(wb, 'defined_names') and wb.defined_names:
-                for defined_name in wb.defined_names.definedName:
-                    try:
-                        named_ranges[defined_name.name] = {
-                            "name": defined_name.name,
-                            "value": defined_name.value
-                        }
-                    except:
-                        pass
-            else:
+            named_ranges = {defined.name if defined.scope is None else f"{defined.scope}!{defined.name}": defined
+                            for defined in session.defined_names}
+            if not named_ranges:
                 print(f"  - No named ranges found")
                 return {}
             
@@ -214,58 +273,66 @@ class VBAExtractor:
                 lines.append("=" * 80)
                 lines.append(f"Extracted: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
                 
-                for name, info in sorted(named_ranges.items()):
-                    lines.append(f"\n{name}")
-                    if 'targets' in info:
-                        for sheet, coord in info['targets']:
-                            lines.append(f"  → {sheet}!{coord}")
-                    elif 'value' in info:
-                        lines.append(f"  → {info['value']}")
+                for name, defined in sorted(named_ranges.items()):
+                    lines.append(f"\n{name}" + (" (hidden)" if defined.hidden else ""))
+                    lines.append(f"  → {defined.value}")
+                    if defined.comment:
+                        lines.append(f"  Comment: {defined.comment}")
                 
-                output_file.write_text('\n'.join(lines))
+                self.writer.write_text(output_file, '\n'.join(lines))
                 print(f"  ✓ Found {len(named_ranges)} named ranges")
                 print(f"  ✓ Saved: {output_file.name}")
                 
+                self.manifest.record(names_key, session.archive, [ARC_WORKBOOK], [output_file])
+                self._save_manifest()
                 return named_ranges
             
             return {}
         
         except Exception as e:
+            self.tracer.record_error(e)
             print(f"  - Skipped: {type(e).__name__}")
             return {}
     
+    @traced("vba.extract_formulas_detailed")
     def extract_formulas_detailed(self, xlsm_path: str, workbook_name: str = "Tracker 2.0"):
-        """Extract all formulas from workbook, organized by sheet and complexity"""
+        """Extract all formulas from workbook, organized by sheet and complexity; None if unchanged since last run"""
         print(f"\nExtracting Formulas from: {workbook_name}")
         
         try:
-            wb = load_workbook(xlsm_path, data_only=False)
+            session = self._session(xlsm_path)
+            formulas_key = f"{workbook_name}/formulas"
+            if self._is_current(formulas_key, session, session.worksheet_parts):
+                return None
             
             all_formulas = {}
             
-            for sheet_name in wb.sheetnames:
-                ws = wb[sheet_name]
+            for sheet_name in session.sheetnames:
                 sheet_formulas = []
                 
-                for row in ws.iter_rows():
-                    for cell in row:
-                        if cell.value and isinstance(cell.value, str) and cell.value.startswith('='):
-                            sheet_formulas.append({
-                                "cell": cell.coordinate,
-                                "formula": cell.value,
-                                "length": len(cell.value),
-                                "complexity": self._estimate_complexity(cell.value)
-                            })
+                with self.tracer.span("scan formulas", "formula scan", sheet=sheet_name):
+                    formula_cells = session.formula_cells(sheet_name)
+                for cell in formula_cells:
+                    sheet_formulas.append({
+                        "cell": cell.coordinate,
+                        "formula": cell.formula,
+                        "length": len(cell.formula),
+                        "complexity": self._estimate_complexity(cell.formula)
+                    })
                 
                 if sheet_formulas:
                     all_formulas[sheet_name] = sheet_formulas
             
             if all_formulas:
                 output_file = self.output_dir / f"{workbook_name}_Formulas_Detailed.txt"
-                self._write_formulas_report(all_formulas, output_file)
+                with self.tracer.span("analyse formulas", "formula scan"):
+                    analysis = session.formula_analysis
+                self._write_formulas_report(all_formulas, analysis, output_file)
                 print(f"  ✓ Found {sum(len(f) for f in all_formulas.values())} formulas")
                 print(f"  ✓ Saved: {output_file.name}")
                 
+                self.manifest.record(formulas_key, session.archive, session.worksheet_parts, [output_file])
+                self._save_manifest()
                 return all_formulas
             else:
                 print(f"  - No formulas found")
@@ -273,6 +340,7 @@ class VBAExtractor:
             return {}
         
         except Exception as e:
+            self.tracer.record_error(e)
             print(f"  ✗ Error: {e}")
             return {}
     
@@ -285,8 +353,8 @@ class VBAExtractor:
         else:
             return "Complex"
     
-    def _write_formulas_report(self, formulas: dict, output_file: Path):
-        """Write formulas to organized report"""
+    def _write_formulas_report(self, formulas: dict, analysis: FormulaAnalysis, output_file: Path):
+        """Write formulas to organized report - one entry per R1C1 template with the ranges it covers"""
         lines = []
         lines.append("=" * 100)
         lines.append("FORMULA ANALYSIS")
@@ -294,44 +362,45 @@ class VBAExtractor:
         lines.append(f"Extracted: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
         
         total_formulas = sum(len(f) for f in formulas.values())
-        lines.append(f"Total Formulas: {total_formulas}\n")
+        lines.append(f"Total Formulas: {total_formulas}")
+        lines.append(f"Distinct Templates: {len(analysis.templates)}\n")
         
         for sheet_name in sorted(formulas.keys()):
             sheet_formulas = formulas[sheet_name]
+            templates = analysis.sheet_templates(sheet_name)
             
             # Sort by complexity
             simple = [f for f in sheet_formulas if f['complexity'] == 'Simple']
             moderate = [f for f in sheet_formulas if f['complexity'] == 'Moderate']
             complex_f = [f for f in sheet_formulas if f['complexity'] == 'Complex']
+            by_complexity = {"Complex": [], "Moderate": [], "Simple": []}
+            for template in templates:
+                by_complexity[self._estimate_complexity(template.example_formula)].append(template)
             
             lines.append(f"\n{'SHEET: ' + sheet_name}")
             lines.append("=" * 100)
-            lines.append(f"Total: {len(sheet_formulas)} | Simple: {len(simple)} | Moderate: {len(moderate)} | Complex: {len(complex_f)}\n")
-            
-            # Complex formulas (most interesting)
-            if complex_f:
-                lines.append(f"\n--- COMPLEX FORMULAS ({len(complex_f)}) ---")
-                for f in sorted(complex_f, key=lambda x: -x['length'])[:20]:  # Top 20 longest
-                    lines.append(f"\n{f['cell']}: ({f['complexity']}, {f['length']} chars)")
-                    # Format for readability
-                    formatted = self._format_formula(f['formula'])
-                    lines.append(formatted)
+            lines.append(f"Total: {len(sheet_formulas)} | Templates: {len(templates)} | "
+                         f"Simple: {len(simple)} | Moderate: {len(moderate)} | Complex: {len(complex_f)}\n")
             
-            # Moderate formulas
-            if moderate:
-                lines.append(f"\n--- MODERATE FORMULAS ({len(moderate)}) ---")
-                for f in sorted(moderate, key=lambda x: -x['length'])[:10]:
-                    lines.append(f"\n{f['cell']}: ({f['complexity']}, {f['length']} chars)")
-                    formatted = self._format_formula(f['formula'])
-                    lines.append(formatted)
+            # Complex and moderate templates: full formula, formatted for readability
+            for complexity in ("Complex", "Moderate"):
+                group = by_complexity[complexity]
+                if group:
+                    lines.append(f"\n--- {complexity.upper()} FORMULAS ({sum(t.count for t in group)} cells, {len(group)} templates) ---")
+                    for template in group:
+                        lines.append(f"\n{', '.join(template.ranges())}: ({template.count} cells, {len(template.example_formula)} chars)")
+                        lines.append(f"  R1C1: {template.template}")
+                        lines.append(f"  {template.example_cell}:")
+                        lines.append(self._format_formula(template.example_formula))
             
-            # Simple formulas (sample)
-            if simple:
-                lines.append(f"\n--- SIMPLE FORMULAS ({len(simple)} total) ---")
-                for f in sorted(simple, key=lambda x: -x['length'])[:5]:
-                    lines.append(f"{f['cell']}: {f['formula']}")
+            # Simple templates: one line each
+            if by_complexity["Simple"]:
+                group = by_complexity["Simple"]
+                lines.append(f"\n--- SIMPLE FORMULAS ({sum(t.count for t in group)} cells, {len(group)} templates) ---")
+                for template in group:
+                    lines.append(f"{', '.join(template.ranges())}: {template.example_formula}  [{template.example_cell}]")
         
-        output_file.write_text('\n'.join(lines))
+        self.writer.write_text(output_file, '\n'.join(lines))
     
     def _format_formula(self, formula: str) -> str:
         """Format formula for readability"""
@@ -340,6 +409,7 @@ class VBAExtractor:
         formatted = formatted.replace('INDEX(', '\n    INDEX(')
         return "  " + formatted
     
+    @traced("vba.create_summary_report")
     def create_summary_report(self):
         """Create summary of all extractions"""
         lines = []
@@ -350,7 +420,8 @@ class VBAExtractor:
         
         lines.append(f"Output Directory: {self.output_dir.absolute()}\n")
         
-        extracted_files = list(self.output_dir.glob("*"))
+        self.writer.flush()  # List files only once every queued report is on disk
+        extracted_files = [f for f in self.output_dir.glob("*") if f.name != MANIFEST_NAME]
         lines.append(f"Files Generated: {len(extracted_files)}\n")
         
         for file_path in sorted(extracted_files):
@@ -358,17 +429,18 @@ class VBAExtractor:
             lines.append(f"  - {file_path.name} ({size_kb:.1f} KB)")
         
         summary_file = self.output_dir / "00_EXTRACTION_SUMMARY.txt"
-        summary_file.write_text('\n'.join(lines))
+        summary_file.write_text('\n'.join(lines), encoding="utf-8")
         print(f"\n✓ Summary saved: {summary_file.name}")
 
 def main():
-    tracker_path = r"C:\Users\robke\OneDrive\Desktop\Rob's FMS Scorecard\Rob's PE Movement Assessment Tracker 2.0.xlsm"
+    args, tracer = trace_from_argv(sys.argv[1:])
+    tracker_path = args[0] if args else r"C:\Users\robke\OneDrive\Desktop\Rob's FMS Scorecard\Rob's PE Movement Assessment Tracker 2.0.xlsm"
     
     print("=" * 100)
     print("VBA & MACRO CODE EXTRACTOR")
     print("=" * 100)
     
-    extractor = VBAExtractor(tracker_path)
+    extractor = VBAExtractor(tracker_path, tracer=tracer)
     
     # Extract all types of information
     extractor.extract_vba_from_xlsm(tracker_path, "Tracker_2.0")
@@ -376,6 +448,8 @@ def main():
     extractor.extract_named_ranges(tracker_path, "Tracker_2.0")
     extractor.extract_formulas_detailed(tracker_path, "Tracker_2.0")
     extractor.create_summary_report()
+    extractor.close()
+    tracer.close()
     
     print("\n" + "=" * 100)
     print("✓ VBA Extraction Complete!")
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Incremental re-extraction manifest.
+Records the CRC32 and size of the zip members each output was built from
+(both come free from the archive's central directory), so a re-run only
+regenerates outputs whose source parts actually changed.
+"""
+
+import json
+import zipfile
+from pathlib import Path
+
+MANIFEST_NAME = ".extraction_manifest.json"
+MANIFEST_VERSION = 4  # Bump when an output format changes so old entries are rebuilt
+
+
+def fingerprint(archive: zipfile.ZipFile, parts) -> dict:
+    """{part name: [crc32, size]} for the parts present in the archive"""
+    found = {}
+    for part in parts:
+        try:
+            info = archive.getinfo(part)
+        except KeyError:
+            continue
+        found[part] = [info.CRC, info.file_size]
+    return found
+
+
+class ExtractionManifest:
+    """Per-output-directory record of {output key: source fingerprints + files written}"""
+
+    def __init__(self, output_dir: Path):
+        self.output_dir = Path(output_dir)
+        self.path = self.output_dir / MANIFEST_NAME
+        self.entries = {}
+        if self.path.exists():
+            try:
+                saved = json.loads(self.path.read_text())
+                if saved.get("version") == MANIFEST_VERSION:
+                    self.entries = saved.get("entries", {})
+            except (ValueError, OSError):
+                self.entries = {}
+
+    def is_current(self, key: str, archive: zipfile.ZipFile, parts) -> bool:
+        """True if `key` was built from exactly these part versions and its files still exist"""
+        entry = self.entries.get(key)
+        if entry is None or entry["sources"] != fingerprint(archive, parts):
+            return False
+        return all((self.output_dir / name).exists() for name in entry["outputs"])
+
+    def record(self, key: str, archive: zipfile.ZipFile, parts, outputs):
+        """Remember the part versions and the output files (written into output_dir) for `key`"""
+        self.entries[key] = {
+            "sources": fingerprint(archive, parts),
+            "outputs": [Path(o).name for o in outputs],
+        }
+
+    def save(self):
+        self.path.write_text(json.dumps({"version": MANIFEST_VERSION, "entries": self.entries}, indent=1))
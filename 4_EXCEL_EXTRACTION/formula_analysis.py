@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""
+Formula analysis engine: tokenize, deduplicate, and index dependencies.
+- Every formula is tokenized and its references rewritten in relative R1C1
+  form, so copy-pasted formulas (=COUNTIF(F$5:F$48,...), =COUNTIF(G$5:G$48,...))
+  collapse into one template with a compact list of the ranges it covers.
+  Copies are recognised by a cheap regex shape first, so each distinct formula
+  is tokenized once rather than once per cell.
+- References become precedents in a cross-sheet graph, with a dependents
+  index for the reverse direction ("what feeds / what uses this cell").
+
+Usage:
+    python formula_analysis.py tracker.xlsm "Run!I5"
+"""
+
+import re
+import sys
+from collections import defaultdict, deque
+from typing import NamedTuple
+
+from openpyxl.formula.tokenizer import Token, Tokenizer
+from openpyxl.utils import get_column_letter
+from openpyxl.utils.cell import column_index_from_string, coordinate_to_tuple
+
+MAX_ROW = 1048576
+MAX_COL = 16384
+EXPAND_LIMIT = 4096  # Ranges up to this many cells are indexed cell by cell
+
+_CELL = r"(\$?)([A-Za-z]{1,3})(\$?)(\d+)"
+CELL_RE = re.compile(rf"^{_CELL}$")
+AREA_RE = re.compile(rf"^{_CELL}:{_CELL}$")
+COLUMNS_RE = re.compile(r"^(\$?)([A-Za-z]{1,3}):(\$?)([A-Za-z]{1,3})$")
+ROWS_RE = re.compile(r"^(\$?)(\d+):(\$?)(\d+)$")
+# String literals / quoted sheet names / [bracketed] structured-reference and external-workbook parts
+# (skipped, so they stay literal shape text), whole-row or -column references, cell references
+SHAPE_RE = re.compile(r"\"[^\"]*\"|'[^']*'|\[[^\]]*\]|(?<![\w.$])(\$?[A-Za-z]{1,3}:\$?[A-Za-z]{1,3}|\$?\d+:\$?\d+)(?![\w.(!])"
+                      rf"|(?<![\w.]){_CELL}(?![\w.(!])")
+
+
+class RangeRef(NamedTuple):
+    """A rectangular reference on one sheet (1-based, inclusive)"""
+    sheet: str
+    min_col: int
+    min_row: int
+    max_col: int
+    max_row: int
+
+    @property
+    def size(self) -> int:
+        return (self.max_col - self.min_col + 1) * (self.max_row - self.min_row + 1)
+
+    def contains(self, row: int, col: int) -> bool:
+        return self.min_row <= row <= self.max_row and self.min_col <= col <= self.max_col
+
+    def __str__(self):
+        start = f"{get_column_letter(self.min_col)}{self.min_row}"
+        end = f"{get_column_letter(self.max_col)}{self.max_row}"
+        sheet = self.sheet if re.fullmatch(r"\w+", self.sheet) else "'" + self.sheet.replace("'", "''") + "'"
+        return f"{sheet}!{start}" if start == end else f"{sheet}!{start}:{end}"
+
+
+def tokenize(formula: str) -> list:
+    """Split a formula into Excel tokens (functions, operators, operands)"""
+    return Tokenizer(formula).items
+
+
+def split_sheet(reference: str, default_sheet: str):
+    """'Class List'!A5:A100 -> ('Class List', 'A5:A100')"""
+    if "!" not in reference:
+        return default_sheet, reference
+    sheet, ref = reference.rsplit("!", 1)
+    if sheet.startswith("'") and sheet.endswith("'"):
+        sheet = sheet[1:-1].replace("''", "'")
+    return sheet, ref
+
+
+def parse_reference(reference: str, default_sheet: str):
+    """Resolve an A1 operand to a RangeRef; None for names and structured references"""
+    sheet, ref = split_sheet(reference, default_sheet)
+    if m := CELL_RE.match(ref):
+        col, row = column_index_from_string(m[2]), int(m[4])
+        return RangeRef(sheet, col, row, col, row)
+    if m := AREA_RE.match(ref):
+        c1, r1 = column_index_from_string(m[2]), int(m[4])
+        c2, r2 = column_index_from_string(m[6]), int(m[8])
+        return RangeRef(sheet, min(c1, c2), min(r1, r2), max(c1, c2), max(r1, r2))
+    if m := COLUMNS_RE.match(ref):
+        c1, c2 = column_index_from_string(m[2]), column_index_from_string(m[4])
+        return RangeRef(sheet, min(c1, c2), 1, max(c1, c2), MAX_ROW)
+    if m := ROWS_RE.match(ref):
+        r1, r2 = int(m[2]), int(m[4])
+        return RangeRef(sheet, 1, min(r1, r2), MAX_COL, max(r1, r2))
+    return None
+
+
+def _r1c1(absolute: str, value: int, origin: int, axis: str) -> str:
+    if absolute:
+        return f"{axis}{value}"
+    offset = value - origin
+    return axis if offset == 0 else f"{axis}[{offset}]"
+
+
+def to_r1c1(reference: str, row: int, col: int) -> str:
+    """Rewrite one A1 operand relative to its host cell (names pass through unchanged)"""
+    prefix = reference[:reference.rindex("!") + 1] if "!" in reference else ""
+    ref = reference[len(prefix):]
+
+    def cell(m, offset=0):
+        return (_r1c1(m[3 + offset], int(m[4 + offset]), row, "R") +
+                _r1c1(m[1 + offset], column_index_from_string(m[2 + offset]), col, "C"))
+
+    if m := CELL_RE.match(ref):
+        return prefix + cell(m)
+    if m := AREA_RE.match(ref):
+        return f"{prefix}{cell(m)}:{cell(m, 4)}"
+    if m := COLUMNS_RE.match(ref):
+        return (f"{prefix}{_r1c1(m[1], column_index_from_string(m[2]), col, 'C')}:"
+                f"{_r1c1(m[3], column_index_from_string(m[4]), col, 'C')}")
+    if m := ROWS_RE.match(ref):
+        return f"{prefix}{_r1c1(m[1], int(m[2]), row, 'R')}:{_r1c1(m[3], int(m[4]), row, 'R')}"
+    return reference
+
+
+def formula_template(formula: str, sheet: str, row: int, col: int):
+    """Return (relative R1C1 template, [RangeRef precedents]) for one formula"""
+    template, precedents, _ = _tokenized_template(formula, sheet, row, col)
+    return template, precedents
+
+
+def _tokenized_template(formula: str, sheet: str, row: int, col: int):
+    """formula_template() plus the R1C1 text of each precedent, for re-resolving at another cell"""
+    parts = ["="]
+    precedents, r1c1_refs = [], []
+    for token in tokenize(formula):
+        if token.type == Token.OPERAND and token.subtype == Token.RANGE:
+            r1c1 = to_r1c1(token.value, row, col)
+            parts.append(r1c1)
+            ref = parse_reference(token.value, sheet)
+            if ref is not None:
+                precedents.append(ref)
+                r1c1_refs.append(r1c1)
+        else:
+            parts.append(token.value)
+    return "".join(parts), precedents, r1c1_refs
+
+
+def formula_shape(formula: str, row: int, col: int):
+    """Formula text split around its cell references, each as its offset from (row, col); None when
+    the formula has whole-row/column references. Copies of one formula share a shape, so they share a template."""
+    shape, last = [], 0
+    for m in SHAPE_RE.finditer(formula):
+        lines, column_absolute, letters, row_absolute, digits = m.groups()
+        if lines:
+            return None
+        if letters:
+            column = column_index_from_string(letters)
+            shape += (formula[last:m.start()], column_absolute, column if column_absolute else column - col,
+                      row_absolute, int(digits) if row_absolute else int(digits) - row)
+            last = m.end()
+    shape.append(formula[last:])
+    return tuple(shape)
+
+
+R1C1_CELL_RE = re.compile(r"R(?:\[(-?\d+)\]|(\d+))?C(?:\[(-?\d+)\]|(\d+))?")
+
+
+def r1c1_corners(reference: str, sheet: str) -> tuple:
+    """to_r1c1() cell or area -> (sheet, [(row absolute?, row value, col absolute?, col value)] per corner)"""
+    sheet, ref = split_sheet(reference, sheet)
+    return sheet, [(m[2] is not None, int(m[2] or m[1] or 0), m[4] is not None, int(m[4] or m[3] or 0))
+                   for m in R1C1_CELL_RE.finditer(ref)]
+
+
+def resolve_corners(corners: tuple, row: int, col: int) -> RangeRef:
+    """RangeRef of r1c1_corners() output hosted at (row, col)"""
+    sheet, points = corners
+    (r1_abs, r1, c1_abs, c1), (r2_abs, r2, c2_abs, c2) = points[0], points[-1]
+    r1, c1 = r1 if r1_abs else row + r1, c1 if c1_abs else col + c1
+    r2, c2 = r2 if r2_abs else row + r2, c2 if c2_abs else col + c2
+    return RangeRef(sheet, min(c1, c2), min(r1, r2), max(c1, c2), max(r1, r2))
+
+
+def compress_cells(cells) -> list:
+    """Collapse (row, col) cells into A1 ranges: vertical runs, then side-by-side runs merged"""
+    runs = []
+    for col, row in sorted((c, r) for r, c in cells):
+        if runs and runs[-1][0] == col and runs[-1][2] == row - 1:
+            runs[-1][2] = row
+        else:
+            runs.append([col, row, row])
+
+    # Merge runs in adjacent columns that cover the same rows into rectangles
+    rects = {}
+    for col, top, bottom in runs:
+        key = (top, bottom)
+        if key in rects and rects[key][-1][1] == col - 1:
+            rects[key][-1][1] = col
+        else:
+            rects.setdefault(key, []).append([col, col])
+
+    ranges = []
+    for (top, bottom), spans in rects.items():
+        for left, right in spans:
+            start = f"{get_column_letter(left)}{top}"
+            end = f"{get_column_letter(right)}{bottom}"
+            ranges.append((left, top, start if start == end else f"{start}:{end}"))
+    return [text for _, _, text in sorted(ranges, key=lambda r: (r[1], r[0]))]
+
+
+class FormulaTemplate:
+    """All cells on one sheet that share the same R1C1 formula"""
+
+    def __init__(self, sheet: str, template: str, example_cell: str, example_formula: str):
+        self.sheet = sheet
+        self.template = template
+        self.example_cell = example_cell
+        self.example_formula = example_formula
+        self.cells = []  # (row, col)
+
+    @property
+    def count(self) -> int:
+        return len(self.cells)
+
+    def ranges(self) -> list:
+        return compress_cells(self.cells)
+
+
+class FormulaAnalysis:
+    """Template index plus precedents/dependents graph for a workbook's formulas"""
+
+    def __init__(self):
+        self.templates = {}                       # (sheet, template) -> FormulaTemplate
+        self.formulas = {}                        # (sheet, row, col) -> formula text
+        self.precedent_refs = {}                  # (sheet, row, col) -> [RangeRef]
+        self._cell_template = {}                  # (sheet, row, col) -> template text
+        self._sheet_formulas = defaultdict(set)   # sheet -> {(sheet, row, col)}
+        self._cell_dependents = defaultdict(set)  # (sheet, row, col) -> {(sheet, row, col)}
+        self._wide_dependents = defaultdict(list) # sheet -> [(RangeRef, (sheet, row, col))]
+        self._shapes = {}                         # (sheet, formula shape) -> (template, [r1c1_corners])
+        self._unindexed = {}                      # Keys added since the dependents index was last built
+
+    @classmethod
+    def from_formula_cells(cls, cells_by_sheet: dict) -> "FormulaAnalysis":
+        """Build from {sheet: [StreamCell with .formula]} (e.g. WorkbookSession.formula_cells)"""
+        analysis = cls()
+        for sheet, cells in cells_by_sheet.items():
+            for cell in cells:
+                analysis.add(sheet, cell.row, cell.column, cell.formula)
+        return analysis
+
+    def add(self, sheet: str, row: int, col: int, formula: str):
+        key = (sheet, row, col)
+        if key in self.formulas:
+            self.remove(sheet, row, col)
+        template, precedents = self._template(formula, sheet, row, col)
+
+        group = self.templates.get((sheet, template))
+        if group is None:
+            group = self.templates[(sheet, template)] = FormulaTemplate(
+                sheet, template, f"{get_column_letter(col)}{row}", formula)
+        group.cells.append((row, col))
+
+        self.formulas[key] = formula
+        self.precedent_refs[key] = precedents
+        self._cell_template[key] = template
+        self._sheet_formulas[sheet].add(key)
+        self._unindexed[key] = None
+
+    def _index_dependents(self):
+        """Fold formulas added since the last query into the dependents index - built on first use,
+        so template-only callers (the formula report) never pay for it"""
+        for key in self._unindexed:
+            for ref in self.precedent_refs[key]:
+                if ref.size <= EXPAND_LIMIT:
+                    for r in range(ref.min_row, ref.max_row + 1):
+                        for c in range(ref.min_col, ref.max_col + 1):
+                            self._cell_dependents[(ref.sheet, r, c)].add(key)
+                else:
+                    self._wide_dependents[ref.sheet].append((ref, key))
+        self._unindexed.clear()
+
+    def _template(self, formula: str, sheet: str, row: int, col: int):
+        """formula_template(), tokenizing each distinct formula shape once
+
+        Text inside [...] is part of the shape, not a reference, so table columns are not mistaken for cells:
+        >>> analysis = FormulaAnalysis()
+        >>> analysis.add("S", 5, 1, "=SUM(Tbl[Q1])")
+        >>> analysis.add("S", 6, 1, "=SUM(Tbl[Q2])")
+        >>> sorted(template for _, template in analysis.templates)
+        ['=SUM(Tbl[Q1])', '=SUM(Tbl[Q2])']
+        """
+        shape = formula_shape(formula, row, col)
+        cached = self._shapes.get((sheet, shape)) if shape is not None else None
+        if cached is not None:
+            template, corners = cached
+            return template, [resolve_corners(ref, row, col) for ref in corners]
+        template, precedents, r1c1_refs = _tokenized_template(formula, sheet, row, col)
+        if shape is not None:
+            self._shapes[(sheet, shape)] = (template, [r1c1_corners(ref, sheet) for ref in r1c1_refs])
+        return template, precedents
+
+    def remove(self, sheet: str, row: int, col: int):
+        """Drop a formula cell from the templates and the graph"""
+        key = (sheet, row, col)
+        formula = self.formulas.pop(key, None)
+        if formula is None:
+            return
+        self._sheet_formulas[sheet].discard(key)
+        template = self._cell_template.pop(key)
+        group = self.templates.get((sheet, template))
+        if group is not None:
+            group.cells.remove((row, col))
+            if not group.cells:
+                del self.templates[(sheet, template)]
+        precedents = self.precedent_refs.pop(key, [])
+        if key in self._unindexed:
+            del self._unindexed[key]
+            return
+        for ref in precedents:
+            if ref.size <= EXPAND_LIMIT:
+                for r in range(ref.min_row, ref.max_row + 1):
+                    for c in range(ref.min_col, ref.max_col + 1):
+                        self._cell_dependents[(ref.sheet, r, c)].discard(key)
+            else:
+                self._wide_dependents[ref.sheet] = [
+                    (w, k) for w, k in self._wide_dependents[ref.sheet] if k != key]
+
+    def sheet_templates(self, sheet: str) -> list:
+        """Templates on a sheet, most-repeated first"""
+        groups = [t for (s, _), t in self.templates.items() if s == sheet]
+        return sorted(groups, key=lambda t: (-t.count, t.cells[0]))
+
+    def formula_cells_in(self, ref: RangeRef) -> list:
+        """Formula cells (sheet, row, col) that fall inside a range"""
+        if ref.size <= EXPAND_LIMIT:
+            return [(ref.sheet, r, c)
+                    for r in range(ref.min_row, ref.max_row + 1)
+                    for c in range(ref.min_col, ref.max_col + 1)
+                    if (ref.sheet, r, c) in self.formulas]
+        return [k for k in self._sheet_formulas.get(ref.sheet, ()) if ref.contains(k[1], k[2])]
+
+    def direct_dependents(self, sheet: str, row: int, col: int) -> set:
+        self._index_dependents()
+        found = set(self._cell_dependents.get((sheet, row, col), ()))
+        for ref, key in self._wide_dependents.get(sheet, ()):
+            if ref.contains(row, col):
+                found.add(key)
+        return found
+
+    def precedents(self, sheet: str, coordinate: str, transitive: bool = False) -> list:
+        """Ranges that feed a cell; transitive=True follows formula cells back to their inputs"""
+        row, col = coordinate_to_tuple(coordinate)
+        if not transitive:
+            return list(self.precedent_refs.get((sheet, row, col), []))
+
+        found, seen = [], {(sheet, row, col)}
+        queue = deque([(sheet, row, col)])
+        while queue:
+            for ref in self.precedent_refs.get(queue.popleft(), []):
+                found.append(ref)
+                for key in self.formula_cells_in(ref):
+                    if key not in seen:
+                        seen.add(key)
+                        queue.append(key)
+        return list(dict.fromkeys(found))
+
+    def dependents(self, sheet: str, coordinate: str, transitive: bool = False) -> list:
+        """Formula cells that read a cell, as (sheet, coordinate) pairs"""
+        row, col = coordinate_to_tuple(coordinate)
+        found, seen = [], {(sheet, row, col)}
+        queue = deque([(sheet, row, col)])
+        while queue:
+            for key in sorted(self.direct_dependents(*queue.popleft())):
+                if key not in seen:
+                    seen.add(key)
+                    found.append(key)
+                    if transitive:
+                        queue.append(key)
+        return [(s, f"{get_column_letter(c)}{r}") for s, r, c in found]
+
+
+def main():
+    from workbook_session import WorkbookSession
+
+    if len(sys.argv) < 3:
+        print('Usage: python formula_analysis.py <workbook.xlsm> "Sheet!A1"')
+        return
+
+    with WorkbookSession(sys.argv[1]) as session:
+        analysis = session.formula_analysis
+        sheet, coordinate = split_sheet(sys.argv[2], session.sheetnames[0])
+        row, col = coordinate_to_tuple(coordinate)
+        formula = analysis.formulas.get((sheet, row, col))
+        print(f"{sheet}!{coordinate}: {formula or '(no formula)'}")
+        print("\nPrecedents (transitive):")
+        for ref in analysis.precedents(sheet, coordinate, transitive=True):
+            print(f"  ← {ref}")
+        print("\nDependents (transitive):")
+        for dep_sheet, dep_cell in analysis.dependents(sheet, coordinate, transitive=True):
+            print(f"  → {dep_sheet}!{dep_cell}")
+
+
+if __name__ == "__main__":
+    main()
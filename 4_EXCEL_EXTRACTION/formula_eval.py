@@ -0,0 +1,1001 @@
+#!/usr/bin/env python3
+"""
+Vectorized evaluator for the tracker's scoring formulas.
+Each R1C1 template from formula_analysis is compiled once into a tree of NumPy
+closures and evaluated for every cell that shares it in a single call, so a
+whole class (or school) is recomputed without Excel and checked against the
+values Excel cached in the file. After one edit, recalculate_dirty() re-evaluates
+only the edited cells' transitive dependents, level by level.
+
+Supported: arithmetic/comparison/& operators, IF, IFS, IFERROR, ISBLANK, AND,
+OR, NOT, SUM, COUNT, COUNTA, COUNTIF, MIN, MAX, AVERAGE, ROUND, INDEX, MATCH,
+VLOOKUP, HLOOKUP, XLOOKUP, MODE.SNGL. Anything else (FILTER, names, structured
+references, array constants) marks the template as unsupported and its cells
+keep their cached values.
+
+Usage:
+    python formula_eval.py tracker.xlsm
+    python formula_eval.py tracker.xlsm "Run!F5=1"      # edit inputs, show what changes
+"""
+
+import operator
+import re
+import sys
+import time
+from collections import defaultdict, deque
+
+import numpy as np
+from openpyxl.formula.tokenizer import Token, Tokenizer
+from openpyxl.utils import get_column_letter
+from openpyxl.utils.cell import column_index_from_string, coordinate_to_tuple
+
+from formula_analysis import AREA_RE, CELL_RE, COLUMNS_RE, MAX_COL, MAX_ROW, ROWS_RE, split_sheet
+
+# Value kinds, ordered the way Excel ranks mixed types in comparisons (number < text < bool)
+BLANK, NUMBER, TEXT, BOOL, ERROR = 0, 1, 2, 3, 4
+TYPE_RANK = np.array([0, 0, 1, 2, 3], dtype=np.int8)
+
+NA, VALUE, REF, DIV0, NAME = "#N/A", "#VALUE!", "#REF!", "#DIV/0!", "#NAME?"
+ERROR_CODES = {NA, VALUE, REF, DIV0, NAME, "#NUM!", "#NULL!", "#SPILL!", "#CALC!"}
+
+
+class UnsupportedFormula(Exception):
+    """Raised at compile time for functions or syntax the evaluator does not cover"""
+
+
+class VaryingShape(Exception):
+    """A range whose size differs between host cells (e.g. $A$1:A5) - evaluate cell by cell"""
+
+
+class Vec:
+    """Columnar Excel values: kind codes, numeric payload, and text/error payload.
+
+    Shape (n,) is one value per host cell; shape (n, h, w) is a range per host cell.
+    A leading dimension of 1 broadcasts against n.
+    """
+    __slots__ = ("kind", "num", "text")
+
+    def __init__(self, kind, num, text):
+        self.kind = kind
+        self.num = num
+        self.text = text
+
+    @property
+    def shape(self):
+        return self.kind.shape
+
+    @property
+    def ndim(self):
+        return self.kind.ndim
+
+    @classmethod
+    def constant(cls, value):
+        kind, num, text = classify(value)
+        return cls(np.array([kind], np.int8), np.array([num]), np.array([text], object))
+
+    @classmethod
+    def numbers(cls, values, errors=None):
+        values = np.asarray(values, dtype=float)
+        vec = cls(np.full(values.shape, NUMBER, np.int8), values, np.full(values.shape, None, object))
+        return vec.with_errors(errors) if errors is not None else vec
+
+    @classmethod
+    def bools(cls, values, errors=None):
+        values = np.asarray(values, dtype=bool)
+        vec = cls(np.full(values.shape, BOOL, np.int8), values.astype(float), np.full(values.shape, None, object))
+        return vec.with_errors(errors) if errors is not None else vec
+
+    @classmethod
+    def errors(cls, shape, code):
+        return cls(np.full(shape, ERROR, np.int8), np.zeros(shape), np.full(shape, code, object))
+
+    def with_errors(self, codes) -> "Vec":
+        """Overlay error codes (object array, None = no error) onto this Vec"""
+        kind, num, text, codes = np.broadcast_arrays(self.kind, self.num, self.text, codes)
+        mask = codes != None  # noqa: E711 - elementwise test on an object array
+        if not mask.any():
+            return self
+        kind, num, text = kind.copy(), num.copy(), text.copy()
+        kind[mask] = ERROR
+        text[mask] = codes[mask]
+        return Vec(kind, num, text)
+
+    def error_codes(self):
+        return np.where(self.kind == ERROR, self.text, None)
+
+    def reshape(self, *shape) -> "Vec":
+        return Vec(self.kind.reshape(shape), self.num.reshape(shape), self.text.reshape(shape))
+
+    def broadcast(self, shape) -> "Vec":
+        return Vec(*(np.broadcast_to(a, shape) for a in (self.kind, self.num, self.text)))
+
+    def values(self) -> list:
+        """Back to Python scalars (None for blanks, str for text and errors)"""
+        out = []
+        for kind, num, text in zip(self.kind.ravel(), self.num.ravel(), self.text.ravel()):
+            if kind == NUMBER:
+                out.append(int(num) if num.is_integer() else float(num))
+            elif kind == BOOL:
+                out.append(bool(num))
+            elif kind in (TEXT, ERROR):
+                out.append(text)
+            else:
+                out.append(None)
+        return out
+
+
+def classify(value):
+    """Python cell value -> (kind, num, text)"""
+    if value is None:
+        return BLANK, 0.0, None
+    if isinstance(value, bool):
+        return BOOL, float(value), None
+    if isinstance(value, (int, float)):
+        return NUMBER, float(value), None
+    value = str(value)
+    if value in ERROR_CODES:
+        return ERROR, 0.0, value
+    return TEXT, 0.0, value
+
+
+def where(cond, a: Vec, b: Vec) -> Vec:
+    return Vec(np.where(cond, a.kind, b.kind), np.where(cond, a.num, b.num), np.where(cond, a.text, b.text))
+
+
+def _align(a: Vec, b: Vec):
+    """Let a per-host value broadcast against a per-host range"""
+    if a.ndim == 1 and b.ndim == 3:
+        a = a.reshape(-1, 1, 1)
+    elif a.ndim == 3 and b.ndim == 1:
+        b = b.reshape(-1, 1, 1)
+    return a, b
+
+
+def _first_error(*codes):
+    out = codes[0]
+    for c in codes[1:]:
+        out = np.where(out != None, out, c)  # noqa: E711
+    return out
+
+
+def _parse_number(text):
+    try:
+        return float(text.strip())
+    except (ValueError, AttributeError):
+        return None
+
+
+def to_number(v: Vec):
+    """Coerce to float the way Excel arithmetic does; returns (values, error codes)"""
+    num = np.where(v.kind == BLANK, 0.0, v.num)
+    errors = v.error_codes()
+    text_mask = v.kind == TEXT
+    if text_mask.any():
+        num = num.copy()
+        errors = errors.copy()
+        for idx in zip(*np.nonzero(text_mask)):
+            parsed = _parse_number(v.text[idx])
+            if parsed is None:
+                errors[idx] = VALUE
+            else:
+                num[idx] = parsed
+    return num, errors
+
+
+def to_bool(v: Vec):
+    """Coerce to logical; text is #VALUE! (as in IF/AND/OR)"""
+    errors = np.where(v.kind == TEXT, VALUE, v.error_codes())
+    return v.num != 0, errors
+
+
+def to_text(v: Vec):
+    """Coerce to strings the way & does"""
+    out = np.empty(v.shape, object)
+    for idx in np.ndindex(v.shape):
+        kind = v.kind[idx]
+        if kind == TEXT:
+            out[idx] = v.text[idx]
+        elif kind == NUMBER:
+            num = v.num[idx]
+            out[idx] = str(int(num)) if num.is_integer() else repr(num)
+        elif kind == BOOL:
+            out[idx] = "TRUE" if v.num[idx] else "FALSE"
+        else:
+            out[idx] = ""
+    return out, v.error_codes()
+
+
+_lower = np.frompyfunc(str.lower, 1, 1)
+
+
+def _lowered(v: Vec, kinds):
+    """Lower-cased text (object array); cheaper than a fixed-width str copy for small hosts"""
+    texts = np.where(kinds == TEXT, v.text, "")
+    return _lower(np.where(texts == None, "", texts))  # noqa: E711
+
+
+def compare(a: Vec, b: Vec, op) -> Vec:
+    """Excel comparison: blanks take the other side's type, mixed types compare by rank,
+    text compares case-insensitively"""
+    a, b = _align(a, b)
+    ka = np.where(a.kind == BLANK, np.where(b.kind == BLANK, NUMBER, b.kind), a.kind)
+    kb = np.where(b.kind == BLANK, ka, b.kind)
+    ka, kb = ka.astype(np.int8), kb.astype(np.int8)
+    rank_a, rank_b = TYPE_RANK[ka], TYPE_RANK[kb]
+
+    result = np.where(rank_a != rank_b, op(rank_a, rank_b), op(a.num, b.num))
+    text_mask = (ka == TEXT) & (kb == TEXT)
+    if text_mask.any():
+        result = np.where(text_mask, op(_lowered(a, ka), _lowered(b, kb)), result)
+    return Vec.bools(result, _first_error(a.error_codes(), b.error_codes()))
+
+
+def arithmetic(a: Vec, b: Vec, op) -> Vec:
+    a, b = _align(a, b)
+    num_a, err_a = to_number(a)
+    num_b, err_b = to_number(b)
+    errors = _first_error(err_a, err_b)
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        values = op(num_a, num_b)
+    if op is operator.truediv:
+        errors = np.where((num_b == 0) & (errors == None), DIV0, errors)  # noqa: E711
+    values = np.where(np.isfinite(values), values, 0.0)
+    return Vec.numbers(values, errors)
+
+
+def concat(a: Vec, b: Vec) -> Vec:
+    a, b = _align(a, b)
+    text_a, err_a = to_text(a)
+    text_b, err_b = to_text(b)
+    joined = text_a + text_b
+    return Vec(np.full(joined.shape, TEXT, np.int8), np.zeros(joined.shape), joined).with_errors(
+        _first_error(err_a, err_b))
+
+
+BINARY_OPS = {
+    "+": lambda a, b: arithmetic(a, b, operator.add),
+    "-": lambda a, b: arithmetic(a, b, operator.sub),
+    "*": lambda a, b: arithmetic(a, b, operator.mul),
+    "/": lambda a, b: arithmetic(a, b, operator.truediv),
+    "^": lambda a, b: arithmetic(a, b, operator.pow),
+    "&": concat,
+    "=": lambda a, b: compare(a, b, operator.eq),
+    "<>": lambda a, b: compare(a, b, operator.ne),
+    "<": lambda a, b: compare(a, b, operator.lt),
+    ">": lambda a, b: compare(a, b, operator.gt),
+    "<=": lambda a, b: compare(a, b, operator.le),
+    ">=": lambda a, b: compare(a, b, operator.ge),
+}
+PRECEDENCE = {"&": 1, "=": 0, "<>": 0, "<": 0, ">": 0, "<=": 0, ">=": 0,
+              "+": 2, "-": 2, "*": 3, "/": 3, "^": 4}
+
+
+# ---------------------------------------------------------------------------
+# Functions: each takes evaluated Vec arguments and returns one Vec per host
+# ---------------------------------------------------------------------------
+
+def _flatten(v: Vec) -> Vec:
+    """(n, h, w) range -> (n, h*w); per-host values -> (n, 1)"""
+    return v.reshape(v.shape[0], -1) if v.ndim == 3 else v.reshape(-1, 1)
+
+
+def _aggregate_numbers(args, reduce, empty):
+    """Numbers from ranges (text/bools ignored) and coerced scalars -> reduce per host"""
+    values, masks, errors = [], [], []
+    for arg in args:
+        if arg.ndim == 3:
+            flat = _flatten(arg)
+            values.append(flat.num)
+            masks.append(flat.kind == NUMBER)
+            errors.append(np.where((flat.kind == ERROR).any(axis=1), flat.text[np.arange(flat.shape[0]),
+                                   np.argmax(flat.kind == ERROR, axis=1)], None))
+        else:
+            num, err = to_number(arg)
+            values.append(num.reshape(-1, 1))
+            masks.append(np.ones((num.shape[0], 1), bool))
+            errors.append(err)
+    n = max(v.shape[0] for v in values)
+    values = np.concatenate([np.broadcast_to(v, (n, v.shape[1])) for v in values], axis=1)
+    masks = np.concatenate([np.broadcast_to(m, (n, m.shape[1])) for m in masks], axis=1)
+    result = reduce(values, masks)
+    result = np.where(masks.any(axis=1), result, empty)
+    return Vec.numbers(result, _first_error(*errors))
+
+
+def fn_sum(*args):
+    return _aggregate_numbers(args, lambda v, m: np.where(m, v, 0).sum(axis=1), 0.0)
+
+
+def fn_max(*args):
+    return _aggregate_numbers(args, lambda v, m: np.where(m, v, -np.inf).max(axis=1), 0.0)
+
+
+def fn_min(*args):
+    return _aggregate_numbers(args, lambda v, m: np.where(m, v, np.inf).min(axis=1), 0.0)
+
+
+def fn_count(*args):
+    """Numbers in ranges plus scalars that coerce to a number; text, blanks and errors are not counted"""
+    total = 0
+    for arg in args:
+        if arg.ndim == 3:
+            total = total + (_flatten(arg).kind == NUMBER).sum(axis=1)
+        else:
+            num, err = to_number(arg)
+            total = total + ((arg.kind != BLANK) & (err == None))  # noqa: E711
+    return Vec.numbers(total)
+
+
+def fn_average(*args):
+    result = _aggregate_numbers(args, lambda v, m: np.where(m, v, 0).sum(axis=1) / np.maximum(m.sum(axis=1), 1), 0.0)
+    counts = fn_count(*args)
+    return result.with_errors(np.where(counts.num == 0, DIV0, None))
+
+
+def fn_counta(*args):
+    total = 0
+    for arg in args:
+        flat = _flatten(arg)
+        total = total + (flat.kind != BLANK).sum(axis=1)
+    return Vec.numbers(total)
+
+
+def fn_round(value, digits=None):
+    num, err = to_number(value)
+    places, err_d = to_number(digits) if digits is not None else (np.zeros(1), np.array([None], object))
+    # Excel rounds half away from zero
+    scale = 10.0 ** places
+    return Vec.numbers(np.sign(num) * np.floor(np.abs(num) * scale + 0.5) / scale, _first_error(err, err_d))
+
+
+def _logical(args, reduce):
+    values, errors = [], []
+    for arg in args:
+        flat = _flatten(arg)
+        if arg.ndim == 3:
+            keep = (flat.kind == NUMBER) | (flat.kind == BOOL)
+            values.append(np.where(keep, flat.num != 0, reduce is np.all))
+            errors.append(np.where((flat.kind == ERROR).any(axis=1), VALUE, None))
+        else:
+            truth, err = to_bool(arg)
+            values.append(truth.reshape(-1, 1))
+            errors.append(err)
+    n = max(v.shape[0] for v in values)
+    stacked = np.concatenate([np.broadcast_to(v, (n, v.shape[1])) for v in values], axis=1)
+    return Vec.bools(reduce(stacked, axis=1), _first_error(*errors))
+
+
+def fn_and(*args):
+    return _logical(args, np.all)
+
+
+def fn_or(*args):
+    return _logical(args, np.any)
+
+
+def fn_not(value):
+    truth, err = to_bool(value)
+    return Vec.bools(~truth, err)
+
+
+def fn_if(cond, when_true=None, when_false=None):
+    truth, err = to_bool(cond)
+    when_true = when_true if when_true is not None else Vec.constant(0)
+    when_false = when_false if when_false is not None else Vec.constant(False)
+    when_true, when_false = _align(when_true, when_false)
+    return where(truth, when_true, when_false).with_errors(err)
+
+
+def fn_ifs(*args):
+    if len(args) % 2:
+        raise UnsupportedFormula("IFS needs condition/value pairs")
+    result = Vec.errors((1,), NA)
+    # Walk pairs backwards so the first true condition wins
+    for cond, value in reversed(list(zip(args[0::2], args[1::2]))):
+        truth, err = to_bool(cond)
+        result = where(truth, value, result).with_errors(err)
+    return result
+
+
+def fn_iferror(value, fallback):
+    return where(value.kind == ERROR, fallback, value)
+
+
+def fn_isblank(value):
+    return Vec.bools(value.kind == BLANK)
+
+
+def fn_index(array, row_num, col_num=None):
+    if array.ndim != 3:
+        array = array.reshape(-1, 1, 1)
+    _, h, w = array.shape
+    rows, err_r = to_number(row_num)
+    if col_num is None and h == 1:
+        rows, cols, err_c = np.ones_like(rows), rows, err_r
+        err_r = np.full(rows.shape, None, object)
+    elif col_num is None:
+        cols, err_c = np.ones_like(rows), np.full(rows.shape, None, object)
+    else:
+        cols, err_c = to_number(col_num)
+    rows, cols = np.broadcast_arrays(rows.astype(int), cols.astype(int))
+    n = max(array.shape[0], rows.shape[0])
+    rows, cols = np.broadcast_to(rows, (n,)), np.broadcast_to(cols, (n,))
+    valid = (rows >= 1) & (rows <= h) & (cols >= 1) & (cols <= w)
+    host = np.arange(n) if array.shape[0] == n else np.zeros(n, int)
+    r, c = np.where(valid, rows - 1, 0), np.where(valid, cols - 1, 0)
+    picked = Vec(array.kind[host, r, c], array.num[host, r, c], array.text[host, r, c])
+    return picked.with_errors(_first_error(err_r, err_c, np.where(valid, None, REF)))
+
+
+def _match_positions(lookup: Vec, array: Vec, match_type: int):
+    """1-based positions of lookup values in a one-dimensional range (0 where not found)"""
+    table = _flatten(array)                       # (n|1, L)
+    keys = _flatten(lookup)                       # (n|1, K)
+    table3 = table.reshape(table.shape[0], 1, table.shape[1])
+    keys3 = keys.reshape(keys.shape[0], keys.shape[1], 1)
+    L = table.shape[1]
+    if match_type == 0:
+        hits = compare(keys3, table3, operator.eq).num.astype(bool)
+        hits &= (table3.kind != BLANK) & (table3.kind != ERROR)
+        found = hits.any(axis=2)
+        pos = np.argmax(hits, axis=2) + 1
+    else:
+        op = operator.le if match_type > 0 else operator.ge
+        hits = compare(table3, keys3, op).num.astype(bool)
+        hits &= TYPE_RANK[table3.kind] == TYPE_RANK[np.where(keys3.kind == BLANK, NUMBER, keys3.kind)]
+        hits &= table3.kind != BLANK
+        found = hits.any(axis=2)
+        pos = L - np.argmax(hits[:, :, ::-1], axis=2)
+    return np.where(found, pos, 0), keys
+
+
+def fn_match(lookup, array, match_type=None):
+    kind = 1 if match_type is None else int(match_type.num.ravel()[0])
+    positions, keys = _match_positions(lookup, array, kind)
+    errors = np.where(positions == 0, NA, None)
+    errors = _first_error(keys.error_codes(), errors)
+    result = Vec.numbers(positions.astype(float), errors)
+    return result.reshape(*lookup.shape) if lookup.ndim == 3 else result.reshape(-1)
+
+
+def fn_vlookup(lookup, table, col_index, range_lookup=None):
+    approximate = True if range_lookup is None else bool(range_lookup.num.ravel()[0])
+    position = fn_match(lookup, Vec(table.kind[:, :, :1], table.num[:, :, :1], table.text[:, :, :1]),
+                        Vec.constant(1 if approximate else 0))
+    return fn_index(table, position, col_index).with_errors(position.error_codes())
+
+
+def fn_hlookup(lookup, table, row_index, range_lookup=None):
+    approximate = True if range_lookup is None else bool(range_lookup.num.ravel()[0])
+    position = fn_match(lookup, Vec(table.kind[:, :1, :], table.num[:, :1, :], table.text[:, :1, :]),
+                        Vec.constant(1 if approximate else 0))
+    return fn_index(table, row_index, position).with_errors(position.error_codes())
+
+
+def fn_xlookup(lookup, lookup_array, return_array, if_not_found=None):
+    position = fn_match(lookup, lookup_array, Vec.constant(0))
+    result = fn_index(_flatten(return_array).reshape(return_array.shape[0], 1, -1), position)
+    if if_not_found is not None:
+        result = where(position.kind == ERROR, if_not_found, result)
+    return result
+
+
+def fn_mode_sngl(*args):
+    flats = [_flatten(a) for a in args]
+    n = max(f.shape[0] for f in flats)
+    values = np.concatenate([np.broadcast_to(f.num, (n, f.shape[1])) for f in flats], axis=1)
+    valid = np.concatenate([np.broadcast_to(f.kind == NUMBER, (n, f.shape[1])) for f in flats], axis=1)
+    same = (values[:, :, None] == values[:, None, :]) & valid[:, :, None] & valid[:, None, :]
+    counts = same.sum(axis=2)
+    best = np.argmax(counts, axis=1)  # First value reaching the highest count
+    top = counts[np.arange(n), best]
+    return Vec.numbers(values[np.arange(n), best], np.where(top < 2, NA, None))
+
+
+def _criteria_matcher(criterion):
+    """COUNTIF criterion -> function(range Vec) -> bool mask"""
+    if isinstance(criterion, str):
+        m = re.match(r"^(<=|>=|<>|=|<|>)?(.*)$", criterion, re.S)
+        op_text, operand = m[1] or "=", m[2]
+    else:
+        op_text, operand = "=", criterion
+    op = {"=": operator.eq, "<>": operator.ne, "<": operator.lt, ">": operator.gt,
+          "<=": operator.le, ">=": operator.ge}[op_text]
+
+    if isinstance(operand, (int, float)) and not isinstance(operand, bool):
+        number = float(operand)
+    else:
+        number = _parse_number(operand) if isinstance(operand, str) else None
+    if number is not None:
+        if op is operator.ne:
+            return lambda rng: ~((rng.kind == NUMBER) & (rng.num == number))
+        return lambda rng: (rng.kind == NUMBER) & op(rng.num, number)
+
+    operand = "" if operand is None else str(operand)
+    if operand == "" and op_text in ("=", "<>"):
+        return lambda rng: (rng.kind == BLANK) if op_text == "=" else (rng.kind != BLANK)
+
+    wildcard = "*" in operand or "?" in operand
+    pattern = re.compile("^" + re.escape(operand.lower()).replace(r"\*", ".*").replace(r"\?", ".") + "$", re.S)
+    test = np.vectorize(lambda t: bool(pattern.match(t)), otypes=[bool])
+
+    def match(rng):
+        texts = _lowered(rng, rng.kind)
+        if op_text in ("=", "<>"):
+            hit = (rng.kind == TEXT) & (test(texts) if wildcard else texts == operand.lower())
+            return ~hit if op_text == "<>" else hit
+        return (rng.kind == TEXT) & op(texts, operand.lower())
+    return match
+
+
+def fn_countif(rng, criteria):
+    flat = _flatten(rng)
+    crit = _flatten(criteria)                     # (n|1, K) - K > 1 for array criteria
+    n = max(flat.shape[0], crit.shape[0])
+    crit_values = np.array(crit.values(), object).reshape(crit.shape)
+    counts = np.zeros((n, crit.shape[1]))
+    # One vectorized pass per distinct criterion (usually just one)
+    for value in dict.fromkeys(crit_values.ravel()):
+        hit = _criteria_matcher(value)(flat).sum(axis=1)
+        selected = np.array([[v == value and type(v) is type(value) for v in row] for row in crit_values])
+        counts = np.where(selected, hit[:, None], counts)
+    result = Vec.numbers(counts)
+    return result.reshape(n, *criteria.shape[1:]) if criteria.ndim == 3 else result.reshape(-1)
+
+
+FUNCTIONS = {
+    "SUM": fn_sum, "MAX": fn_max, "MIN": fn_min, "COUNT": fn_count, "COUNTA": fn_counta,
+    "AVERAGE": fn_average, "ROUND": fn_round, "AND": fn_and, "OR": fn_or, "NOT": fn_not,
+    "IF": fn_if, "IFS": fn_ifs, "IFERROR": fn_iferror, "ISBLANK": fn_isblank,
+    "INDEX": fn_index, "MATCH": fn_match, "VLOOKUP": fn_vlookup, "HLOOKUP": fn_hlookup,
+    "XLOOKUP": fn_xlookup, "MODE.SNGL": fn_mode_sngl, "MODE": fn_mode_sngl, "COUNTIF": fn_countif,
+}
+
+
+# ---------------------------------------------------------------------------
+# Compiler: tokens -> AST -> closures over (context, host rows, host cols)
+# ---------------------------------------------------------------------------
+
+class SheetGrid:
+    """Dense kind/num/text arrays for one sheet (1-based; row/col 0 unused)"""
+
+    def __init__(self, max_row: int, max_col: int):
+        shape = (max_row + 2, max_col + 2)
+        self.kind = np.zeros(shape, np.int8)
+        self.num = np.zeros(shape)
+        self.text = np.full(shape, None, object)
+
+    def set(self, row: int, col: int, value):
+        if row > self.kind.shape[0] - 2 or col > self.kind.shape[1] - 2:
+            self._grow(row, col)
+        self.kind[row, col], self.num[row, col], self.text[row, col] = classify(value)
+
+    def _grow(self, max_row: int, max_col: int):
+        """Extend the grid (keeping the spare blank row/col) to hold (max_row, max_col)"""
+        pad = ((0, max(0, max_row + 2 - self.kind.shape[0])), (0, max(0, max_col + 2 - self.kind.shape[1])))
+        self.kind = np.pad(self.kind, pad)
+        self.num = np.pad(self.num, pad)
+        self.text = np.pad(self.text, pad, constant_values=None)
+
+    def gather(self, rows, cols) -> Vec:
+        """Values at (rows, cols) index arrays; anything outside the grid is blank"""
+        inside = (rows >= 0) & (rows < self.kind.shape[0]) & (cols >= 0) & (cols < self.kind.shape[1])
+        if inside.all():
+            return Vec(self.kind[rows, cols], self.num[rows, cols], self.text[rows, cols])
+        r, c = np.where(inside, rows, 0), np.where(inside, cols, 0)
+        return Vec(np.where(inside, self.kind[r, c], BLANK).astype(np.int8),
+                   np.where(inside, self.num[r, c], 0.0),
+                   np.where(inside, self.text[r, c], None))
+
+    def store(self, rows, cols, values: Vec):
+        self.kind[rows, cols] = values.kind
+        self.num[rows, cols] = values.num
+        self.text[rows, cols] = values.text
+
+
+def _corner(absolute_col, col, absolute_row, row, origin_row, origin_col):
+    """(row is absolute, row value/offset, col is absolute, col value/offset)"""
+    row, col = int(row), column_index_from_string(col)
+    return (bool(absolute_row), row if absolute_row else row - origin_row,
+            bool(absolute_col), col if absolute_col else col - origin_col)
+
+
+def _compile_ref(reference: str, sheet: str, origin_row: int, origin_col: int):
+    ref_sheet, ref = split_sheet(reference, sheet)
+    if ref_sheet.startswith("["):
+        raise UnsupportedFormula(f"external reference {reference}")
+    if m := CELL_RE.match(ref):
+        corner = _corner(m[1], m[2], m[3], m[4], origin_row, origin_col)
+        return ("cell", ref_sheet, corner)
+    if m := AREA_RE.match(ref):
+        return ("area", ref_sheet, _corner(m[1], m[2], m[3], m[4], origin_row, origin_col),
+                _corner(m[5], m[6], m[7], m[8], origin_row, origin_col))
+    if m := COLUMNS_RE.match(ref):
+        return ("area", ref_sheet, (True, 1, bool(m[1]), _corner(m[1], m[2], "$", 1, 0, origin_col)[3]),
+                (True, MAX_ROW, bool(m[3]), _corner(m[3], m[4], "$", 1, 0, origin_col)[3]))
+    if m := ROWS_RE.match(ref):
+        top = int(m[2]) if m[1] else int(m[2]) - origin_row
+        bottom = int(m[4]) if m[3] else int(m[4]) - origin_row
+        return ("area", ref_sheet, (bool(m[1]), top, True, 1), (bool(m[3]), bottom, True, MAX_COL))
+    raise UnsupportedFormula(f"named or structured reference {reference}")
+
+
+def _resolve(corner, rows, cols):
+    abs_row, row, abs_col, col = corner
+    return (np.full_like(rows, row) if abs_row else rows + row,
+            np.full_like(cols, col) if abs_col else cols + col)
+
+
+class _Parser:
+    """Precedence-climbing parser over openpyxl formula tokens"""
+
+    def __init__(self, formula: str, sheet: str, row: int, col: int):
+        self.tokens = [t for t in Tokenizer(formula).items if t.type != Token.WSPACE]
+        self.pos = 0
+        self.sheet, self.row, self.col = sheet, row, col
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def take(self):
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def parse(self):
+        node = self.expression(0)
+        if self.peek() is not None:
+            raise UnsupportedFormula(f"unexpected token {self.peek().value!r}")
+        return node
+
+    def expression(self, min_precedence):
+        left = self.unary()
+        while True:
+            token = self.peek()
+            if token is None or token.type != Token.OP_IN or token.value not in PRECEDENCE:
+                if token is not None and token.type == Token.OP_IN:
+                    raise UnsupportedFormula(f"operator {token.value!r}")
+                return left
+            precedence = PRECEDENCE[token.value]
+            if precedence < min_precedence:
+                return left
+            self.take()
+            right = self.expression(precedence + 1)
+            left = ("binop", token.value, left, right)
+
+    def unary(self):
+        token = self.peek()
+        if token is not None and token.type == Token.OP_PRE:
+            self.take()
+            operand = self.unary()
+            return ("binop", "-", ("const", 0), operand) if token.value == "-" else operand
+        node = self.primary()
+        while self.peek() is not None and self.peek().type == Token.OP_POST:
+            self.take()
+            node = ("binop", "/", node, ("const", 100))
+        return node
+
+    def primary(self):
+        token = self.take()
+        if token.type == Token.OPERAND:
+            if token.subtype == Token.NUMBER:
+                return ("const", float(token.value))
+            if token.subtype == Token.TEXT:
+                return ("const", token.value[1:-1].replace('""', '"'))
+            if token.subtype == Token.LOGICAL:
+                return ("const", token.value.upper() == "TRUE")
+            if token.subtype == Token.ERROR:
+                return ("const", token.value)
+            return ("ref",) + _compile_ref(token.value, self.sheet, self.row, self.col)
+        if token.type == Token.PAREN and token.subtype == Token.OPEN:
+            node = self.expression(0)
+            self.take()  # closing paren
+            return node
+        if token.type == Token.FUNC and token.subtype == Token.OPEN:
+            name = token.value[:-1].upper()
+            for prefix in ("_XLFN._XLWS.", "_XLFN.", "_XLWS."):
+                if name.startswith(prefix):
+                    name = name[len(prefix):]
+            if name not in FUNCTIONS:
+                raise UnsupportedFormula(f"function {name}")
+            args = []
+            while True:
+                if self.peek().type == Token.FUNC and self.peek().subtype == Token.CLOSE:
+                    self.take()
+                    return ("func", name, args)
+                if self.peek().type == Token.SEP and self.peek().subtype == Token.ARG:
+                    self.take()
+                    args.append(None)  # Omitted argument
+                    continue
+                args.append(self.expression(0))
+                if self.peek().type == Token.SEP:
+                    self.take()
+        raise UnsupportedFormula(f"token {token.value!r}")
+
+
+def compile_node(node):
+    """AST -> closure(context, rows, cols) -> Vec"""
+    kind = node[0]
+    if kind == "const":
+        value = Vec.constant(node[1])
+        return lambda ctx, rows, cols: value
+    if kind == "binop":
+        op, left, right = BINARY_OPS[node[1]], compile_node(node[2]), compile_node(node[3])
+        return lambda ctx, rows, cols: op(left(ctx, rows, cols), right(ctx, rows, cols))
+    if kind == "func":
+        fn = FUNCTIONS[node[1]]
+        args = [compile_node(a) if a is not None else None for a in node[2]]
+        return lambda ctx, rows, cols: fn(*[a(ctx, rows, cols) if a is not None else None for a in args])
+    if kind == "ref" and node[1] == "cell":
+        sheet, corner = node[2], node[3]
+
+        def cell(ctx, rows, cols):
+            grid = ctx.get(sheet)
+            if grid is None:
+                return Vec.errors(rows.shape, REF)
+            return grid.gather(*_resolve(corner, rows, cols))
+        return cell
+    if kind == "ref":
+        sheet, start, end = node[2], node[3], node[4]
+
+        def area(ctx, rows, cols):
+            grid = ctx.get(sheet)
+            top, left = _resolve(start, rows, cols)
+            bottom, right = _resolve(end, rows, cols)
+            if grid is None:
+                return Vec.errors((rows.shape[0], 1, 1), REF)
+            # Whole-column / whole-row references stop at the populated grid
+            bottom = np.minimum(bottom, grid.kind.shape[0] - 1)
+            right = np.minimum(right, grid.kind.shape[1] - 1)
+            top, bottom = np.minimum(top, bottom), np.maximum(top, bottom)
+            left, right = np.minimum(left, right), np.maximum(left, right)
+            heights, widths = bottom - top + 1, right - left + 1
+            if (heights != heights[0]).any() or (widths != widths[0]).any():
+                raise VaryingShape()
+            r = top[:, None, None] + np.arange(heights[0])[None, :, None]
+            c = left[:, None, None] + np.arange(widths[0])[None, None, :]
+            return grid.gather(*np.broadcast_arrays(r, c))
+        return area
+    raise UnsupportedFormula(f"node {kind}")
+
+
+class CompiledFormula:
+    """One template compiled to a vectorized callable"""
+
+    def __init__(self, formula: str, sheet: str, row: int, col: int):
+        self.formula = formula
+        self.fn = compile_node(_Parser("=" + formula.lstrip("="), sheet, row, col).parse())
+
+    def evaluate(self, grids: dict, rows: np.ndarray, cols: np.ndarray) -> Vec:
+        try:
+            result = self.fn(grids, rows, cols)
+        except VaryingShape:
+            # Expanding ranges: fall back to one host at a time
+            parts = [self.fn(grids, rows[i:i + 1], cols[i:i + 1]) for i in range(len(rows))]
+            result = Vec(*(np.concatenate([getattr(p, f).reshape(-1) if p.ndim == 1 else
+                                           getattr(p, f)[:, 0, 0] for p in parts]) for f in ("kind", "num", "text")))
+        if result.ndim == 3:
+            result = Vec(result.kind[:, 0, 0], result.num[:, 0, 0], result.text[:, 0, 0])
+        # A formula that lands on an empty cell shows 0, not a blank
+        result = where(result.kind == BLANK, Vec.constant(0), result)
+        return result.broadcast(rows.shape)
+
+
+class WorkbookEvaluator:
+    """Recompute every supported formula in dependency order and compare with cached values"""
+
+    def __init__(self, session):
+        self.session = session
+        self.analysis = session.formula_analysis
+        self.grids = {}
+        self.cached = {}  # (sheet, row, col) -> cached value of each formula cell
+        for sheet_name in session.sheetnames:
+            sheet = session.open_sheet(sheet_name)
+            cells = [cell for row in sheet.rows() for cell in row]
+            grid = SheetGrid(max((c.row for c in cells), default=1), max((c.column for c in cells), default=1))
+            for cell in cells:
+                grid.set(cell.row, cell.column, cell.value)
+                if cell.formula:
+                    self.cached[(sheet_name, cell.row, cell.column)] = cell.value
+            self.grids[sheet_name] = grid
+        self.compiled = {}
+        self.unsupported = {}  # (sheet, template) -> reason
+        self.levels = self._levels()
+        self.dirty = set()     # Input cells changed since the last recalculation
+        self._plans = {}       # Input cell -> batches of its transitive dependents (see _batches)
+
+    def _levels(self) -> dict:
+        """Longest-path depth of every formula cell (inputs are depth 0); cycles are left out"""
+        formulas = self.analysis.formulas
+        precedents = {key: {p for ref in self.analysis.precedent_refs[key]
+                            for p in self.analysis.formula_cells_in(ref) if p != key}
+                      for key in formulas}
+        waiting = {key: len(deps) for key, deps in precedents.items()}
+        dependents = defaultdict(list)
+        for key, deps in precedents.items():
+            for dep in deps:
+                dependents[dep].append(key)
+        level = {key: 0 for key, count in waiting.items() if count == 0}
+        queue = deque(level)
+        while queue:
+            key = queue.popleft()
+            for dependent in dependents[key]:
+                level[dependent] = max(level.get(dependent, 0), level[key] + 1)
+                waiting[dependent] -= 1
+                if waiting[dependent] == 0:
+                    queue.append(dependent)
+        return level
+
+    def compile(self, sheet: str, template):
+        key = (sheet, template.template)
+        if key not in self.compiled and key not in self.unsupported:
+            row, col = template.cells[0]
+            try:
+                self.compiled[key] = CompiledFormula(template.example_formula, sheet, row, col)
+            except (UnsupportedFormula, IndexError, AttributeError) as e:
+                self.unsupported[key] = str(e) or type(e).__name__
+        return self.compiled.get(key)
+
+    def _batches(self, keys) -> list:
+        """Formula cells -> [(level, sheet, template, rows, cols)] in evaluation order.
+        Cells on a cycle have no level and are left out, as are unsupported templates."""
+        groups = defaultdict(lambda: ([], []))
+        for key in keys:
+            level = self.levels.get(key)
+            if level is not None:
+                sheet, row, col = key
+                rows, cols = groups[(level, sheet, self.analysis._cell_template[key])]
+                rows.append(row)
+                cols.append(col)
+
+        batches = []
+        for level, sheet, template_text in sorted(groups):
+            compiled = self.compile(sheet, self.analysis.templates[(sheet, template_text)])
+            if compiled is not None:
+                rows, cols = groups[(level, sheet, template_text)]
+                batches.append((level, sheet, compiled, np.array(rows), np.array(cols)))
+        return batches
+
+    def _run(self, batches) -> int:
+        computed = 0
+        for _, sheet, compiled, rows, cols in batches:
+            self.grids[sheet].store(rows, cols, compiled.evaluate(self.grids, rows, cols))
+            computed += len(rows)
+        return computed
+
+    def recalculate(self) -> int:
+        """Evaluate every supported formula cell, writing results into the grids; returns cells computed"""
+        self.dirty.clear()
+        return self._run(self._batches(self.levels))
+
+    def set_value(self, sheet: str, coordinate: str, value):
+        """Change one input cell and mark it dirty (formula cells are computed, not set)"""
+        row, col = coordinate_to_tuple(coordinate)
+        if (sheet, row, col) in self.analysis.formulas:
+            raise ValueError(f"{sheet}!{coordinate} holds a formula")
+        self.grids[sheet].set(row, col, value)
+        self.dirty.add((sheet, row, col))
+
+    def _dependents(self, key) -> set:
+        found, queue = set(), deque([key])
+        while queue:
+            for dependent in self.analysis.direct_dependents(*queue.popleft()):
+                if dependent not in found:
+                    found.add(dependent)
+                    queue.append(dependent)
+        return found
+
+    def _plan(self, key) -> list:
+        """Batches that refresh everything downstream of one input cell, built once per cell"""
+        if key not in self._plans:
+            self._plans[key] = self._batches(self._dependents(key))
+        return self._plans[key]
+
+    def _reads(self, key, changed: set) -> bool:
+        """Whether a formula cell reads any of the changed cells"""
+        refs = self.analysis.precedent_refs[key]
+        return any(ref.sheet == sheet and ref.contains(row, col) for ref in refs for sheet, row, col in changed)
+
+    def recalculate_dirty(self) -> list:
+        """Re-evaluate the transitive dependents of the dirty cells in level order -> [(sheet, row, col)] computed.
+        A cell is only evaluated if one of its precedents actually changed value, so an edit that
+        leaves e.g. a student's level as it was stops there instead of refreshing every summary."""
+        dirty, self.dirty = self.dirty, set()
+        if len(dirty) == 1:
+            batches = self._plan(next(iter(dirty)))
+        else:
+            batches = self._batches(set().union(*(self._dependents(key) for key in dirty)))
+
+        changed, computed = set(dirty), []
+        for _, sheet, compiled, rows, cols in batches:
+            live = [i for i, (row, col) in enumerate(zip(rows.tolist(), cols.tolist()))
+                    if self._reads((sheet, row, col), changed)]
+            if not live:
+                continue
+            if len(live) < len(rows):
+                rows, cols = rows[live], cols[live]
+            grid = self.grids[sheet]
+            before = grid.gather(rows, cols)
+            result = compiled.evaluate(self.grids, rows, cols)
+            grid.store(rows, cols, result)
+            after = grid.gather(rows, cols)
+            same = (before.kind == after.kind) & (before.num == after.num) & (before.text == after.text)
+            for row, col, unchanged in zip(rows.tolist(), cols.tolist(), same.tolist()):
+                computed.append((sheet, row, col))
+                if not unchanged:
+                    changed.add((sheet, row, col))
+        return computed
+
+    def value(self, sheet: str, row: int, col: int):
+        grid = self.grids[sheet]
+        return grid.gather(np.array([row]), np.array([col])).values()[0]
+
+    def verify(self, tolerance: float = 1e-9) -> list:
+        """[(sheet, coordinate, cached, computed)] for supported cells that disagree"""
+        mismatches = []
+        for (sheet, row, col), cached in self.cached.items():
+            template = self.analysis.templates[(sheet, self.analysis._cell_template[(sheet, row, col)])]
+            if (sheet, template.template) not in self.compiled:
+                continue
+            computed = self.value(sheet, row, col)
+            if not _same_value(cached, computed, tolerance):
+                mismatches.append((sheet, f"{get_column_letter(col)}{row}", cached, computed))
+        return mismatches
+
+
+def _same_value(cached, computed, tolerance):
+    if cached in (None, "") and computed in (None, ""):
+        return True
+    if isinstance(cached, (int, float)) and isinstance(computed, (int, float)) and not isinstance(cached, bool):
+        return abs(cached - computed) <= tolerance * max(1.0, abs(cached))
+    if isinstance(computed, (int, float)) and isinstance(cached, str):
+        return _parse_number(cached) is not None and abs(_parse_number(cached) - computed) <= tolerance
+    return cached == computed
+
+
+def _apply_edits(evaluator: WorkbookEvaluator, edits: list, default_sheet: str):
+    """Apply "Sheet!A1=value" edits and print every dependent whose value changed"""
+    for edit in edits:
+        reference, _, text = edit.partition("=")
+        sheet, coordinate = split_sheet(reference, default_sheet)
+        number = _parse_number(text)
+        evaluator.set_value(sheet, coordinate, text if number is None else number)
+    started = time.perf_counter()
+    recomputed = evaluator.recalculate_dirty()
+    elapsed = time.perf_counter() - started
+    print(f"✓ {len(recomputed)} dependent cells recomputed in {elapsed * 1e6:.0f} µs")
+    for sheet, row, col in recomputed:
+        cached, computed = evaluator.cached.get((sheet, row, col)), evaluator.value(sheet, row, col)
+        if not _same_value(cached, computed, 1e-9):
+            print(f"  {sheet}!{get_column_letter(col)}{row}: {cached!r} -> {computed!r}")
+
+
+def main():
+    from workbook_session import WorkbookSession
+
+    if len(sys.argv) < 2:
+        print("Usage: python formula_eval.py <workbook.xlsm>")
+        return
+
+    with WorkbookSession(sys.argv[1]) as session:
+        evaluator = session.evaluator
+        if len(sys.argv) > 2:
+            _apply_edits(evaluator, sys.argv[2:], session.sheetnames[0])
+            return
+        computed = evaluator.recalculate()
+        mismatches = evaluator.verify()
+
+        print(f"✓ Templates compiled: {len(evaluator.compiled)} | Unsupported: {len(evaluator.unsupported)}")
+        print(f"✓ Cells recomputed: {computed}")
+        for (sheet, template), reason in sorted(evaluator.unsupported.items()):
+            print(f"  - Skipped {sheet}: {reason}")
+        if mismatches:
+            print(f"✗ {len(mismatches)} cells differ from cached values:")
+            for sheet, coordinate, cached, computed_value in mismatches[:20]:
+                print(f"  {sheet}!{coordinate}: cached={cached!r} computed={computed_value!r}")
+        else:
+            print("✓ All recomputed cells match the cached values")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Structured span tracing for the extractor stages.
+A span wraps one unit of work (zip open, part parse, formula scan, report write)
+and records wall time, CPU time, tracemalloc peak and the bytes the process
+read and wrote meanwhile. Finished spans are written as JSON lines (.jsonl) or,
+for chrome://tracing / Perfetto, as a Chrome trace file (.json). A Tracer with
+no output path records nothing and costs a few attribute lookups per span.
+
+Usage:
+    python extract_skills.py tracker.xlsm --trace skills_trace.jsonl
+    python extract_vba.py tracker.xlsm --trace vba_trace.json
+"""
+
+import ctypes
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+CHROME_SUFFIX = ".json"     # Anything else is written as JSON lines
+
+
+def io_counters():
+    """(bytes read, bytes written) by this process so far, or (None, None) where unavailable"""
+    try:
+        with open("/proc/self/io") as f:
+            counters = dict(line.split(":") for line in f)
+        return int(counters["rchar"]), int(counters["wchar"])
+    except (OSError, KeyError, ValueError):
+        pass
+    if sys.platform == "win32":
+        class IO_COUNTERS(ctypes.Structure):
+            _fields_ = [(name, ctypes.c_ulonglong) for name in (
+                "ReadOperationCount", "WriteOperationCount", "OtherOperationCount",
+                "ReadTransferCount", "WriteTransferCount", "OtherTransferCount")]
+        counters = IO_COUNTERS()
+        kernel32 = ctypes.windll.kernel32
+        if kernel32.GetProcessIoCounters(kernel32.GetCurrentProcess(), ctypes.byref(counters)):
+            return counters.ReadTransferCount, counters.WriteTransferCount
+    return None, None
+
+
+class Span:
+    """One open span; set() adds attributes that are written with it"""
+
+    def __init__(self, name: str, category: str, attrs: dict):
+        self.name = name
+        self.category = category
+        self.attrs = attrs
+        self.max_traced = 0     # Highest tracemalloc peak seen by finished children
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+
+_DISABLED_SPAN = Span("", "", {})
+
+
+class Tracer:
+    """Writes finished spans to path (.jsonl lines or a .json Chrome trace); disabled when path is None"""
+
+    def __init__(self, path=None, memory: bool = True):
+        self.path = Path(path) if path else None
+        self.enabled = self.path is not None
+        self.chrome = self.enabled and self.path.suffix == CHROME_SUFFIX
+        self._events = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._origin = time.perf_counter()
+        self._output = None
+        self._started_tracemalloc = False
+        self.memory = memory
+        if not self.enabled:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if not self.chrome:
+            self._output = open(self.path, "w", encoding="utf-8")
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+    def _stack(self) -> list:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextmanager
+    def span(self, name: str, category: str = "stage", **attrs):
+        """Time the enclosed block; an escaping exception is recorded on the span and re-raised"""
+        if not self.enabled:
+            yield _DISABLED_SPAN
+            return
+
+        stack = self._stack()
+        span = Span(name, category, attrs)
+        traced_start = 0
+        if self.memory:
+            traced_start, traced_peak = tracemalloc.get_traced_memory()
+            if stack:   # The parent keeps its peak so far; the counter restarts for this span
+                stack[-1].max_traced = max(stack[-1].max_traced, traced_peak)
+            tracemalloc.reset_peak()
+        read_start, written_start = io_counters()
+        cpu_start = time.process_time()
+        started = time.perf_counter()
+        stack.append(span)
+        try:
+            yield span
+        except BaseException as e:
+            self._mark_error(span, e)
+            raise
+        finally:
+            wall = time.perf_counter() - started
+            cpu = time.process_time() - cpu_start
+            read_end, written_end = io_counters()
+            stack.pop()
+            event = {
+                "name": name,
+                "category": category,
+                "start_ms": round((started - self._origin) * 1000, 3),
+                "wall_ms": round(wall * 1000, 3),
+                "cpu_ms": round(cpu * 1000, 3),
+                "depth": len(stack),
+                "thread": threading.current_thread().name,
+            }
+            if self.memory:
+                peak = max(span.max_traced, tracemalloc.get_traced_memory()[1])
+                event["tracemalloc_peak_bytes"] = max(peak - traced_start, 0)
+                if stack:
+                    stack[-1].max_traced = max(stack[-1].max_traced, peak)
+            if read_start is not None:
+                event["read_bytes"] = read_end - read_start
+                event["written_bytes"] = written_end - written_start
+            event.update(span.attrs)
+            self._emit(event)
+
+    def add_event(self, name: str, category: str, started: float, seconds: float, **attrs):
+        """Record work timed elsewhere (started is a time.perf_counter() value), e.g. on a writer thread"""
+        if not self.enabled:
+            return
+        self._emit({
+            "name": name,
+            "category": category,
+            "start_ms": round((started - self._origin) * 1000, 3),
+            "wall_ms": round(seconds * 1000, 3),
+            "depth": 0,
+            "thread": threading.current_thread().name,
+            **attrs,
+        })
+
+    def _mark_error(self, span: Span, error: BaseException):
+        span.set(error=f"{type(error).__name__}: {error}",
+                 traceback="".join(traceback.format_exception(type(error), error, error.__traceback__)))
+
+    def record_error(self, error: BaseException):
+        """Attach a handled exception to the innermost open span (for stages that report and carry on)"""
+        if self.enabled and self._stack():
+            self._mark_error(self._stack()[-1], error)
+
+    def annotate(self, **attrs):
+        """Add attributes to the innermost open span"""
+        if self.enabled and self._stack():
+            self._stack()[-1].set(**attrs)
+
+    def _emit(self, event: dict):
+        with self._lock:
+            if self.chrome:
+                self._events.append(event)
+            else:
+                self._output.write(json.dumps(event, default=str) + "\n")
+
+    def close(self):
+        """Write the Chrome trace / close the JSON lines file"""
+        if not self.enabled:
+            return
+        with self._lock:
+            if self.chrome:
+                pid = os.getpid()
+                threads = {name: tid for tid, name in enumerate(dict.fromkeys(e["thread"] for e in self._events))}
+                trace = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+                         for name, tid in threads.items()]
+                trace += [{
+                    "name": event["name"], "cat": event["category"], "ph": "X",
+                    "ts": round(event["start_ms"] * 1000), "dur": round(event["wall_ms"] * 1000),
+                    "pid": pid, "tid": threads[event["thread"]],
+                    "args": {k: v for k, v in event.items() if k not in ("name", "category", "start_ms", "wall_ms", "thread")},
+                } for event in self._events]
+                self.path.write_text(json.dumps({"traceEvents": trace, "displayTimeUnit": "ms"}, default=str))
+            elif self._output is not None:
+                self._output.close()
+                self._output = None
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+        self.enabled = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def traced(name: str, category: str = "stage"):
+    """Method decorator: run the method inside self.tracer.span(name)"""
+    def wrap(method):
+        @functools.wraps(method)
+        def run(self, *args, **kwargs):
+            with self.tracer.span(name, category):
+                return method(self, *args, **kwargs)
+        return run
+    return wrap
+
+
+def trace_from_argv(argv: list):
+    """Split `--trace PATH` off a command line -> (remaining args, Tracer)"""
+    argv = list(argv)
+    if "--trace" not in argv:
+        return argv, Tracer()
+    index = argv.index("--trace")
+    if index + 1 >= len(argv):
+        raise SystemExit("--trace needs an output path (.jsonl or .json)")
+    path = argv[index + 1]
+    del argv[index:index + 2]
+    return argv, Tracer(path)
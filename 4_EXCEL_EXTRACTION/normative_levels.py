@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Precompiled normative-level lookup tables.
+The per-age [min, max] threshold lists in skills.json are compiled once into a
+dense int8 array indexed [skill, age, score] -> level code, so a whole class or
+school is classified with one fancy-indexing call instead of scanning the
+thresholds per student.
+
+Usage:
+    python normative_levels.py skills_levels.npz run 7 3
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+LEVELS = ("beginning", "progressing", "achieving", "excelling")
+UNCLASSIFIED = -1  # Score/age outside every threshold band ("Error" / "Age Not Found" in the tracker)
+
+
+def validate_thresholds(skill: dict) -> list:
+    """Problems with a skill's per-age normativeThresholds (unknown level keys, bad ranges)"""
+    problems = []
+    for age, bands in skill.get("normativeThresholds", {}).items():
+        if not str(age).isdigit():
+            problems.append(f"{skill['id']}: age key {age!r} is not a whole number")
+        for level, band in bands.items():
+            if level not in LEVELS:
+                problems.append(f"{skill['id']} age {age}: unknown level {level!r} (expected one of {', '.join(LEVELS)})")
+            elif band is not None and (len(band) != 2 or band[0] > band[1]):
+                problems.append(f"{skill['id']} age {age}: {level} range {band} is not [min, max]")
+    return problems
+
+
+def is_age_banded(skill: dict) -> bool:
+    """Skills scored as an integer total against per-age [min, max] bands (Vic FMS, routine)"""
+    thresholds = skill.get("normativeThresholds")
+    return isinstance(thresholds, dict) and all(isinstance(v, dict) for v in thresholds.values()) and bool(thresholds)
+
+
+class LevelTables:
+    """Dense [skill, age - min_age, score] -> level code table"""
+
+    def __init__(self, skill_ids, min_age: int, table: np.ndarray):
+        self.skill_ids = list(skill_ids)
+        self.skill_index = {skill_id: i for i, skill_id in enumerate(self.skill_ids)}
+        self.min_age = int(min_age)
+        self.table = table
+
+    @property
+    def max_age(self) -> int:
+        return self.min_age + self.table.shape[1] - 1
+
+    @property
+    def max_score(self) -> int:
+        return self.table.shape[2] - 1
+
+    @classmethod
+    def compile(cls, skills) -> "LevelTables":
+        """Validate and compile every age-banded skill; raises ValueError listing all problems"""
+        banded = [s for s in skills if is_age_banded(s)]
+        problems = [p for s in banded for p in validate_thresholds(s)]
+        if problems:
+            raise ValueError("Invalid normative thresholds:\n  " + "\n  ".join(problems))
+
+        ages = [int(age) for s in banded for age in s["normativeThresholds"]]
+        max_score = max(band[1] for s in banded for bands in s["normativeThresholds"].values()
+                        for band in bands.values() if band is not None)
+        min_age = min(ages)
+        table = np.full((len(banded), max(ages) - min_age + 1, max_score + 1), UNCLASSIFIED, np.int8)
+
+        for i, skill in enumerate(banded):
+            for age, bands in skill["normativeThresholds"].items():
+                row = table[i, int(age) - min_age]
+                # The tracker's cascade: IF(score <= beginning max, ..., IF(<= progressing max, ...,
+                # IF(<= achieving max, ..., IF(score >= excelling min, ..., "Error")))). Filling later
+                # levels first lets the lowest matching level win, and 0 up to the beginning max is beginning.
+                for level in reversed(LEVELS):
+                    band = bands.get(level)
+                    if band is None:
+                        continue
+                    if level == LEVELS[-1]:
+                        row[band[0]:] = LEVELS.index(level)
+                    else:
+                        row[:band[1] + 1] = LEVELS.index(level)
+        return cls([s["id"] for s in banded], min_age, table)
+
+    def classify(self, skill, ages, scores) -> np.ndarray:
+        """Level codes for arrays of (skill id or index, age, score); UNCLASSIFIED when out of range"""
+        if isinstance(skill, str):
+            skill = self.skill_index[skill]
+        skill, ages, scores = np.broadcast_arrays(np.asarray(skill), np.asarray(ages), np.asarray(scores))
+        age_idx = ages.astype(int) - self.min_age
+        score_idx = scores.astype(int)
+        valid = ((age_idx >= 0) & (age_idx < self.table.shape[1]) &
+                 (score_idx >= 0) & (score_idx < self.table.shape[2]) & (scores == score_idx))
+        codes = self.table[skill, np.where(valid, age_idx, 0), np.where(valid, score_idx, 0)]
+        return np.where(valid, codes, UNCLASSIFIED).astype(np.int8)
+
+    def classify_names(self, skill, ages, scores) -> np.ndarray:
+        """Like classify() but returns level names (None for unclassified)"""
+        names = np.array(LEVELS + (None,), dtype=object)
+        return names[self.classify(skill, ages, scores)]
+
+    def save(self, path) -> Path:
+        path = Path(path)
+        np.savez_compressed(path, skill_ids=np.array(self.skill_ids), min_age=self.min_age,
+                            levels=np.array(LEVELS), table=self.table)
+        return path
+
+    @classmethod
+    def load(cls, path) -> "LevelTables":
+        with np.load(path) as data:
+            if tuple(data["levels"]) != LEVELS:
+                raise ValueError(f"{path}: level order {tuple(data['levels'])} does not match {LEVELS}")
+            return cls(data["skill_ids"].tolist(), int(data["min_age"]), data["table"])
+
+
+def main():
+    if len(sys.argv) < 5:
+        print("Usage: python normative_levels.py <skills_levels.npz> <skill_id> <age> <score>")
+        return
+
+    tables = LevelTables.load(sys.argv[1])
+    level = tables.classify_names(sys.argv[2], int(sys.argv[3]), int(sys.argv[4]))
+    print(f"✓ {sys.argv[2]} age {sys.argv[3]} score {sys.argv[4]}: {level or 'unclassified'}")
+
+
+if __name__ == "__main__":
+    main()
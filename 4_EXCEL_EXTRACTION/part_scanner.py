@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+One-pass keyword scanner for zip archive parts.
+All keywords are compiled into a single bytes regex and matched over chunked
+ZipFile.open() streams, so a part is never decoded into one big string and the
+scan of a part stops at its first hit. Parts are scanned concurrently - zlib
+inflation releases the GIL - and the result is (part, keyword, offset) hits
+rather than copies of the XML.
+
+Usage:
+    python part_scanner.py workbook.xlsm
+    python part_scanner.py workbook.xlsm --all --keywords VBA Macro
+"""
+
+import argparse
+import re
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+VBA_KEYWORDS = ("VBA", "Macro", "Module", "Function", "Sub")
+SCAN_CHUNK = 1 << 16
+
+
+class KeywordHit(NamedTuple):
+    part: str
+    keyword: str
+    offset: int     # Byte offset into the decompressed part
+
+
+class KeywordScanner:
+    """Matches every keyword in one pass over a byte stream"""
+
+    def __init__(self, keywords=VBA_KEYWORDS, chunk_size: int = SCAN_CHUNK):
+        encoded = sorted({k.encode() for k in keywords}, key=len, reverse=True)
+        self.pattern = re.compile(b"|".join(re.escape(k) for k in encoded))
+        # A keyword split across two chunks is found by re-scanning this many trailing bytes
+        self.overlap = max(len(k) for k in encoded) - 1
+        self.chunk_size = chunk_size
+
+    def scan(self, src, part: str = "", first_only: bool = True) -> list:
+        """KeywordHits in src (a binary file object); with first_only, stop at the first one"""
+        hits = []
+        tail, base = b"", 0        # base = stream offset of tail[0]
+        while True:
+            chunk = src.read(self.chunk_size)
+            if not chunk:
+                return hits
+            window = tail + chunk
+            # Matches that end inside the carried-over tail were already reported
+            for match in self.pattern.finditer(window):
+                if match.end() <= len(tail):
+                    continue
+                hits.append(KeywordHit(part, match.group().decode(), base + match.start()))
+                if first_only:
+                    return hits
+            keep = min(self.overlap, len(window))
+            base += len(window) - keep
+            tail = window[len(window) - keep:] if keep else b""
+
+    def scan_part(self, archive: zipfile.ZipFile, part: str, first_only: bool = True) -> list:
+        with archive.open(part) as src:
+            return self.scan(src, part, first_only)
+
+    def scan_archive(self, archive: zipfile.ZipFile, parts, first_only: bool = True, workers: int = None) -> dict:
+        """{part: [KeywordHit, ...]} for every part, scanned concurrently (parts without hits map to [])"""
+        parts = list(parts)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(lambda part: self.scan_part(archive, part, first_only), parts)
+            return dict(zip(parts, results))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find keyword hits in the XML parts of an .xlsx/.xlsm archive")
+    parser.add_argument("workbook")
+    parser.add_argument("--keywords", nargs="+", default=list(VBA_KEYWORDS))
+    parser.add_argument("--all", action="store_true", help="Report every hit, not just the first per part")
+    args = parser.parse_args()
+
+    scanner = KeywordScanner(args.keywords)
+    with zipfile.ZipFile(args.workbook) as archive:
+        parts = [name for name in archive.namelist() if name.endswith(".xml")]
+        found = scanner.scan_archive(archive, parts, first_only=not args.all)
+
+    for part, hits in found.items():
+        for hit in hits:
+            print(f"  {part} @ {hit.offset}: {hit.keyword}")
+    print(f"✓ {sum(1 for hits in found.values() if hits)} of {len(found)} parts matched")
+
+
+if __name__ == "__main__":
+    main()
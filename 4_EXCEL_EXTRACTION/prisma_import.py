@@ -0,0 +1,508 @@
+#!/usr/bin/env python3
+"""
+Bulk import of legacy Tracker 2.0 workbooks into the Prisma schema.
+Student rows are streamed out of each tracker (Class List + every component-scored
+skill sheet) and mapped to classes, students, student_classes and assessment_records
+(elementScores as JSON); normative_scores come from skills.json. Rows are written in
+batches as PostgreSQL COPY text files plus a load.sql that stages and inserts them in
+one transaction, or loaded over a single connection - PostgreSQL (psycopg, COPY) or a
+SQLite stand-in. Ids are uuid5 of each row's natural key, so a re-import inserts nothing twice.
+
+With --index, every student row and assessment block (skill sheet) is hashed while it
+streams and compared with the hash index of the previous import: only inserted,
+changed and deleted rows are staged, and a sheet whose zip part is byte-for-byte
+unchanged is not parsed at all. Each workbook's delta is logged as an `imports` row.
+
+The trackers hold an age, not a birth date: date_of_birth is estimated as 1 January
+of (--year - age). Students are matched across trackers by name within a school,
+the same rule the tracker's own "Import Previous Year" uses.
+
+Usage:
+    python prisma_import.py "C:/Trackers" --school-id S --user-id U --period-id P --year 2025 -o import_copy
+    cd import_copy && psql "$DATABASE_URL" -f load.sql
+    python prisma_import.py "C:/Trackers" ... --database sqlite:///stand_in.db --index stand_in.index.json
+    python prisma_import.py "C:/Trackers" --school-id S --user-id U --period-id P --database sqlite:///stand_in.db
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import NamedTuple
+
+try:
+    import psycopg
+except ImportError:  # Only needed to load straight into PostgreSQL
+    psycopg = None
+
+from batch_extract import find_workbooks
+from extraction_cache import fingerprint
+from school_aggregates import HEADER_ROWS, STOP_LABELS, student_rows
+from skills_format import SkillCatalog
+from xlsx_stream import StreamingWorkbook
+
+ID_NAMESPACE = uuid.UUID("6f1c2d8e-4b7a-5c39-9e02-7d5a1b3c4e60")
+DEFAULT_SKILLS = Path(__file__).resolve().parent.parent / "2_DATA_DEFINITIONS" / "skills.json"
+CLASS_LIST_SHEET = "Class List"
+SHEET_SKILLS = {"gymnastics": "routine"}    # Sheets whose name differs from their skill's
+GENDERS = {"m": "MALE", "male": "MALE", "b": "MALE", "f": "FEMALE", "female": "FEMALE", "g": "FEMALE"}
+BATCH_ROWS = 5000                           # Rows buffered per table before a COPY / executemany
+INDEX_VERSION = 1
+UNHASHED_COLUMNS = {"created_at", "updated_at"}             # Row hashes ignore audit timestamps
+DELETABLE = ("assessment_records", "student_classes")       # Students and classes are kept for history
+ROSTER_BLOCK = "roster"
+
+# Staging column types -> PostgreSQL / SQLite column types
+PG_TYPES = {"text": "text", "int": "integer", "bool": "boolean", "timestamp": "timestamp(3)",
+            "json": "jsonb", "decimal": "numeric(10,2)", "gender": '"Gender"'}
+SQLITE_TYPES = {"text": "TEXT", "int": "INTEGER", "bool": "INTEGER", "timestamp": "TEXT",
+                "json": "TEXT", "decimal": "NUMERIC", "gender": "TEXT"}
+
+
+class Table(NamedTuple):
+    """One Prisma table (@@map name) as staged by the importer"""
+    name: str
+    columns: tuple          # (column, staging type); assessment_name/assessment_framework resolve to assessment_id
+    conflict: str           # Unique key the final insert skips duplicates on
+
+    @property
+    def names(self) -> list:
+        return [column for column, _ in self.columns]
+
+    @property
+    def resolves_assessment(self) -> bool:
+        return "assessment_name" in self.names
+
+    def target_columns(self) -> list:
+        return ["assessment_id" if column == "assessment_name" else column
+                for column in self.names if column != "assessment_framework"]
+
+    def insert_sql(self) -> str:
+        """INSERT ... SELECT from the staging table (joined to assessments where needed).
+        Rows keyed by id are upserted so changed rows replace their previous version."""
+        select = ["a.id" if column == "assessment_name" else f"s.{column}"
+                  for column in self.names if column != "assessment_framework"]
+        join = (" JOIN assessments a ON a.name = s.assessment_name AND a.framework = s.assessment_framework"
+                if self.resolves_assessment else "")
+        action = "DO NOTHING"
+        if self.conflict == "id":
+            updates = [c for c in self.target_columns() if c not in ("id", "created_at", "created_by")]
+            action = "DO UPDATE SET " + ", ".join(f"{column} = EXCLUDED.{column}" for column in updates)
+        return (f"INSERT INTO {self.name} ({', '.join(self.target_columns())}) "
+                f"SELECT {', '.join(select)} FROM stage_{self.name} s{join} "
+                f"WHERE true ON CONFLICT ({self.conflict}) {action}")
+
+
+TABLES = (
+    Table("assessments", (("id", "text"), ("name", "text"), ("description", "text"), ("framework", "text"),
+                          ("active", "bool"), ("version", "int"), ("created_at", "timestamp"),
+                          ("updated_at", "timestamp")), "name, framework"),
+    Table("classes", (("id", "text"), ("school_id", "text"), ("year_level", "text"), ("teacher_id", "text"),
+                      ("name", "text"), ("term", "text"), ("year", "int"), ("created_at", "timestamp"),
+                      ("updated_at", "timestamp")), "id"),
+    Table("students", (("id", "text"), ("school_id", "text"), ("name", "text"), ("date_of_birth", "timestamp"),
+                       ("gender", "gender"), ("year_level", "text"), ("created_at", "timestamp"),
+                       ("updated_at", "timestamp")), "id"),
+    Table("student_classes", (("id", "text"), ("student_id", "text"), ("class_id", "text"),
+                              ("created_at", "timestamp")), "student_id, class_id"),
+    Table("assessment_records", (("id", "text"), ("student_id", "text"), ("class_id", "text"),
+                                 ("assessment_name", "text"), ("assessment_framework", "text"),
+                                 ("assessment_period_id", "text"), ("element_scores", "json"),
+                                 ("total_score", "decimal"), ("normative_level", "text"), ("created_by", "text"),
+                                 ("created_at", "timestamp"), ("updated_by", "text"),
+                                 ("updated_at", "timestamp")), "id"),
+    Table("normative_scores", (("id", "text"), ("assessment_name", "text"), ("assessment_framework", "text"),
+                               ("year_level", "text"), ("age_years", "int"), ("gender", "gender"),
+                               ("beginning_threshold", "json"), ("progressing_threshold", "json"),
+                               ("achieving_threshold", "json"), ("excelling_threshold", "json")), "id"),
+    Table("imports", (("id", "text"), ("school_id", "text"), ("import_date", "timestamp"), ("file_name", "text"),
+                      ("record_count", "int"), ("status", "text"), ("created_by", "text")), "id"),
+)
+DELETIONS = Table("deletions", (("table_name", "text"), ("id", "text")), "")   # Staged only
+STAGED = TABLES + (DELETIONS,)
+TABLES_BY_NAME = {table.name: table for table in STAGED}
+
+
+def load_statements() -> list:
+    """Statements that move the staged rows into the real tables (deletes first)"""
+    deletes = [f"DELETE FROM {name} WHERE id IN (SELECT id FROM stage_deletions WHERE table_name = '{name}')"
+               for name in DELETABLE]
+    return deletes + [table.insert_sql() for table in TABLES]
+
+
+def row_id(*key) -> str:
+    """Stable id for a natural key"""
+    return str(uuid.uuid5(ID_NAMESPACE, "|".join(str(part) for part in key)))
+
+
+def row_hash(table: Table, row: tuple) -> str:
+    """Digest of a row's content (audit timestamps excluded)"""
+    content = [value for (column, _), value in zip(table.columns, row) if column not in UNHASHED_COLUMNS]
+    return hashlib.blake2b(json.dumps(content, default=str, sort_keys=True).encode(), digest_size=10).hexdigest()
+
+
+def skill_key(name: str) -> str:
+    """Sheet or skill name -> matching key ("Two-handed strike" and "Two-Handed Strike" agree)"""
+    return " ".join(name.lower().replace("-", " ").split("(")[0].split())
+
+
+def copy_text(value, column_type: str) -> str:
+    """One value in PostgreSQL COPY text format"""
+    if value is None:
+        return r"\N"
+    if column_type == "bool":
+        return "t" if value else "f"
+    if column_type == "json":
+        value = json.dumps(value)
+    elif isinstance(value, datetime):
+        value = value.isoformat(sep=" ", timespec="milliseconds")
+    return (str(value).replace("\\", "\\\\").replace("\t", "\\t")
+            .replace("\n", "\\n").replace("\r", "\\r"))
+
+
+def sqlite_value(value, column_type: str):
+    if value is None:
+        return None
+    if column_type == "json":
+        return json.dumps(value)
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ", timespec="milliseconds")
+    return int(value) if column_type == "bool" else value
+
+
+class CopyFileSink:
+    """Appends rows to <table>.copy files and writes load.sql for psql"""
+
+    def __init__(self, output_dir: Path):
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.files = {table.name: open(self.output_dir / f"{table.name}.copy", "w", encoding="utf-8", newline="\n")
+                      for table in STAGED}
+
+    def write(self, table: Table, rows: list):
+        types = [column_type for _, column_type in table.columns]
+        self.files[table.name].writelines(
+            "\t".join(copy_text(value, column_type) for value, column_type in zip(row, types)) + "\n"
+            for row in rows)
+
+    def finish(self) -> Path:
+        for f in self.files.values():
+            f.close()
+        lines = ["\\set ON_ERROR_STOP on", "BEGIN;"]
+        for table in STAGED:
+            columns = ", ".join(f"{column} {PG_TYPES[column_type]}" for column, column_type in table.columns)
+            lines.append(f"CREATE TEMP TABLE stage_{table.name} ({columns}) ON COMMIT DROP;")
+            lines.append(f"\\copy stage_{table.name} ({', '.join(table.names)}) FROM '{table.name}.copy'")
+        lines.extend(statement + ";" for statement in load_statements())
+        lines.append("COMMIT;")
+        load_file = self.output_dir / "load.sql"
+        load_file.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        return load_file
+
+
+class DatabaseSink:
+    """Stages rows over one connection (PostgreSQL COPY or SQLite executemany), then inserts in one transaction"""
+
+    def __init__(self, url: str):
+        self.sqlite = url.startswith("sqlite:///")
+        if self.sqlite:
+            self.connection = sqlite3.connect(url[len("sqlite:///"):])
+            self._create_stand_in()
+        else:
+            if psycopg is None:
+                raise SystemExit("psycopg is not installed - pip install psycopg, or write COPY files with -o")
+            self.connection = psycopg.connect(url)
+        types = SQLITE_TYPES if self.sqlite else PG_TYPES
+        cursor = self.connection.cursor()
+        for table in STAGED:
+            columns = ", ".join(f"{column} {types[column_type]}" for column, column_type in table.columns)
+            cursor.execute(f"CREATE TEMP TABLE stage_{table.name} ({columns})")
+
+    def _create_stand_in(self):
+        """The imported tables with their keys, for testing without PostgreSQL"""
+        for table in TABLES:
+            columns = ", ".join(f"{column} {SQLITE_TYPES[column_type]}" for column, column_type
+                                in zip(table.target_columns(), self._target_types(table)))
+            unique = f", UNIQUE ({table.conflict})" if table.conflict != "id" else ""
+            self.connection.execute(f"CREATE TABLE IF NOT EXISTS {table.name} ({columns}, PRIMARY KEY (id){unique})")
+
+    @staticmethod
+    def _target_types(table: Table) -> list:
+        return [column_type for column, column_type in table.columns if column != "assessment_framework"]
+
+    def write(self, table: Table, rows: list):
+        cursor = self.connection.cursor()
+        types = [column_type for _, column_type in table.columns]
+        if self.sqlite:
+            placeholders = ", ".join("?" * len(types))
+            cursor.executemany(f"INSERT INTO stage_{table.name} VALUES ({placeholders})",
+                               [[sqlite_value(v, t) for v, t in zip(row, types)] for row in rows])
+            return
+        with cursor.copy(f"COPY stage_{table.name} ({', '.join(table.names)}) FROM STDIN") as copy:
+            copy.write("".join("\t".join(copy_text(v, t) for v, t in zip(row, types)) + "\n" for row in rows))
+
+    def finish(self):
+        cursor = self.connection.cursor()
+        for statement in load_statements():
+            cursor.execute(statement)
+        self.connection.commit()
+        self.connection.close()
+
+
+class ImportIndex:
+    """Row hashes of the last import, per workbook (class) and block: the roster or one skill sheet"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.workbooks = {}     # class id -> {"period", "file", "blocks": {block: {"sources", "year", "rows"}}}
+        if self.path.exists():
+            try:
+                saved = json.loads(self.path.read_text())
+                if saved.get("version") == INDEX_VERSION:
+                    self.workbooks = saved.get("workbooks", {})
+            except (ValueError, OSError):
+                self.workbooks = {}
+
+    def blocks(self, class_id: str, period_id: str) -> dict:
+        """Blocks from the previous import of this class into the same period"""
+        entry = self.workbooks.get(class_id)
+        return entry["blocks"] if entry and entry.get("period") == period_id else {}
+
+    def save(self):
+        temp = self.path.with_name(self.path.name + ".tmp")
+        temp.write_text(json.dumps({"version": INDEX_VERSION, "workbooks": self.workbooks}))
+        os.replace(temp, self.path)
+
+
+class TrackerImporter:
+    """Maps trackers to Prisma rows and hands them to a sink in BATCH_ROWS batches.
+    With an ImportIndex only rows whose hash changed since the last import are staged."""
+
+    def __init__(self, sink, catalog: SkillCatalog, school_id: str, user_id: str, period_id: str,
+                 year: int, teacher_id: str = None, index: ImportIndex = None):
+        self.sink = sink
+        self.catalog = catalog
+        self.school_id = school_id
+        self.user_id = user_id
+        self.teacher_id = teacher_id or user_id
+        self.period_id = period_id
+        self.year = year
+        self.index = index
+        self.now = datetime.now()
+        self.pending = {table.name: [] for table in STAGED}
+        self.counts = {table.name: 0 for table in STAGED}
+        self.delta = Counter()  # (table, "inserted" | "changed" | "deleted" | "unchanged") -> rows
+        self._block = None      # {row id: [table, hash]} of the block being streamed
+        self._previous = {}     # row id -> hash at the last import of the current workbook
+        self.skills = {skill_key(skill["name"]): skill for skill in catalog}   # Sheet name -> skill
+        for sheet, skill_id in SHEET_SKILLS.items():
+            self.skills[sheet] = catalog[skill_id]
+        self.students = set()
+        for skill in catalog:
+            self._add("assessments", (row_id("assessment", skill["name"], skill["category"]), skill["name"],
+                                      f"{skill['name']} assessment from {skill['category']} framework",
+                                      skill["category"], True, 1, self.now, self.now))
+
+    def _add(self, table_name: str, row: tuple):
+        """Stage a row - inside a workbook block only if it is new or its hash changed"""
+        if self._block is not None:
+            digest = row_hash(TABLES_BY_NAME[table_name], row)
+            self._block[row[0]] = [table_name, digest]
+            previous = self._previous.get(row[0])
+            if previous == digest:
+                self.delta[(table_name, "unchanged")] += 1
+                return
+            self.delta[(table_name, "inserted" if previous is None else "changed")] += 1
+        pending = self.pending[table_name]
+        pending.append(row)
+        if len(pending) >= BATCH_ROWS:
+            self._flush(table_name)
+
+    def _flush(self, table_name: str):
+        if self.pending[table_name]:
+            self.sink.write(TABLES_BY_NAME[table_name], self.pending[table_name])
+            self.counts[table_name] += len(self.pending[table_name])
+            self.pending[table_name] = []
+
+    def _open_block(self, blocks: dict, name: str, sources=None) -> dict:
+        block = blocks[name] = {"sources": sources, "year": None, "rows": {}}
+        self._block = block["rows"]
+        return block
+
+    def add_normative_scores(self):
+        """normative_scores rows for every skill, as prisma/seed.ts derives them"""
+        for skill in self.catalog:
+            name, framework = skill["name"], skill["category"]
+            for age, thresholds in (skill.get("normativeThresholds") or {}).items():
+                self._add("normative_scores", (
+                    row_id("norm", name, framework, age, None), name, framework, f"Year {age}", int(age), None,
+                    thresholds.get("beginning"), thresholds.get("progressing"),
+                    thresholds.get("achieving"), thresholds.get("excelling")))
+            for group, variants in (skill.get("ageGroups") or {}).items():
+                for variant, gender in (("girls", "FEMALE"), ("boys", "MALE")):
+                    thresholds = variants.get(variant, {}).get("normativeThresholds")
+                    if thresholds:
+                        self._add("normative_scores", (
+                            row_id("norm", name, framework, group, gender), name, framework,
+                            variants.get("label", group), int(group.split("-")[0]), gender,
+                            thresholds.get("beginning"), thresholds.get("progressing"),
+                            thresholds.get("achieving"), thresholds.get("excelling")))
+
+    def add_workbook(self, path: Path) -> Counter:
+        """Stream one tracker into rows -> {"inserted" | "changed" | "deleted" | "unchanged": assessment records}"""
+        before = self.delta.copy()
+        with StreamingWorkbook(str(path)) as workbook:
+            tracker = f"{path.parent.name}/{path.stem}"     # Same-named trackers in different class folders stay apart
+            class_id = row_id("class", self.school_id, tracker, self.year)
+            roster = self._roster(workbook) if CLASS_LIST_SHEET in workbook.sheetnames else []
+            if not roster:     # Not a class tracker (e.g. the whole-school workbook)
+                return Counter()
+            previous_blocks = self.index.blocks(class_id, self.period_id) if self.index else {}
+            self._previous = {key: digest for block in previous_blocks.values()
+                              for key, (_, digest) in block["rows"].items()}
+            blocks = {}
+            student_ids = {}    # (name, occurrence) -> student id
+            for name, occurrence, gender, age in roster:
+                student_ids[(name, occurrence)] = row_id("student", self.school_id, name, occurrence)
+
+            for sheet_name in workbook.sheetnames:
+                skill = self.skills.get(skill_key(sheet_name))
+                if skill is None:
+                    continue
+                sources = fingerprint(workbook.archive, workbook.sheet_source_parts(sheet_name))
+                old = previous_blocks.get(sheet_name)
+                if old is not None and old["sources"] == sources:
+                    blocks[sheet_name] = old    # Part unchanged: its rows are too, no need to parse it
+                    self.delta.update((table_name, "unchanged") for table_name, _ in old["rows"].values())
+                    continue
+                block = self._open_block(blocks, sheet_name, sources)
+                seen = {}
+                for layout, year, values in student_rows(workbook, sheet_name):
+                    block["year"] = block["year"] or year
+                    name = values[1].strip()
+                    seen[name] = seen.get(name, 0) + 1
+                    student_id = student_ids.get((name, seen[name]))
+                    scores = {component: values.get(column) for column, component in layout.components.items()
+                              if isinstance(values.get(column), (int, float)) and not isinstance(values.get(column), bool)}
+                    if student_id is None or not scores:
+                        continue
+                    norm = values.get(layout.norm_column)
+                    self._add("assessment_records", (
+                        row_id("record", student_id, class_id, self.period_id, skill["id"]), student_id, class_id,
+                        skill["name"], skill["category"], self.period_id, scores, sum(scores.values()),
+                        norm.strip() if isinstance(norm, str) and norm.strip() else None,
+                        self.user_id, self.now, self.user_id, self.now))
+
+            year_level = next((block["year"] for block in blocks.values() if block["year"]), "Unknown")
+            self._open_block(blocks, ROSTER_BLOCK)
+            self._add("classes", (class_id, self.school_id, year_level, self.teacher_id, path.stem, None,
+                                  self.year, self.now, self.now))
+            for name, occurrence, gender, age in roster:
+                student_id = student_ids[(name, occurrence)]
+                if student_id not in self.students:
+                    self.students.add(student_id)
+                    birth = datetime(self.year - int(age), 1, 1) if isinstance(age, (int, float)) else datetime(self.year, 1, 1)
+                    self._add("students", (student_id, self.school_id, name, birth, gender, year_level,
+                                           self.now, self.now))
+                self._add("student_classes", (row_id("enrolment", student_id, class_id), student_id, class_id,
+                                              self.now))
+            self._block = None
+
+            current = {key for block in blocks.values() for key in block["rows"]}
+            for block in previous_blocks.values():
+                for key, (table_name, _) in block["rows"].items():
+                    if key not in current and table_name in DELETABLE:
+                        self._add("deletions", (table_name, key))
+                        self.delta[(table_name, "deleted")] += 1
+
+        records = Counter({kind: count - before[(table_name, kind)]
+                           for (table_name, kind), count in self.delta.items() if table_name == "assessment_records"})
+        self._add("imports", (row_id("import", class_id, tracker, self.now.isoformat()), self.school_id, self.now, path.name,
+                              records["inserted"] + records["changed"] + records["deleted"], "completed", self.user_id))
+        if self.index is not None:
+            self.index.workbooks[class_id] = {"period": self.period_id, "file": path.name, "blocks": blocks}
+        return records
+
+    def _roster(self, workbook: StreamingWorkbook) -> list:
+        """[(name, occurrence, gender, age)] from the Class List sheet's Name/Gender/Age columns"""
+        columns = None
+        roster, seen = [], {}
+        for cells in workbook.open_sheet(CLASS_LIST_SHEET).rows():
+            values = {c.column: c.value for c in cells}
+            if columns is None:
+                labels = {str(v).strip().lower(): c for c, v in values.items() if isinstance(v, str)}
+                if "name" in labels and "age" in labels:
+                    columns = labels
+                elif cells[0].row > HEADER_ROWS:
+                    return []
+                continue
+            name = values.get(columns["name"])
+            if not isinstance(name, str) or not name.strip():
+                continue
+            if name.strip().lower() in STOP_LABELS:
+                break
+            name = name.strip()
+            seen[name] = seen.get(name, 0) + 1
+            gender = values.get(columns.get("gender"))
+            gender = GENDERS.get(gender.strip().lower(), "OTHER") if isinstance(gender, str) else "OTHER"
+            roster.append((name, seen[name], gender, values.get(columns["age"])))
+        return roster
+
+    def finish(self):
+        """Load everything staged; the hash index is saved only once the rows are written"""
+        for table in STAGED:
+            self._flush(table.name)
+        result = self.sink.finish()
+        if self.index is not None:
+            self.index.save()
+        return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import Tracker 2.0 workbooks into the Prisma tables")
+    parser.add_argument("source", help="Directory of trackers or a glob pattern")
+    parser.add_argument("--school-id", required=True, help="schools.id the trackers belong to")
+    parser.add_argument("--user-id", required=True, help="users.id recorded as creator (and teacher by default)")
+    parser.add_argument("--teacher-id", help="users.id of the classes' teacher (default: --user-id)")
+    parser.add_argument("--period-id", required=True, help="assessment_periods.id for the imported records")
+    parser.add_argument("--year", type=int, default=datetime.now().year, help="School year of the trackers")
+    parser.add_argument("--skills", default=str(DEFAULT_SKILLS), help="skills.json (or compact variant)")
+    parser.add_argument("--normative", action="store_true", help="Also import normative_scores from skills.json")
+    parser.add_argument("--index", help="Hash index of the previous import: only inserted/changed/deleted rows are loaded")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("-o", "--output", default="prisma_import", help="Folder for COPY files + load.sql")
+    target.add_argument("--database", help="postgresql://... or sqlite:///file.db to load directly")
+    args = parser.parse_args()
+
+    workbooks = find_workbooks(args.source)
+    if not workbooks:
+        print(f"✗ No workbooks found for: {args.source}")
+        return
+
+    started = time.perf_counter()
+    sink = DatabaseSink(args.database) if args.database else CopyFileSink(Path(args.output))
+    importer = TrackerImporter(sink, SkillCatalog.load(args.skills), args.school_id, args.user_id,
+                               args.period_id, args.year, args.teacher_id, ImportIndex(args.index) if args.index else None)
+    if args.normative:
+        importer.add_normative_scores()
+    for path in workbooks:
+        records = importer.add_workbook(path)
+        print(f"  - {path.parent.name}/{path.name}: {records['inserted']} inserted, {records['changed']} changed, "
+              f"{records['deleted']} deleted, {records['unchanged']} unchanged assessment records")
+    load_file = importer.finish()
+
+    for table, count in importer.counts.items():
+        print(f"✓ {table}: {count} rows staged")
+    if load_file:
+        print(f"✓ Saved: {load_file} (run with psql from that folder)")
+    print(f"✓ {len(workbooks)} workbooks in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Spatial index over a sheet's merged cells, conditional formatting and data validations.
+Every range of every sqref becomes a box in a static packed R-tree (sort-tile-
+recursive bulk load, NODE_SIZE children per node, one numpy array of boxes per
+level), so "what applies to this cell" or "what touches this block" descends a
+few levels instead of testing every range. The ranges are read straight from the
+worksheet part without parsing its cells.
+
+Usage:
+    python range_index.py tracker.xlsm Run B5
+    python range_index.py tracker.xlsm Run A1:I10
+"""
+
+import sys
+from typing import Any, NamedTuple
+
+import numpy as np
+from openpyxl.utils import range_boundaries
+from openpyxl.utils.cell import coordinate_to_tuple
+from openpyxl.xml.constants import SHEET_MAIN_NS
+
+from xlsx_stream import StreamingWorkbook, scan_elements
+
+NODE_SIZE = 16
+MAX_ROW, MAX_COLUMN = 1048576, 16384    # Bounds of whole-column ("A:A") and whole-row ("1:1") refs
+MERGE, CONDITIONAL_FORMAT, VALIDATION = "merge", "conditional format", "validation"
+
+MERGE_CELL_TAG = f"{{{SHEET_MAIN_NS}}}mergeCell"
+CF_RULE_TAG = f"{{{SHEET_MAIN_NS}}}cfRule"
+CF_FORMULA_TAG = f"{{{SHEET_MAIN_NS}}}formula"
+
+
+class RangeEntry(NamedTuple):
+    """One indexed item: a merge (detail None), CF block ([(type, [formula, ...])]) or DataValidation"""
+    kind: str
+    sqref: str
+    detail: Any
+
+
+def ref_box(ref: str) -> tuple:
+    """(min_col, min_row, max_col, max_row) of an A1 cell or range, whole rows/columns included"""
+    min_col, min_row, max_col, max_row = range_boundaries(ref.replace("$", ""))
+    return (min_col or 1, min_row or 1,
+            max_col or (MAX_COLUMN if min_col is None else min_col),
+            max_row or (MAX_ROW if min_row is None else min_row))
+
+
+def _str_order(boxes: np.ndarray) -> np.ndarray:
+    """Sort-tile-recursive leaf order: vertical slabs by column centre, each sorted by row centre"""
+    count = len(boxes)
+    slabs = int(np.ceil(np.sqrt(np.ceil(count / NODE_SIZE))))
+    per_slab = slabs * NODE_SIZE
+    by_column = np.argsort(boxes[:, 0] + boxes[:, 2], kind="stable")
+    row_centres = boxes[:, 1] + boxes[:, 3]
+    return np.concatenate([slab[np.argsort(row_centres[slab], kind="stable")]
+                           for slab in np.split(by_column, range(per_slab, count, per_slab))])
+
+
+class RangeIndex:
+    """Static R-tree of RangeEntry boxes with point and rectangle queries"""
+
+    def __init__(self, entries: list):
+        self.entries = list(entries)
+        boxes, owners = [], []
+        for i, entry in enumerate(self.entries):
+            for ref in entry.sqref.split():
+                boxes.append(ref_box(ref))
+                owners.append(i)
+        boxes = np.array(boxes, np.int32).reshape(-1, 4)
+        order = _str_order(boxes) if len(boxes) else np.zeros(0, np.intp)
+        self.owners = np.array(owners, np.intp)[order]
+        self.levels = [boxes[order]]     # Leaves first; node i of a level covers children i*NODE_SIZE...
+        while len(self.levels[-1]) > NODE_SIZE:
+            below = self.levels[-1]
+            starts = np.arange(0, len(below), NODE_SIZE)
+            self.levels.append(np.column_stack([np.minimum.reduceat(below[:, :2], starts),
+                                                np.maximum.reduceat(below[:, 2:], starts)]))
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _search(self, min_col: int, min_row: int, max_col: int, max_row: int) -> list:
+        candidates = np.arange(len(self.levels[-1]))
+        for depth in range(len(self.levels) - 1, -1, -1):
+            boxes = self.levels[depth][candidates]
+            hit = ((boxes[:, 0] <= max_col) & (boxes[:, 2] >= min_col)
+                   & (boxes[:, 1] <= max_row) & (boxes[:, 3] >= min_row))
+            candidates = candidates[hit]
+            if depth:
+                children = (candidates[:, None] * NODE_SIZE + np.arange(NODE_SIZE)).ravel()
+                candidates = children[children < len(self.levels[depth - 1])]
+        return [self.entries[i] for i in np.unique(self.owners[candidates]).tolist()]
+
+    def at(self, coordinate) -> list:
+        """Entries covering one cell ("B5" or (row, column)), in document order"""
+        row, column = coordinate_to_tuple(coordinate) if isinstance(coordinate, str) else coordinate
+        return self._search(column, row, column, row)
+
+    def overlapping(self, ref: str) -> list:
+        """Entries touching any cell of an A1 range, in document order"""
+        return self._search(*ref_box(ref))
+
+    @classmethod
+    def from_sheet(cls, workbook: StreamingWorkbook, sheet_name: str) -> "RangeIndex":
+        """Index the merges, conditional formats and validations of one sheet"""
+        entries = []
+        with workbook.archive.open(workbook.sheet_part(sheet_name)) as src:
+            for name, element in scan_elements(src, ("mergeCells", "conditionalFormatting")):
+                if name == "mergeCells":
+                    entries.extend(RangeEntry(MERGE, merge.get("ref"), None) for merge in element.iter(MERGE_CELL_TAG))
+                else:
+                    rules = [(rule.get("type"), [f.text for f in rule.iter(CF_FORMULA_TAG) if f.text])
+                             for rule in element.iter(CF_RULE_TAG)]
+                    entries.append(RangeEntry(CONDITIONAL_FORMAT, element.get("sqref", ""), rules))
+        entries.extend(RangeEntry(VALIDATION, " ".join(rule.sqref), rule)
+                       for rule in workbook.data_validations(sheet_name))
+        return cls(entries)
+
+
+def main():
+    if len(sys.argv) < 4:
+        print("Usage: python range_index.py <workbook.xlsm> <sheet> <cell | range>")
+        return
+
+    workbook_path, sheet_name, ref = sys.argv[1:4]
+    with StreamingWorkbook(workbook_path) as workbook:
+        index = RangeIndex.from_sheet(workbook, sheet_name)
+    found = index.overlapping(ref) if ":" in ref else index.at(ref)
+    print(f"✓ {sheet_name}: {len(index)} ranges indexed, {len(found)} apply to {ref}")
+    for entry in found:
+        detail = "" if entry.detail is None else f" - {entry.detail.type}" if entry.kind == VALIDATION else f" - {entry.detail}"
+        print(f"  - {entry.kind} `{entry.sqref}`{detail}")
+
+
+if __name__ == "__main__":
+    main()
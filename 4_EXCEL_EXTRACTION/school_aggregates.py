@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Whole-school roll-up over many class trackers.
+Student rows are streamed from every component-scored skill sheet of each
+Tracker 2.0 workbook into a SchoolAggregate: normative level counts per
+school x year level x skill x level, and component pass counts. Aggregates are
+plain counters, so they merge associatively - each worker reduces its own
+share of workbooks and the parent merges the partials. Each workbook's partial
+is cached with the CRCs of its parts, so a re-run only re-reads changed trackers.
+
+Usage:
+    python school_aggregates.py "C:/Trackers" --workers 8 -o whole_school
+    python school_aggregates.py "C:/Trackers/*/Tracker*.xlsm" --school "Example PS"
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import time
+import zipfile
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from batch_extract import find_workbooks
+from normative_levels import LEVELS
+from xlsx_stream import StreamingWorkbook
+
+LEVEL_NAMES = {level.title(): level for level in LEVELS}
+UNCLASSIFIED = "unclassified"
+HEADER_ROWS = 4                         # Skill sheet headers; student rows start at row 5
+STOP_LABELS = {"totals", "normative scores"}
+YEAR_LABEL = "class/year level:"
+RUBRIC_DEMONSTRATED = 4                 # Rubric components pass at "Demonstrated" (binary ones at 1)
+PARTIAL_VERSION = 1
+
+
+class SkillLayout:
+    """Where a component-scored skill sheet keeps its components, age and norm columns"""
+
+    def __init__(self, components: dict, age_column: int, norm_column: int, pass_mark: int):
+        self.components = components    # column -> component header
+        self.age_column = age_column
+        self.norm_column = norm_column
+        self.pass_mark = pass_mark
+
+    @classmethod
+    def detect(cls, header_rows: dict):
+        """Layout from {row: {column: value}} of the first rows, or None for other sheet types"""
+        for row, values in sorted(header_rows.items()):
+            norm = next((c for c, v in values.items() if isinstance(v, str) and v.strip() == "Norm"), None)
+            if norm is None:
+                continue
+            # "Age" can sit one row below the other headers (Gymnastics)
+            labels = [(c, v.strip().lower()) for r in (row, row + 1)
+                      for c, v in header_rows.get(r, {}).items() if isinstance(v, str)]
+            age = next((c for c, v in labels if v == "age"), None)
+            score = next((v for c, v in labels if v.startswith("score /") or v.startswith("score/")), None)
+            if age is None or score is None:
+                return None
+            score_column = next(c for c, v in labels if v == score)
+            components = {c: str(v).strip() for c, v in values.items()
+                          if 1 < c < min(age, score_column) and v not in (None, "")}
+            try:
+                out_of = int(score.split("/")[1])
+            except ValueError:
+                out_of = len(components)
+            return cls(components, age, norm, 1 if out_of == len(components) else RUBRIC_DEMONSTRATED)
+        return None
+
+
+def year_label(header_rows: dict):
+    """Value typed next to the sheet's "Class/Year level:" label, or None"""
+    for values in header_rows.values():
+        for column, value in sorted(values.items()):
+            if isinstance(value, str) and value.strip().lower() == YEAR_LABEL:
+                filled = [v for c, v in sorted(values.items()) if c > column and v not in (None, "")]
+                return str(filled[0]).strip() if filled else None
+    return None
+
+
+def student_rows(workbook: StreamingWorkbook, sheet_name: str):
+    """Yield (layout, year label, {column: value}) for each named student row of a component-scored
+    skill sheet; other sheets yield nothing"""
+    header_rows = {}
+    layout = None
+    for cells in workbook.open_sheet(sheet_name).rows():
+        values = {c.column: c.value for c in cells}
+        if layout is None:
+            if cells[0].row <= HEADER_ROWS:
+                header_rows[cells[0].row] = values
+                continue
+            layout = SkillLayout.detect(header_rows)
+            if layout is None:
+                return
+            year = year_label(header_rows)
+
+        name = values.get(1)
+        if isinstance(name, str) and name.strip().lower() in STOP_LABELS:
+            return
+        if isinstance(name, str) and name.strip():
+            yield layout, year, values
+
+
+class SchoolAggregate:
+    """Mergeable counts keyed by (school, year level, skill[, level | component])"""
+
+    def __init__(self):
+        self.levels = Counter()         # (school, year, skill, level) -> students
+        self.assessed = Counter()       # (school, year, skill, component) -> students scored
+        self.passed = Counter()         # (school, year, skill, component) -> students at the pass mark
+        self.workbooks = 0
+
+    def merge(self, other: "SchoolAggregate") -> "SchoolAggregate":
+        self.levels.update(other.levels)
+        self.assessed.update(other.assessed)
+        self.passed.update(other.passed)
+        self.workbooks += other.workbooks
+        return self
+
+    def add_workbook(self, path, school: str):
+        """Stream every component-scored skill sheet of one tracker into the counts"""
+        with StreamingWorkbook(str(path)) as workbook:
+            for sheet_name in workbook.sheetnames:
+                self._add_sheet(workbook, sheet_name, school)
+        self.workbooks += 1
+
+    def _add_sheet(self, workbook: StreamingWorkbook, sheet_name: str, school: str):
+        for layout, year, values in student_rows(workbook, sheet_name):
+            age = values.get(layout.age_column)
+            student_year = year or (f"Age {int(age)}" if isinstance(age, (int, float)) else "Unknown")
+
+            scored = False
+            for column, component in layout.components.items():
+                value = values.get(column)
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    key = (school, student_year, sheet_name, component)
+                    self.assessed[key] += 1
+                    self.passed[key] += value >= layout.pass_mark
+                    scored = True
+            if scored:
+                norm = values.get(layout.norm_column)
+                level = LEVEL_NAMES.get(norm.strip().title()) if isinstance(norm, str) else None
+                self.levels[(school, student_year, sheet_name, level or UNCLASSIFIED)] += 1
+
+    def level_distribution(self) -> list:
+        """[(school, year, skill, level, count, percent of the skill's students)]"""
+        totals = Counter()
+        for (school, year, skill, _), count in self.levels.items():
+            totals[(school, year, skill)] += count
+        return [(*key, count, 100 * count / totals[key[:3]]) for key, count in sorted(self.levels.items())]
+
+    def component_pass_rates(self) -> list:
+        """[(school, year, skill, component, assessed, passed, pass rate %)]"""
+        return [(*key, assessed, self.passed[key], 100 * self.passed[key] / assessed)
+                for key, assessed in sorted(self.assessed.items())]
+
+    def to_dict(self) -> dict:
+        return {
+            "version": PARTIAL_VERSION,
+            "workbooks": self.workbooks,
+            "levels": [[*key, count] for key, count in self.levels.items()],
+            "components": [[*key, assessed, self.passed[key]] for key, assessed in self.assessed.items()],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SchoolAggregate":
+        aggregate = cls()
+        aggregate.workbooks = data["workbooks"]
+        for *key, count in data["levels"]:
+            aggregate.levels[tuple(key)] = count
+        for *key, assessed, passed in data["components"]:
+            aggregate.assessed[tuple(key)] = assessed
+            aggregate.passed[tuple(key)] = passed
+        return aggregate
+
+
+def _fingerprint(path) -> dict:
+    """{part: [crc32, size]} for every part - read from the central directory only"""
+    with zipfile.ZipFile(path) as archive:
+        return {info.filename: [info.CRC, info.file_size] for info in archive.infolist()}
+
+
+def workbook_aggregate(path: Path, school: str, cache_dir: Path = None) -> SchoolAggregate:
+    """One tracker's partial aggregate, reused from cache_dir while its parts are unchanged"""
+    cache_file = None
+    if cache_dir is not None:
+        digest = hashlib.sha1(f"{Path(path).resolve()}|{school}".encode()).hexdigest()[:16]
+        cache_file = cache_dir / f"{digest}.json"
+        sources = _fingerprint(path)
+        if cache_file.exists():
+            try:
+                cached = json.loads(cache_file.read_text())
+                if cached.get("sources") == sources and cached["aggregate"].get("version") == PARTIAL_VERSION:
+                    return SchoolAggregate.from_dict(cached["aggregate"])
+            except (ValueError, KeyError, OSError):
+                pass
+
+    aggregate = SchoolAggregate()
+    aggregate.add_workbook(path, school)
+    if cache_file is not None:
+        cache_file.write_text(json.dumps({"workbook": str(path), "sources": sources, "aggregate": aggregate.to_dict()}))
+    return aggregate
+
+
+def reduce_workbooks(jobs: list, cache_dir: str = None) -> dict:
+    """Worker: fold a share of (workbook, school) jobs into one partial; failures are reported, not raised"""
+    aggregate = SchoolAggregate()
+    errors = []
+    for path, school in jobs:
+        try:
+            aggregate.merge(workbook_aggregate(Path(path), school, Path(cache_dir) if cache_dir else None))
+        except Exception as e:
+            errors.append((str(path), f"{type(e).__name__}: {e}"))
+    return {"aggregate": aggregate.to_dict(), "errors": errors}
+
+
+def aggregate_school(jobs: list, workers: int, cache_dir: Path = None):
+    """(merged SchoolAggregate, errors) - jobs are dealt round-robin so each worker reduces locally"""
+    if cache_dir is not None:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+    shares = [jobs[i::workers] for i in range(workers) if jobs[i::workers]]
+    total, errors = SchoolAggregate(), []
+    with ProcessPoolExecutor(max_workers=len(shares) or 1) as pool:
+        for partial in pool.map(reduce_workbooks, shares, [str(cache_dir) if cache_dir else None] * len(shares)):
+            total.merge(SchoolAggregate.from_dict(partial["aggregate"]))
+            errors.extend(partial["errors"])
+    return total, errors
+
+
+def write_reports(aggregate: SchoolAggregate, output_dir: Path) -> list:
+    """level_distribution.csv, component_pass_rates.csv and the merged aggregate as JSON"""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    levels_file = output_dir / "level_distribution.csv"
+    with open(levels_file, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["school", "year_level", "skill", "level", "students", "percent"])
+        writer.writerows((*row[:5], f"{row[5]:.1f}") for row in aggregate.level_distribution())
+
+    components_file = output_dir / "component_pass_rates.csv"
+    with open(components_file, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["school", "year_level", "skill", "component", "assessed", "passed", "pass_rate"])
+        writer.writerows((*row[:6], f"{row[6]:.1f}") for row in aggregate.component_pass_rates())
+
+    aggregate_file = output_dir / "whole_school_aggregate.json"
+    aggregate_file.write_text(json.dumps(aggregate.to_dict()))
+    return [levels_file, components_file, aggregate_file]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Roll class trackers up into whole-school level and component statistics")
+    parser.add_argument("source", help="Directory of trackers or a glob pattern")
+    parser.add_argument("-o", "--output", default="whole_school", help="Output folder")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count(), help="Worker processes (default: CPU count)")
+    parser.add_argument("--school", help="School name for every workbook (default: each workbook's folder name)")
+    parser.add_argument("--full", action="store_true", help="Ignore cached per-workbook partials")
+    args = parser.parse_args()
+
+    workbooks = find_workbooks(args.source)
+    if not workbooks:
+        print(f"✗ No workbooks found for: {args.source}")
+        return
+
+    output_dir = Path(args.output)
+    jobs = [(str(path), args.school or path.parent.name) for path in workbooks]
+    started = time.perf_counter()
+    aggregate, errors = aggregate_school(jobs, max(1, args.workers), None if args.full else output_dir / "partials")
+    for path, error in errors:
+        print(f"  ✗ {Path(path).name}: {error}")
+
+    for path in write_reports(aggregate, output_dir):
+        print(f"✓ Saved: {path}")
+    students = sum(aggregate.levels.values())
+    print(f"✓ {aggregate.workbooks} workbooks, {students} student-skill results in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Compact skills.json format.
+Most skills share threshold profiles and component lists verbatim, so the compact
+form stores each distinct table once ("profiles", "componentLists") and skills
+refer to them by index. It is written minified (skills.min.json) and, when msgpack
+is installed, as skills.msgpack. SkillCatalog loads any of the three files and
+rebuilds the expanded skill dicts - identical to skills.json - on first access.
+Only the Python tooling (asts_scoring) reads the compact files so far; prisma/seed.ts
+and the app still load the expanded skills.json.
+
+Usage:
+    python skills_format.py skills.json            # write skills.min.json (+ skills.msgpack)
+    python skills_format.py skills.min.json run    # print one expanded skill
+"""
+
+import json
+import sys
+from pathlib import Path
+
+try:
+    import msgpack
+except ImportError:  # Binary variant is optional
+    msgpack = None
+
+COMPACT_FORMAT = "skills-compact-1"
+# Skill keys whose values are interned, and the table each one is stored in
+INTERNED_KEYS = {"normativeThresholds": "profiles", "components": "componentLists"}
+
+
+def _intern(node, tables: dict, index: dict):
+    """Copy of node with every INTERNED_KEYS value replaced by its table index (recursive)"""
+    if isinstance(node, list):
+        return [_intern(item, tables, index) for item in node]
+    if not isinstance(node, dict):
+        return node
+    compact = {}
+    for key, value in node.items():
+        table = INTERNED_KEYS.get(key)
+        if table is None:
+            compact[key] = _intern(value, tables, index)
+            continue
+        fingerprint = (table, json.dumps(value, sort_keys=True))
+        if fingerprint not in index:
+            index[fingerprint] = len(tables[table])
+            tables[table].append(value)
+        compact[key] = index[fingerprint]
+    return compact
+
+
+def _expand(node, tables: dict):
+    """Inverse of _intern - referenced tables are shared, not copied"""
+    if isinstance(node, list):
+        return [_expand(item, tables) for item in node]
+    if not isinstance(node, dict):
+        return node
+    return {key: tables[INTERNED_KEYS[key]][value] if key in INTERNED_KEYS and isinstance(value, int)
+            else _expand(value, tables)
+            for key, value in node.items()}
+
+
+def compact_skills(output: dict) -> dict:
+    """skills.json document -> compact document with shared profile/component tables"""
+    tables = {table: [] for table in INTERNED_KEYS.values()}
+    index = {}
+    skills = [_intern(skill, tables, index) for skill in output["skills"]]
+    header = {key: value for key, value in output.items() if key != "skills"}
+    return {**header, "format": COMPACT_FORMAT, **tables, "skills": skills}
+
+
+def write_compact(output: dict, json_path) -> list:
+    """Write skills.min.json (and skills.msgpack if msgpack is installed) next to json_path"""
+    compact = compact_skills(output)
+    json_path = Path(json_path)
+    min_path = json_path.with_name(f"{json_path.stem}.min.json")
+    min_path.write_text(json.dumps(compact, separators=(",", ":")))
+    written = [min_path]
+    if msgpack is not None:
+        msgpack_path = json_path.with_name(f"{json_path.stem}.msgpack")
+        msgpack_path.write_bytes(msgpack.packb(compact))
+        written.append(msgpack_path)
+    return written
+
+
+class SkillCatalog:
+    """Skills by id from an expanded, compact or msgpack file; each skill is expanded on first access"""
+
+    def __init__(self, document: dict):
+        if document.get("format") != COMPACT_FORMAT:
+            document = compact_skills(document)
+        self.header = {key: value for key, value in document.items()
+                       if key not in INTERNED_KEYS.values() and key not in ("skills", "format")}
+        self.tables = {table: document[table] for table in INTERNED_KEYS.values()}
+        self._compact = {skill["id"]: skill for skill in document["skills"]}
+        self._expanded = {}
+
+    @classmethod
+    def load(cls, path) -> "SkillCatalog":
+        path = Path(path)
+        if path.suffix == ".msgpack":
+            if msgpack is None:
+                raise ImportError("msgpack is not installed - load skills.min.json instead")
+            return cls(msgpack.unpackb(path.read_bytes(), strict_map_key=False))
+        return cls(json.loads(path.read_bytes()))
+
+    @property
+    def ids(self) -> list:
+        return list(self._compact)
+
+    def __len__(self) -> int:
+        return len(self._compact)
+
+    def __contains__(self, skill_id) -> bool:
+        return skill_id in self._compact
+
+    def __getitem__(self, skill_id: str) -> dict:
+        if skill_id not in self._expanded:
+            self._expanded[skill_id] = _expand(self._compact[skill_id], self.tables)
+        return self._expanded[skill_id]
+
+    def __iter__(self):
+        return (self[skill_id] for skill_id in self._compact)
+
+    def to_document(self) -> dict:
+        """The full skills.json document"""
+        return {**self.header, "skills": list(self)}
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python skills_format.py <skills.json> [skill_id]")
+        sys.exit(1)
+    catalog = SkillCatalog.load(sys.argv[1])
+    if len(sys.argv) > 2:
+        print(json.dumps(catalog[sys.argv[2]], indent=2))
+        return
+    source = Path(sys.argv[1])
+    for path in write_compact(catalog.to_document(), source):
+        print(f"✓ {path.name}: {path.stat().st_size / 1024:.1f} KB (from {source.stat().st_size / 1024:.1f} KB)")
+    if msgpack is None:
+        print("- msgpack not installed, binary variant skipped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Shared workbook session for the extractor stages.
+The archive is opened once and every part is parsed lazily on first access and
+memoized, so validations, named ranges, formulas and VBA reuse the same parse
+instead of each stage calling load_workbook() from scratch.
+"""
+
+from functools import cached_property
+
+from formula_analysis import FormulaAnalysis
+from range_index import RangeIndex
+from vba_project import read_vba_modules
+from xlsx_stream import StreamingWorkbook
+
+VBA_PROJECT_PART = "xl/vbaProject.bin"
+
+
+class WorkbookSession(StreamingWorkbook):
+    """StreamingWorkbook plus memoized artifacts shared across extractor stages"""
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._formula_cells = {}
+        self._range_indexes = {}
+
+    @cached_property
+    def namelist(self) -> list:
+        return self.archive.namelist()
+
+    @cached_property
+    def vba_project(self) -> bytes:
+        """Raw vbaProject.bin, or None for a macro-free workbook"""
+        if VBA_PROJECT_PART not in self.namelist:
+            return None
+        return self.archive.read(VBA_PROJECT_PART)
+
+    @cached_property
+    def vba_modules(self) -> list:
+        """Decompressed VBA modules (see vba_project.read_vba_modules)"""
+        if self.vba_project is None:
+            return []
+        return read_vba_modules(self.vba_project)
+
+    def formula_cells(self, sheet_name: str) -> list:
+        """StreamCells that hold a formula, streamed from the sheet part on first request"""
+        if sheet_name not in self._formula_cells:
+            sheet = self.open_sheet(sheet_name)
+            self._formula_cells[sheet_name] = [cell for row in sheet.rows() for cell in row if cell.formula]
+        return self._formula_cells[sheet_name]
+
+    def range_index(self, sheet_name: str) -> RangeIndex:
+        """Merges, conditional formats and validations of a sheet, indexed for cell lookups on first request"""
+        if sheet_name not in self._range_indexes:
+            self._range_indexes[sheet_name] = RangeIndex.from_sheet(self, sheet_name)
+        return self._range_indexes[sheet_name]
+
+    @cached_property
+    def formula_analysis(self) -> FormulaAnalysis:
+        """Formula templates and dependency graph across every sheet"""
+        return FormulaAnalysis.from_formula_cells(
+            {sheet_name: self.formula_cells(sheet_name) for sheet_name in self.sheetnames})
+
+    @cached_property
+    def evaluator(self):
+        """Vectorized formula evaluator over this workbook (see formula_eval)"""
+        from formula_eval import WorkbookEvaluator
+        return WorkbookEvaluator(self)
@@ -0,0 +1,600 @@
+#!/usr/bin/env python3
+"""
+Single-pass streaming reader for .xlsx/.xlsm workbooks.
+Parses each worksheet XML part once and yields the cached value AND the formula
+of every cell together, so extractors no longer need two full openpyxl loads
+(data_only=True + data_only=False). Memory is bounded by one row of cells.
+Worker processes can share one parsed shared-strings table through a
+memory-mapped file (write_string_table / MappedStrings) instead of re-parsing it.
+"""
+
+import mmap
+import re
+import struct
+import zipfile
+from array import array
+from typing import NamedTuple, Optional
+
+from openpyxl.formula.translate import Translator
+from openpyxl.packaging.relationship import get_dependents, get_rels_path
+from openpyxl.reader.strings import read_string_table
+from openpyxl.reader.workbook import WorkbookParser
+from openpyxl.styles.numbers import builtin_format_code, is_date_format, is_timedelta_format
+from openpyxl.utils import get_column_letter, range_boundaries
+from openpyxl.utils.cell import coordinate_from_string, column_index_from_string
+from openpyxl.utils.datetime import from_excel, from_ISO8601
+from openpyxl.xml.constants import ARC_SHARED_STRINGS, ARC_STYLE, ARC_WORKBOOK, COMMENTS_NS, SHEET_MAIN_NS
+from openpyxl.xml.functions import fromstring, iterparse
+
+ROW_TAG = f"{{{SHEET_MAIN_NS}}}row"
+CELL_TAG = f"{{{SHEET_MAIN_NS}}}c"
+VALUE_TAG = f"{{{SHEET_MAIN_NS}}}v"
+FORMULA_TAG = f"{{{SHEET_MAIN_NS}}}f"
+INLINE_STRING_TAG = f"{{{SHEET_MAIN_NS}}}is"
+TEXT_TAG = f"{{{SHEET_MAIN_NS}}}t"
+DIMENSION_TAG = f"{{{SHEET_MAIN_NS}}}dimension"
+DATA_TAG = f"{{{SHEET_MAIN_NS}}}sheetData"
+MERGE_CELL_TAG = f"{{{SHEET_MAIN_NS}}}mergeCell"
+CF_TAG = f"{{{SHEET_MAIN_NS}}}conditionalFormatting"
+CF_RULE_TAG = f"{{{SHEET_MAIN_NS}}}cfRule"
+CF_FORMULA_TAG = f"{{{SHEET_MAIN_NS}}}formula"
+NUM_FMT_TAG = f"{{{SHEET_MAIN_NS}}}numFmt"
+FONTS_TAG = f"{{{SHEET_MAIN_NS}}}fonts"
+FILLS_TAG = f"{{{SHEET_MAIN_NS}}}fills"
+CELL_XFS_TAG = f"{{{SHEET_MAIN_NS}}}cellXfs"
+COLOR_TAG = f"{{{SHEET_MAIN_NS}}}color"
+PATTERN_FILL_TAG = f"{{{SHEET_MAIN_NS}}}patternFill"
+FG_COLOR_TAG = f"{{{SHEET_MAIN_NS}}}fgColor"
+ALIGNMENT_TAG = f"{{{SHEET_MAIN_NS}}}alignment"
+COMMENT_TAG = f"{{{SHEET_MAIN_NS}}}comment"
+COMMENT_TEXT_TAG = f"{{{SHEET_MAIN_NS}}}text"
+RUN_TAG = f"{{{SHEET_MAIN_NS}}}r"
+DATA_VALIDATION_TAG = f"{{{SHEET_MAIN_NS}}}dataValidation"
+DV_FORMULA1_TAG = f"{{{SHEET_MAIN_NS}}}formula1"
+DV_FORMULA2_TAG = f"{{{SHEET_MAIN_NS}}}formula2"
+SHEET_TAG = f"{{{SHEET_MAIN_NS}}}sheet"
+DEFINED_NAME_TAG = f"{{{SHEET_MAIN_NS}}}definedName"
+
+# Excel 2010 extension validations (lists that refer to other sheets) live in <extLst>
+X14_NS = "http://schemas.microsoft.com/office/spreadsheetml/2009/9/main"
+XM_NS = "http://schemas.microsoft.com/office/excel/2006/main"
+X14_DATA_VALIDATION_TAG = f"{{{X14_NS}}}dataValidation"
+X14_FORMULA1_PATH = f"{{{X14_NS}}}formula1/{{{XM_NS}}}f"
+X14_FORMULA2_PATH = f"{{{X14_NS}}}formula2/{{{XM_NS}}}f"
+XM_SQREF_TAG = f"{{{XM_NS}}}sqref"
+
+SCAN_CHUNK = 1 << 16    # Bytes read per step when scanning a part for one element
+ROOT_TAG_RE = re.compile(rb"<([A-Za-z_][\w.:-]*)(?:\s[^>]*)?>")
+STRING_COUNT = struct.Struct("<q")   # Header of a write_string_table file
+
+
+class StreamCell(NamedTuple):
+    """One populated cell: cached value and formula side by side"""
+    row: int
+    column: int
+    coordinate: str
+    value: object            # Cached value (what data_only=True would return)
+    formula: Optional[str]   # "=..." text, shared formulas translated; None for constants
+    style_id: int
+
+
+class CellFormat(NamedTuple):
+    """A cellXfs entry resolved to the strings the formatting report prints"""
+    font_color: str
+    fill_color: str
+    alignment: str
+
+
+DEFAULT_FORMAT = CellFormat("Default", "Default", "Default")
+
+
+def _color_text(element) -> str:
+    """<color>/<fgColor> -> ARGB, or theme/indexed/auto reference (same precedence as openpyxl)"""
+    if element is None:
+        return "Default"
+    if element.get("indexed") is not None:
+        return f"indexed:{element.get('indexed')}"
+    if element.get("theme") is not None:
+        tint = float(element.get("tint", 0))
+        return f"theme:{element.get('theme')}" + (f"{tint:+.2f}" if tint else "")
+    if element.get("auto") is not None:
+        return "auto"
+    return element.get("rgb", "00000000")
+
+
+class StyleIndex:
+    """Style id (a cell's `s` attribute) -> CellFormat, plus date/timedelta style ids.
+    Built once from the raw xl/styles.xml part; every lookup afterwards is a list index."""
+
+    def __init__(self, xml: bytes = None):
+        self.formats = []
+        self.date_ids = set()
+        self.timedelta_ids = set()
+        if xml:
+            self._build(fromstring(xml))
+
+    def _build(self, root):
+        custom = {int(f.get("numFmtId")): f.get("formatCode") for f in root.iter(NUM_FMT_TAG)}
+
+        fonts = root.find(FONTS_TAG)
+        font_colors = [_color_text(font.find(COLOR_TAG)) for font in (fonts if fonts is not None else [])]
+
+        fills = root.find(FILLS_TAG)
+        fill_colors = []
+        for fill in (fills if fills is not None else []):
+            pattern = fill.find(PATTERN_FILL_TAG)
+            if pattern is None:  # Gradient fills have no single start color
+                fill_colors.append("Default")
+            else:
+                fg_color = pattern.find(FG_COLOR_TAG)
+                fill_colors.append(_color_text(fg_color) if fg_color is not None else "00000000")
+
+        xfs = root.find(CELL_XFS_TAG)
+        for idx, xf in enumerate(xfs if xfs is not None else []):
+            font_id, fill_id = int(xf.get("fontId", 0)), int(xf.get("fillId", 0))
+            alignment = xf.find(ALIGNMENT_TAG)
+            self.formats.append(CellFormat(
+                font_colors[font_id] if font_id < len(font_colors) else "Default",
+                fill_colors[fill_id] if fill_id < len(fill_colors) else "Default",
+                "None/None" if alignment is None else f"{alignment.get('horizontal')}/{alignment.get('vertical')}",
+            ))
+
+            num_fmt_id = int(xf.get("numFmtId", 0))
+            fmt = custom.get(num_fmt_id) or builtin_format_code(num_fmt_id)
+            if fmt and is_date_format(fmt):
+                self.date_ids.add(idx)
+            if fmt and is_timedelta_format(fmt):
+                self.timedelta_ids.add(idx)
+
+    def __getitem__(self, style_id: int) -> CellFormat:
+        return self.formats[style_id] if style_id < len(self.formats) else DEFAULT_FORMAT
+
+
+def read_comments(src) -> dict:
+    """Map cell reference -> comment text from a raw commentsN.xml stream (phonetic runs skipped)"""
+    found = {}
+    for _, element in iterparse(src):
+        if element.tag == COMMENT_TAG:
+            text = element.find(COMMENT_TEXT_TAG)
+            if text is not None:
+                # Plain <t> and rich-text <r><t> runs; <rPh> phonetic runs are not part of the text
+                found[element.get("ref")] = "".join(
+                    (child.text if child.tag == TEXT_TAG else child.findtext(TEXT_TAG)) or ""
+                    for child in text if child.tag in (TEXT_TAG, RUN_TAG))
+            element.clear()
+    return found
+
+
+class DataValidation(NamedTuple):
+    """One <dataValidation> rule (or its x14 extension form)"""
+    type: Optional[str]
+    operator: Optional[str]
+    sqref: tuple
+    formula1: Optional[str]
+    formula2: Optional[str]
+    allow_blank: bool
+    show_dropdown: bool      # Excel stores "hide the in-cell dropdown" under this name
+    show_input_message: bool
+    prompt_title: Optional[str]
+    prompt: Optional[str]
+    show_error_message: bool
+    error_style: Optional[str]
+    error_title: Optional[str]
+    error: Optional[str]
+
+
+class DefinedName(NamedTuple):
+    """One <definedName>; scope is the sheet name for sheet-local names, else None"""
+    name: str
+    value: str
+    scope: Optional[str]
+    hidden: bool
+    comment: Optional[str]
+
+
+def _flag(element, name: str) -> bool:
+    return element.get(name) in ("1", "true")
+
+
+def scan_elements(src, local_names):
+    """Yield (local name, element) for every element named in local_names, in document order.
+
+    The part is scanned as raw bytes and only the matching fragments are parsed -
+    everything in between (e.g. a large <sheetData>) is never tokenized. Each fragment
+    is parsed inside a copy of the part's root start tag so namespace prefixes resolve.
+    """
+    names = b"|".join(re.escape(name.encode()) for name in local_names)
+    start_re = re.compile(rb"<((?:[\w.-]+:)?(" + names + rb"))(?=[\s/>])")
+    buffer, position, root = b"", 0, None
+
+    while True:
+        chunk = src.read(SCAN_CHUNK)
+        buffer += chunk
+        if root is None:
+            root = ROOT_TAG_RE.search(buffer, buffer.find(b"<", buffer.find(b"?>") + 1))
+            if root is None:
+                if chunk:
+                    continue
+                return
+            wrap_open, wrap_close = root.group(0), b"</" + root.group(1) + b">"
+            position = root.end()
+
+        incomplete = None
+        for match in start_re.finditer(buffer, position):
+            tag_end = buffer.find(b">", match.end())
+            if tag_end < 0:
+                incomplete = match.start()
+                break
+            if buffer[tag_end - 1:tag_end] == b"/":
+                end = tag_end + 1
+            else:
+                close = b"</" + match.group(1) + b">"
+                end = buffer.find(close, tag_end)
+                if end < 0:
+                    incomplete = match.start()
+                    break
+                end += len(close)
+            yield match.group(2).decode(), fromstring(wrap_open + buffer[match.start():end] + wrap_close)[0]
+            position = end
+
+        if not chunk:
+            return
+        # Drop scanned bytes, keeping an unfinished element or a tail that may hold a split start tag
+        keep = incomplete if incomplete is not None else max(position, len(buffer) - 64)
+        buffer, position = buffer[keep:], max(position - keep, 0)
+
+
+def _data_validation(element) -> DataValidation:
+    if element.tag == X14_DATA_VALIDATION_TAG:
+        sqref = element.findtext(XM_SQREF_TAG) or ""
+        formula1, formula2 = element.findtext(X14_FORMULA1_PATH), element.findtext(X14_FORMULA2_PATH)
+    else:
+        sqref = element.get("sqref", "")
+        formula1, formula2 = element.findtext(DV_FORMULA1_TAG), element.findtext(DV_FORMULA2_TAG)
+    return DataValidation(
+        element.get("type"), element.get("operator"), tuple(sqref.split()), formula1, formula2,
+        _flag(element, "allowBlank"), _flag(element, "showDropDown"),
+        _flag(element, "showInputMessage"), element.get("promptTitle"), element.get("prompt"),
+        _flag(element, "showErrorMessage"), element.get("errorStyle"), element.get("errorTitle"), element.get("error"),
+    )
+
+
+def read_data_validations(src) -> list:
+    """DataValidation rules from a raw worksheet part - <dataValidations> plus x14 ones in <extLst>"""
+    rules = []
+    for name, element in scan_elements(src, ("dataValidations", "extLst")):
+        tag = DATA_VALIDATION_TAG if name == "dataValidations" else X14_DATA_VALIDATION_TAG
+        rules.extend(_data_validation(dv) for dv in element.iter(tag))
+    return rules
+
+
+def read_defined_names(src) -> list:
+    """DefinedName entries from a raw xl/workbook.xml stream; stops at the end of <definedNames>"""
+    sheets, found = [], []
+    for name, element in scan_elements(src, ("sheets", "definedNames")):
+        if name == "sheets":
+            sheets = [sheet.get("name") for sheet in element.iter(SHEET_TAG)]
+            continue
+        for defined in element.iter(DEFINED_NAME_TAG):
+            local = defined.get("localSheetId")
+            scope = sheets[int(local)] if local is not None and int(local) < len(sheets) else None
+            found.append(DefinedName(defined.get("name"), defined.text or "", scope,
+                                     _flag(defined, "hidden"), defined.get("comment")))
+        break
+    return found
+
+
+def _cast_number(value: str):
+    """Convert a numeric cell string to int or float (same rule as openpyxl)"""
+    if "." in value or "E" in value or "e" in value:
+        return float(value)
+    return int(value)
+
+
+def write_string_table(strings: list, path):
+    """Store parsed shared strings as [count][count + 1 offsets][UTF-8 blob] for MappedStrings"""
+    encoded = [text.encode("utf-8") for text in strings]
+    offsets = array("q", [0])
+    for data in encoded:
+        offsets.append(offsets[-1] + len(data))
+    with open(path, "wb") as f:
+        f.write(STRING_COUNT.pack(len(encoded)))
+        f.write(offsets.tobytes())
+        f.write(b"".join(encoded))
+
+
+class MappedStrings:
+    """Read-only shared strings over a write_string_table file; each string is decoded on access"""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (self._count,) = STRING_COUNT.unpack_from(self._map)
+        self._blob = STRING_COUNT.size + 8 * (self._count + 1)
+        self._offsets = memoryview(self._map)[STRING_COUNT.size:self._blob].cast("q")
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> str:
+        if not -self._count <= index < self._count:
+            raise IndexError("shared string index out of range")
+        index %= self._count
+        return self._map[self._blob + self._offsets[index]:self._blob + self._offsets[index + 1]].decode("utf-8")
+
+    def close(self):
+        self._offsets.release()
+        self._map.close()
+
+
+class SheetStream:
+    """Iterates one worksheet part row by row.
+
+    Structure that Excel writes after <sheetData> (merged cells, conditional
+    formatting) is collected as the stream passes it, so it is complete once
+    rows() has been exhausted.
+    """
+
+    def __init__(self, book: "StreamingWorkbook", sheet_name: str):
+        self.book = book
+        self.sheet_name = sheet_name
+        self.dimension = None
+        self.merged_ranges = []
+        self.conditional_formats = []  # [(sqref, [(type, [formula, ...]), ...]), ...]
+        self.max_row_seen = 0
+        self.max_column_seen = 0
+        self._scanned = False
+
+        self._src = book.archive.open(book.sheet_part(sheet_name))
+        self._events = iterparse(self._src, events=("start", "end"))
+        self._data = None
+        self._read_header()
+
+    def _read_header(self):
+        """Advance to <sheetData>, picking up <dimension> on the way"""
+        for event, element in self._events:
+            if event == "end" and element.tag == DIMENSION_TAG:
+                self.dimension = element.get("ref")
+            elif event == "start" and element.tag == DATA_TAG:
+                self._data = element
+                return
+
+    def _scan_dimension(self):
+        """Used range from a separate pass over the row and cell refs, for sheets saved without <dimension>"""
+        self._scanned = True
+        min_col = min_row = max_col = max_row = row = 0
+        with self.book.archive.open(self.book.sheet_part(self.sheet_name)) as src:
+            for _, element in iterparse(src):
+                if element.tag == ROW_TAG:
+                    row = int(element.get("r", row + 1))
+                    columns, column = [], 0
+                    for c in element.iter(CELL_TAG):
+                        ref = c.get("r")
+                        column = column_index_from_string(coordinate_from_string(ref)[0]) if ref else column + 1
+                        columns.append(column)
+                    if columns:
+                        min_row, max_row = min_row or row, max(max_row, row)
+                        min_col = min(min_col or columns[0], columns[0])
+                        max_col = max(max_col, columns[-1])
+                    element.clear()
+                elif element.tag == DATA_TAG:
+                    break
+        if max_row:
+            self.dimension = f"{get_column_letter(min_col)}{min_row}:{get_column_letter(max_col)}{max_row}"
+
+    @property
+    def bounds(self):
+        """(min_col, min_row, max_col, max_row) from the sheet's <dimension> (pre-scanned from the rows
+        when it is missing), or None for an empty sheet"""
+        if not self.dimension and not self._scanned:
+            self._scan_dimension()
+        if not self.dimension:
+            return None
+        min_col, min_row, max_col, max_row = range_boundaries(self.dimension)
+        return (min_col, min_row, max_col or min_col, max_row or min_row)
+
+    @property
+    def max_row(self) -> int:
+        return self.bounds[3] if self.bounds else self.max_row_seen
+
+    @property
+    def max_column(self) -> int:
+        return self.bounds[2] if self.bounds else self.max_column_seen
+
+    def rows(self):
+        """Yield a list of StreamCell per populated <row>, then read trailing structure"""
+        shared_formulae = {}
+        row_counter = 0
+
+        for event, element in self._events:
+            if event != "end":
+                continue
+
+            if element.tag == ROW_TAG:
+                row_counter = int(element.get("r", row_counter + 1))
+                cells = []
+                col_counter = 0
+                for c in element.iter(CELL_TAG):
+                    cell = self._parse_cell(c, row_counter, col_counter, shared_formulae)
+                    col_counter = cell.column
+                    cells.append(cell)
+                if cells:
+                    self.max_row_seen = max(self.max_row_seen, row_counter)
+                    self.max_column_seen = max(self.max_column_seen, cells[-1].column)
+                self._data.clear()  # Drop the parsed row so memory stays at one row
+                if cells:
+                    yield cells
+
+            elif element.tag == MERGE_CELL_TAG:
+                self.merged_ranges.append(element.get("ref"))
+
+            elif element.tag == CF_TAG:
+                rules = []
+                for rule in element.iter(CF_RULE_TAG):
+                    formulas = [f.text for f in rule.iter(CF_FORMULA_TAG) if f.text]
+                    rules.append((rule.get("type"), formulas))
+                self.conditional_formats.append((element.get("sqref"), rules))
+                element.clear()
+
+        self._src.close()
+
+    def _parse_cell(self, element, row: int, col_counter: int, shared_formulae: dict) -> StreamCell:
+        coordinate = element.get("r")
+        if coordinate:
+            column_letter, row = coordinate_from_string(coordinate)
+            column = column_index_from_string(column_letter)
+        else:
+            column = col_counter + 1
+            coordinate = f"{get_column_letter(column)}{row}"
+
+        data_type = element.get("t", "n")
+        style_id = int(element.get("s", 0))
+        raw = element.findtext(VALUE_TAG) or None
+
+        value = None
+        if data_type == "inlineStr":
+            inline = element.find(INLINE_STRING_TAG)
+            if inline is not None:
+                value = "".join(t.text or "" for t in inline.iter(TEXT_TAG))
+        elif raw is not None:
+            if data_type == "n":
+                value = _cast_number(raw)
+                if style_id in self.book.styles.date_ids:
+                    try:
+                        value = from_excel(value, self.book.epoch,
+                                           timedelta=style_id in self.book.styles.timedelta_ids)
+                    except (OverflowError, ValueError):
+                        value = "#VALUE!"
+            elif data_type == "s":
+                value = self.book.shared_strings[int(raw)]
+            elif data_type == "b":
+                value = bool(int(raw))
+            elif data_type == "d":
+                value = from_ISO8601(raw)
+            else:  # "str" formula results and "e" errors are kept as text
+                value = raw
+
+        formula = None
+        f = element.find(FORMULA_TAG)
+        if f is not None:
+            formula = "=" + (f.text or "")
+            if f.get("t") == "shared":
+                si = f.get("si")
+                if f.text is not None:
+                    shared_formulae[si] = Translator(formula, coordinate)
+                elif si in shared_formulae:
+                    formula = shared_formulae[si].translate_formula(coordinate)
+
+        return StreamCell(row, column, coordinate, value, formula, style_id)
+
+
+class StreamingWorkbook:
+    """Opens the archive once; workbook-level parts are parsed lazily on first use.
+    A worker that already knows its sheet's part, the epoch and the shared strings
+    (e.g. a MappedStrings) can pass them in and skip parsing workbook.xml / sharedStrings.xml."""
+
+    def __init__(self, path: str, shared_strings=None, sheet_parts: dict = None, epoch=None):
+        self.path = path
+        self.archive = zipfile.ZipFile(path, "r")
+        self._sheet_parts = sheet_parts
+        self._shared_strings = shared_strings
+        self._styles = None
+        self._comments = {}
+        self._epoch = epoch
+
+    def close(self):
+        self.archive.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _parse_workbook(self):
+        parser = WorkbookParser(self.archive, ARC_WORKBOOK)
+        parser.parse()
+        self._epoch = parser.wb.epoch
+        self._sheet_parts = {sheet.name: rel.target for sheet, rel in parser.find_sheets()}
+
+    @property
+    def sheetnames(self) -> list:
+        if self._sheet_parts is None:
+            self._parse_workbook()
+        return list(self._sheet_parts)
+
+    @property
+    def epoch(self):
+        if self._epoch is None:
+            self._parse_workbook()
+        return self._epoch
+
+    def sheet_part(self, sheet_name: str) -> str:
+        if self._sheet_parts is None:
+            self._parse_workbook()
+        return self._sheet_parts[sheet_name]
+
+    @property
+    def shared_strings(self) -> list:
+        if self._shared_strings is None:
+            if ARC_SHARED_STRINGS in self.archive.namelist():
+                with self.archive.open(ARC_SHARED_STRINGS) as src:
+                    self._shared_strings = read_string_table(src)
+            else:
+                self._shared_strings = []
+        return self._shared_strings
+
+    @property
+    def styles(self) -> StyleIndex:
+        """Style index built from xl/styles.xml on first use"""
+        if self._styles is None:
+            if ARC_STYLE in self.archive.namelist():
+                self._styles = StyleIndex(self.archive.read(ARC_STYLE))
+            else:
+                self._styles = StyleIndex()
+        return self._styles
+
+    def open_sheet(self, sheet_name: str) -> SheetStream:
+        return SheetStream(self, sheet_name)
+
+    def resolve_style(self, style_id: int) -> CellFormat:
+        """Resolved (font color, fill color, alignment) for a cell's `s` attribute"""
+        return self.styles[style_id]
+
+    @property
+    def worksheet_parts(self) -> list:
+        if self._sheet_parts is None:
+            self._parse_workbook()
+        return list(self._sheet_parts.values())
+
+    def comment_parts(self, sheet_name: str) -> list:
+        """Archive names of the comments parts attached to a sheet"""
+        rels_path = get_rels_path(self.sheet_part(sheet_name))
+        if rels_path not in self.archive.namelist():
+            return []
+        return [rel.target for rel in get_dependents(self.archive, rels_path).find(COMMENTS_NS)]
+
+    def sheet_source_parts(self, sheet_name: str) -> list:
+        """Every part a sheet dump reads: the worksheet, shared strings, styles and comments"""
+        return [self.sheet_part(sheet_name), ARC_SHARED_STRINGS, ARC_STYLE] + self.comment_parts(sheet_name)
+
+    def data_validations(self, sheet_name: str) -> list:
+        """DataValidation rules of one sheet, read without parsing its cells"""
+        with self.archive.open(self.sheet_part(sheet_name)) as src:
+            return read_data_validations(src)
+
+    @property
+    def defined_names(self) -> list:
+        """DefinedName entries of the workbook, read from xl/workbook.xml"""
+        with self.archive.open(ARC_WORKBOOK) as src:
+            return read_defined_names(src)
+
+    def comments(self, sheet_name: str) -> dict:
+        """Map cell coordinate -> comment text, indexed from the sheet's comments parts once"""
+        if sheet_name not in self._comments:
+            found = {}
+            for part in self.comment_parts(sheet_name):
+                with self.archive.open(part) as src:
+                    found.update(read_comments(src))
+            self._comments[sheet_name] = found
+        return self._comments[sheet_name]